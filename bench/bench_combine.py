@@ -0,0 +1,98 @@
+"""
+Benchmark: legacy combine.py ingestion (ExcelFile + read_excel per sheet,
+repeated pd.concat) vs combine.collect_state_data (one parse per file,
+process pool, one concat per city).
+
+    python bench/bench_combine.py [--files 40] [--cities 25] [--rows 40]
+
+Batch workbooks are generated into a temp directory; cities repeat across
+files and a share of the rows are duplicates, like real batch output.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import combine
+
+COLUMNS = ["Name", "Address", "Phone", "Website", "Email",
+           "Google Maps URL", "Latitude", "Longitude"]
+
+# ---------------- DATA ----------------
+def place_url(i, query):
+    return (f"https://www.google.com/maps/place/Salon+{i}/data=!4m7!3m6!1s0x872b{i:012x}:0x{i:016x}"
+            f"!8m2!3d33.{i:06d}!4d-111.{i:06d}!16s%2Fg%2F11s{i:06d}!19sChIJ?authuser=0&hl=en&q={query}")
+
+def generate(out_dir, files, cities, rows, seed=7):
+    rng = random.Random(seed)
+    city_names = [f"City {c:03d}" for c in range(cities * 3)]
+    paths = []
+    for n in range(files):
+        path = os.path.join(out_dir, f"ZZ_Testland_batch{n + 1}_2025-01-01_00-00-00.xlsx")
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            for city in rng.sample(city_names, cities):
+                base = city_names.index(city) * 1000
+                data = [
+                    [f"Salon {base + i}", f"{i} Main St", "(480) 555-0100", "NA", "NA",
+                     place_url(base + i, n), 33.0, -111.0]
+                    for i in (rng.randrange(rows * 2) for _ in range(rows))
+                ]
+                pd.DataFrame(data, columns=COLUMNS).to_excel(writer, sheet_name=city, index=False)
+        paths.append(path)
+    return paths
+
+# ---------------- LEGACY ----------------
+def legacy_collect(excel_files):
+    combined_data = {}
+    for file_path in excel_files:
+        excel_file = pd.ExcelFile(file_path)
+        for sheet_name in excel_file.sheet_names:
+            df = pd.read_excel(file_path, sheet_name=sheet_name)
+            if df.empty:
+                continue
+            df = df.fillna("NA")
+            if sheet_name in combined_data:
+                combined_data[sheet_name] = pd.concat([combined_data[sheet_name], df], ignore_index=True)
+            else:
+                combined_data[sheet_name] = df
+    for city in combined_data:
+        combined_data[city] = combined_data[city].drop_duplicates(subset=['Google Maps URL'], keep='first')
+    return combined_data
+
+# ---------------- BENCH ----------------
+def main():
+    args = sys.argv[1:]
+    def opt(name, default):
+        return int(args[args.index(name) + 1]) if name in args else default
+
+    files, cities, rows = opt("--files", 40), opt("--cities", 25), opt("--rows", 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"[+] Generating {files} workbooks x {cities} sheets x {rows} rows ...")
+        paths = generate(tmp, files, cities, rows)
+
+        start = time.perf_counter()
+        legacy = legacy_collect(paths)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=combine.WORKERS) as pool:
+            new, _, _ = combine.collect_state_data(paths, pool, verbose=False)
+        new_s = time.perf_counter() - start
+
+    legacy_rows = sum(len(df) for df in legacy.values())
+    new_rows = sum(len(df) for df in new.values())
+
+    print(f"\n{'='*60}")
+    print(f"Legacy:  {legacy_s:.2f}s  ({legacy_rows} rows after URL dedupe)")
+    print(f"New:     {new_s:.2f}s  ({new_rows} rows after place-key dedupe, {combine.WORKERS} workers)")
+    print(f"Speedup: {legacy_s / new_s:.2f}x")
+    print(f"{'='*60}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Micro-benchmark: legacy extract_email_fast parsing vs email_extractor.find_email
+over a corpus of saved homepages.
+
+    python bench/bench_email_extractor.py [corpus_dir] [--repeat N]
+
+Drop real saved salon homepages (*.html) into bench/corpus/homepages to
+benchmark against them.
+"""
+import os
+import re
+import sys
+import glob
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from email_extractor import find_email, DUMMY_EMAILS
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "homepages")
+EMAIL_REGEX = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
+
+# ---------------- LEGACY (main2.extract_email_fast before the extractor) ----------------
+def legacy_extract(raw):
+    html = raw.decode("utf-8", "replace")
+
+    mailtos = re.findall(r"mailto:([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})", html, re.I)
+    if mailtos:
+        return mailtos[0]
+
+    emails = EMAIL_REGEX.findall(html)
+    if emails:
+        def clean_email(e: str) -> str:
+            e = e.lower().replace("mailto:", "")
+            return re.sub(r"[^\w@.+-]", "", e)
+
+        cleaned = [clean_email(e) for e in emails]
+        if any(e in DUMMY_EMAILS for e in cleaned):
+            return "NA"
+
+        em = emails[0].lower()
+        local_part = em.split("@")[0]
+        if em.endswith((".png", ".jpg", ".jpeg", ".svg")):
+            return "NA"
+        digit_ratio = sum(c.isdigit() for c in local_part) / len(local_part)
+        if digit_ratio > 0.5:
+            return "NA"
+        return emails[0]
+    return "NA"
+
+# ---------------- BENCH ----------------
+def time_it(fn, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for raw in pages.values():
+            fn(raw)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+def main():
+    args = sys.argv[1:]
+    repeat = 50
+    if "--repeat" in args:
+        i = args.index("--repeat")
+        repeat = int(args[i + 1])
+        del args[i:i + 2]
+    corpus_dir = args[0] if args else CORPUS_DIR
+
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.htm*"))):
+        with open(path, "rb") as f:
+            pages[os.path.basename(path)] = f.read()
+
+    if not pages:
+        print(f"[!] No pages found in {corpus_dir}")
+        return
+
+    total_kb = sum(len(raw) for raw in pages.values()) / 1024
+    print(f"\n{'='*60}")
+    print(f"Corpus: {len(pages)} pages, {total_kb:.0f} KB | repeat {repeat}")
+    print(f"{'='*60}\n")
+
+    print(f"{'page':<28} {'legacy':<32} {'extractor'}")
+    found_legacy = found_new = 0
+    for name, raw in pages.items():
+        old, new = legacy_extract(raw), find_email(raw)
+        found_legacy += old != "NA"
+        found_new += new != "NA"
+        print(f"{name:<28} {old:<32} {new}")
+
+    legacy_s = time_it(legacy_extract, pages, repeat)
+    new_s = time_it(find_email, pages, repeat)
+
+    print(f"\nEmails found:  legacy {found_legacy}/{len(pages)} | extractor {found_new}/{len(pages)}")
+    print(f"Per page:      legacy {legacy_s*1e6:.0f} µs | extractor {new_s*1e6:.0f} µs")
+    print(f"Speedup:       {legacy_s / new_s:.2f}x\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""
+End-to-end benchmark of main2.py against the local Maps fixture
+(bench/maps_fixture.py): no Google, no real salon websites, repeatable.
+
+    python bench/bench_scraper.py [--cities 5] [--places 40] [--site-latency 300]
+                                  [--fail-rate 0.05] [--hang-rate 0.03]
+                                  [--card-complete 0.6] [--email-at footer]
+                                  [--save-baseline] [--fail-on-regression]
+
+Cities come from the state catalog (MAX_CITIES of them); BASE_URL and the
+website hosts are pointed at the fixture, every store/log/export goes to a
+temp directory. Reports cities/hour, businesses/sec, p50/p95 per stage,
+peak RSS and email accuracy, and compares them with the stored baseline
+(bench/baselines/scraper.json).
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import maps_fixture
+import main2
+import journal
+import metrics
+import concurrency
+import record_sink
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baselines", "scraper.json")
+REGRESSION = 0.10       # worse than baseline by more than this is flagged
+STAGES = ["search", "scroll", "page_acquire", "goto", "place_ready", "address_wait",
+          "email", "email_fetch", "export"]
+
+# ---------------- MEMORY ----------------
+class PeakRSS:
+    """
+    Samples the RSS of this process and its children (the Playwright driver
+    and Chromium) every `every` seconds; psutil when installed, otherwise
+    this process's own ru_maxrss.
+    """
+
+    def __init__(self, every=0.5):
+        self.every = every
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        try:
+            import psutil
+            proc = psutil.Process()
+            total = proc.memory_info().rss
+            for child in proc.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except ImportError:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+
+    def _run(self):
+        while not self._stop.wait(self.every):
+            self.peak_mb = max(self.peak_mb, self._sample())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self._sample())
+
+# ---------------- SETUP ----------------
+def isolate(workdir):
+    # every file main2 writes lands in the temp dir, not next to real runs
+    main2.OUTPUT_DIR = os.path.join(workdir, "excels")
+    main2.PROGRESS_FILE = os.path.join(workdir, "progress.json")
+    main2.EMAIL_CACHE_DB = os.path.join(workdir, "email_cache.sqlite")
+    main2.DEDUPE_DB = os.path.join(workdir, "seen_places.sqlite")
+    main2.GEO_TILES_DB = os.path.join(workdir, "geo_tiles.sqlite")
+    main2.QUEUE_DB = os.path.join(workdir, "city_jobs.sqlite")
+    journal.JOURNAL_DIR = os.path.join(workdir, "journal")
+    record_sink.RECORDS_DIR = os.path.join(workdir, "records")
+    metrics.LOG_DIR = os.path.join(workdir, "logs")
+    concurrency.LOG_DIR = os.path.join(workdir, "logs")
+    os.makedirs(main2.OUTPUT_DIR, exist_ok=True)
+
+def email_accuracy(truth):
+    records = [r for rows in record_sink.read_city_records(main2.TARGET_STATE_CODE).values() for r in rows]
+    with_site = [r for r in records if r[3] in truth]
+    right = sum(1 for r in with_site if r[4] == truth[r[3]])
+    return right / len(with_site) if with_site else 0.0
+
+# ---------------- RESULTS ----------------
+def collect(elapsed, peak_mb, accuracy, options):
+    snap = metrics.snapshot()
+    cities = snap["stages"].get("search", {}).get("count", 0)
+    records = sum(c["value"] for c in snap["counters"] if c["name"] == "records")
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "cities": cities,
+        "records": records,
+        "cities_per_hour": round(cities / elapsed * 3600, 1),
+        "businesses_per_sec": round(records / elapsed, 2),
+        "peak_rss_mb": round(peak_mb, 1),
+        "email_accuracy": round(accuracy, 3),
+        "stages": {
+            stage: {k: snap["stages"][stage][k] for k in ("count", "p50_s", "p95_s")}
+            for stage in STAGES if stage in snap["stages"]
+        },
+        "options": options,
+    }
+
+def flatten(result):
+    flat = {k: result[k] for k in ("cities_per_hour", "businesses_per_sec", "peak_rss_mb", "email_accuracy")}
+    for stage, stats in result["stages"].items():
+        flat[f"{stage} p50"] = stats["p50_s"]
+        flat[f"{stage} p95"] = stats["p95_s"]
+    return flat
+
+def compare(result, baseline):
+    """
+    Prints current vs baseline; returns the names of regressed metrics.
+    """
+    higher_is_better = {"cities_per_hour", "businesses_per_sec", "email_accuracy"}
+    now, base = flatten(result), flatten(baseline)
+
+    if result["options"] != baseline.get("options"):
+        print("[!] Fixture options differ from the baseline run, deltas are not comparable")
+
+    regressed = []
+    print(f"\n{'metric':<22}{'baseline':>12}{'now':>12}{'delta':>10}")
+    for name, value in now.items():
+        old = base.get(name)
+        if old is None:
+            print(f"{name:<22}{'-':>12}{value:>12}")
+            continue
+        delta = (value - old) / old if old else 0.0
+        worse = -delta if name in higher_is_better else delta
+        flag = "  ⚠" if worse > REGRESSION else ""
+        if flag:
+            regressed.append(name)
+        print(f"{name:<22}{old:>12}{value:>12}{delta:>+9.0%}{flag}")
+    return regressed
+
+# ---------------- BENCH ----------------
+def main():
+    args = sys.argv[1:]
+    def opt(name, default):
+        return type(default)(args[args.index(name) + 1]) if name in args else default
+
+    options = {
+        "places": opt("--places", maps_fixture.DEFAULTS["places"]),
+        "site_latency": opt("--site-latency", maps_fixture.DEFAULTS["site_latency"]),
+        "maps_latency": opt("--maps-latency", maps_fixture.DEFAULTS["maps_latency"]),
+        "site_kb": opt("--site-kb", maps_fixture.DEFAULTS["site_kb"]),
+        "fail_rate": opt("--fail-rate", maps_fixture.DEFAULTS["fail_rate"]),
+        "hang_rate": opt("--hang-rate", maps_fixture.DEFAULTS["hang_rate"]),
+        "card_complete": opt("--card-complete", maps_fixture.DEFAULTS["card_complete"]),
+        "email_at": opt("--email-at", maps_fixture.DEFAULTS["email_at"]),
+    }
+    cities = opt("--cities", 5)
+
+    server, state = maps_fixture.serve(options)
+    base_url = f"http://127.0.0.1:{state.port}"
+
+    with tempfile.TemporaryDirectory() as workdir:
+        isolate(workdir)
+        main2.BASE_URL = f"{base_url}/maps/search/"
+        main2.HOST_OVERRIDES = {maps_fixture.SITE_DOMAIN: "127.0.0.1"}
+        main2.MAX_CITIES = cities
+        main2.WORKERS = 1
+
+        print(f"[+] Fixture at {base_url} | {cities} cities x {options['places']} places")
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            asyncio.run(main2.main())
+            elapsed = time.perf_counter() - start
+
+        accuracy = email_accuracy(state.truth)
+    server.shutdown()
+
+    result = collect(elapsed, rss.peak_mb, accuracy, dict(options, cities=cities))
+
+    print(f"\n{'='*60}")
+    print(f"Cities/hour:     {result['cities_per_hour']}")
+    print(f"Businesses/sec:  {result['businesses_per_sec']} ({result['records']} records in {result['elapsed_s']}s)")
+    print(f"Peak RSS:        {result['peak_rss_mb']} MB")
+    print(f"Email accuracy:  {result['email_accuracy']:.1%}")
+    for stage, stats in result["stages"].items():
+        print(f"    {stage:<14} n={stats['count']:<6} p50 {stats['p50_s']:.2f}s  p95 {stats['p95_s']:.2f}s")
+    print(f"{'='*60}")
+
+    regressed = []
+    if "--save-baseline" in args:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"[💾] Baseline saved to {BASELINE_FILE}")
+    elif os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding="utf-8") as f:
+            regressed = compare(result, json.load(f))
+        print(f"\n{'[!] regressed: ' + ', '.join(regressed) if regressed else '[✓] no regressions'}")
+    else:
+        print("[!] No baseline yet, run with --save-baseline")
+
+    if regressed and "--fail-on-regression" in args:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Runs feed_harvest.harvest_feed against saved feed HTML fixtures served from
+a local HTTP server and compares the parsed cards with the expected fields.
+
+    python bench/feed_harvest_check.py
+
+Each bench/fixtures/<name>.html with a <name>.expected.json next to it is
+checked. "needs" lists the fields a card still sends to the detail page
+([] = the record is built from the card alone). Save a real results page
+(Ctrl+S on a Maps search) to add one.
+"""
+import os
+import sys
+import json
+import glob
+import asyncio
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feed_harvest import harvest_feed, missing_fields
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+def serve(directory):
+    handler = partial(QuietHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+async def check_all(base_url):
+    from playwright.async_api import async_playwright
+
+    failures = 0
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+
+        for expected_path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.expected.json"))):
+            name = os.path.basename(expected_path).replace(".expected.json", "")
+            with open(expected_path) as f:
+                expected = json.load(f)
+
+            await page.goto(f"{base_url}/{name}.html")
+            cards = {card["name"]: card for card in await harvest_feed(page)}
+
+            print(f"\n[+] {name}: {len(cards)} cards")
+            for biz, fields in expected.items():
+                fields = dict(fields)
+                expected_needs = fields.pop("needs", None)
+                card = cards.get(biz)
+                if card is None:
+                    print(f"    ✗ {biz}: missing")
+                    failures += 1
+                    continue
+                wrong = {k: (card[k], v) for k, v in fields.items() if card[k] != v}
+                needs = missing_fields(card)
+                if expected_needs is not None and needs != expected_needs:
+                    wrong["needs"] = (needs, expected_needs)
+                if wrong:
+                    failures += 1
+                    print(f"    ✗ {biz}: {wrong}")
+                else:
+                    print(f"    ✓ {biz}" + (f" (detail page for {', '.join(needs)})" if needs else ""))
+
+        await browser.close()
+    return failures
+
+def main():
+    server = serve(FIXTURES_DIR)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        failures = asyncio.run(check_all(base_url))
+    finally:
+        server.shutdown()
+
+    print(f"\n{'[✓] all fixtures match' if not failures else f'[!] {failures} mismatch(es)'}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
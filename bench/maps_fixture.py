@@ -0,0 +1,288 @@
+"""
+Local stand-in for Google Maps and salon websites, for offline benchmarks.
+
+    python bench/maps_fixture.py [--port 8765] [--places 40] [--site-latency 300]
+
+Serves on one port:
+    /maps/search/<query>    results page, div[role='feed'] that loads cards
+                            in pages on scroll and ends with span.HlvSq
+    /maps/place/<...>       place page with the data-item-id selectors
+    http://salon-<id>.bench.test:<port>/
+                            business homepages (point *.bench.test at
+                            127.0.0.1, see main2.HOST_OVERRIDES)
+
+Everything is generated deterministically from the city name and index, so
+two runs with the same options see the same places, sites and emails.
+"""
+import sys
+import json
+import time
+import zlib
+import random
+import threading
+from html import escape
+from urllib.parse import unquote, unquote_plus, quote_plus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SITE_DOMAIN = "bench.test"
+
+DEFAULTS = {
+    "places": 40,               # places per city search
+    "page_size": 10,            # cards added to the feed per scroll
+    "maps_latency": 150,        # ms, search/place pages and each feed page
+    "site_latency": 300,        # ms, mean homepage latency (exponential)
+    "site_kb": 60,              # homepage size
+    "fail_rate": 0.05,          # homepages answering 500
+    "hang_rate": 0.03,          # homepages slower than the scraper's timeout
+    "hang_seconds": 5.0,
+    "website_rate": 0.85,       # places that have a website at all
+    "card_complete": 0.6,       # cards showing phone + website: with a site, no detail page
+    "email_at": "footer",       # header | footer
+    # share of homepages per email placement
+    "email_mix": {"mailto": 0.45, "visible": 0.2, "obfuscated": 0.1, "none": 0.25},
+}
+
+FILLER = ("<p>Walk-ins welcome. Color, cuts, balayage, keratin and bridal styling by "
+          "our award winning team. Book online or call us today.</p>\n")
+
+# ---------------- GENERATION ----------------
+def _rng(*parts):
+    return random.Random("|".join(str(p) for p in parts))
+
+def _site_id(city, index):
+    return f"{zlib.crc32(f'{city}|{index}'.encode()):08x}"
+
+def make_place(city, index, options, port):
+    rng = _rng(city, index)
+    site_id = _site_id(city, index)
+    fid = zlib.crc32(f"fid|{city}|{index}".encode())
+    lat = 33.0 + rng.random()
+    lng = -112.0 + rng.random()
+    name = f"{city} Salon {index + 1}"
+
+    has_site = rng.random() < options["website_rate"]
+    return {
+        "name": name,
+        "address": f"{rng.randint(100, 9999)} E Main St",
+        "phone": f"(480) 555-{rng.randint(0, 9999):04d}",
+        "website": f"http://salon-{site_id}.{SITE_DOMAIN}:{port}/" if has_site else "NA",
+        "complete": rng.random() < options["card_complete"],
+        "path": (f"/maps/place/{quote_plus(name)}/data=!4m7!3m6!1s0x872b{fid:08x}:0x{fid:016x}"
+                 f"!8m2!3d{lat:.7f}!4d{lng:.7f}!16s%2Fg%2F11b{fid:08x}!19sChIJ?authuser=0&hl=en"),
+    }
+
+def site_behaviour(site_id, options):
+    """
+    {"status", "latency", "kind", "email"}; "email" is what a perfect
+    extractor should return ("NA" when the site fails or shows none).
+    """
+    rng = _rng("site", site_id)
+    roll = rng.random()
+    if roll < options["fail_rate"]:
+        status, latency = 500, options["site_latency"] / 1000
+    elif roll < options["fail_rate"] + options["hang_rate"]:
+        status, latency = 200, options["hang_seconds"]
+    else:
+        status, latency = 200, rng.expovariate(1000 / max(options["site_latency"], 1))
+
+    pick, kind = rng.random(), "none"
+    for name, share in options["email_mix"].items():
+        if pick < share:
+            kind = name
+            break
+        pick -= share
+
+    email = f"info@salon{site_id}.com" if kind != "none" else "NA"
+    hung = latency >= options["hang_seconds"]
+    return {
+        "status": status,
+        "latency": latency,
+        "kind": kind,
+        "email": email if status == 200 and not hung else "NA",
+    }
+
+def card_html(place):
+    lines = [
+        f'<div role="article" aria-label="{escape(place["name"])}" style="min-height:110px">',
+        f'  <a class="hfpxzc" aria-label="{escape(place["name"])}" href="{escape(place["path"])}"></a>',
+        f'  <div class="qBF1Pd">{escape(place["name"])}</div>',
+        f'  <div class="W4Efsd">Hair salon · ‎{escape(place["address"])}</div>',
+    ]
+    if place["complete"]:
+        lines.append(f'  <div class="W4Efsd">Open · Closes 7 PM · {escape(place["phone"])}</div>')
+        if place["website"] != "NA":
+            lines.append(f'  <a data-value="Website" href="{escape(place["website"])}">Website</a>')
+    lines.append("</div>")
+    return "\n".join(lines)
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{title} - Google Maps</title></head>
+<body>
+<input id="searchboxinput" value="{title}">
+<div role="main">
+<div role="feed" aria-label="Results for {title}" style="height:600px;overflow-y:auto">
+{first}
+</div>
+</div>
+<template id="rest">{rest}</template>
+<script>
+const feed = document.querySelector("div[role='feed']");
+const pending = Array.from(document.getElementById("rest").content.children);
+let loading = false;
+feed.addEventListener("scroll", () => {{
+    if (loading || feed.scrollTop + feed.clientHeight < feed.scrollHeight - 50) return;
+    loading = true;
+    setTimeout(() => {{
+        pending.splice(0, {page_size}).forEach(card => feed.appendChild(card));
+        if (!pending.length && !feed.querySelector("span.HlvSq")) {{
+            const end = document.createElement("div");
+            end.innerHTML = '<span class="HlvSq">You\\'ve reached the end of the list.</span>';
+            feed.appendChild(end);
+        }}
+        loading = false;
+    }}, {latency});
+}});
+</script>
+</body></html>
+"""
+
+PLACE_PAGE = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>{name} - Google Maps</title></head>
+<body>
+<div role="main">
+  <h1>{name}</h1>
+  <button data-item-id="address">{address}</button>
+  <button data-item-id="phone:tel:{tel}">{phone}</button>
+  {website}
+</div>
+</body></html>
+"""
+
+def homepage_html(site_id, behaviour, options):
+    email = f"info@salon{site_id}.com"
+    snippet = {
+        "mailto": f'<a href="mailto:{email}">Email us</a>',
+        "visible": f"<p>Contact: {email}</p>",
+        "obfuscated": f"<p>Contact: info [at] salon{site_id} [dot] com</p>",
+        "none": "<p>Call us to book.</p>",
+    }[behaviour["kind"]]
+
+    filler = FILLER * max(1, options["site_kb"] * 1024 // len(FILLER))
+    header = snippet if options["email_at"] == "header" else ""
+    footer = snippet if options["email_at"] != "header" else ""
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>Salon {site_id}</title></head>"
+            f"<body><header>{header}</header><main>{filler}</main><footer>{footer}</footer></body></html>")
+
+# ---------------- SERVER ----------------
+class FixtureState:
+    def __init__(self, options, port=0):
+        self.options = dict(DEFAULTS, **options)
+        self.port = port
+        self.places = {}        # maps path (without query) -> place
+        self.truth = {}         # website -> expected email
+        self.lock = threading.Lock()
+        self.hits = {"search": 0, "place": 0, "site": 0}
+
+    def search(self, city):
+        places = [make_place(city, i, self.options, self.port) for i in range(self.options["places"])]
+        with self.lock:
+            for place in places:
+                self.places[place["path"].split("?")[0]] = place
+                if place["website"] != "NA":
+                    site_id = place["website"].split("salon-")[1].split(".")[0]
+                    self.truth[place["website"]] = site_behaviour(site_id, self.options)["email"]
+        return places
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    state = None    # FixtureState, set by serve()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client gave up (timeout), that is the point of a hang
+
+    def do_GET(self):
+        state = self.state
+        options = state.options
+        host = (self.headers.get("Host") or "").split(":")[0]
+
+        if host.endswith("." + SITE_DOMAIN):
+            site_id = host.split(".")[0].replace("salon-", "")
+            behaviour = site_behaviour(site_id, options)
+            state.hits["site"] += 1
+            time.sleep(behaviour["latency"])
+            if behaviour["status"] != 200:
+                return self._send(behaviour["status"], "<h1>Internal Server Error</h1>")
+            return self._send(200, homepage_html(site_id, behaviour, options))
+
+        path = self.path
+        if path.startswith("/maps/search/"):
+            query = unquote_plus(path[len("/maps/search/"):].split("?")[0])
+            city = query.split(" in ", 1)[-1].split(",")[0].strip()
+            places = state.search(city)
+            state.hits["search"] += 1
+            time.sleep(options["maps_latency"] / 1000)
+            cards = [card_html(place) for place in places]
+            size = options["page_size"]
+            return self._send(200, SEARCH_PAGE.format(
+                title=escape(query), first="\n".join(cards[:size]), rest="\n".join(cards[size:]),
+                page_size=size, latency=options["maps_latency"],
+            ))
+
+        if path.startswith("/maps/place/"):
+            with state.lock:
+                place = state.places.get(path.split("?")[0]) or state.places.get(unquote(path.split("?")[0]))
+            state.hits["place"] += 1
+            time.sleep(options["maps_latency"] / 1000)
+            if place is None:
+                return self._send(404, "<h1>Not found</h1>")
+            website = (f'<a data-item-id="authority" href="{escape(place["website"])}">{escape(place["website"])}</a>'
+                       if place["website"] != "NA" else "")
+            return self._send(200, PLACE_PAGE.format(
+                name=escape(place["name"]), address=escape(place["address"]),
+                tel=place["phone"].replace(" ", ""), phone=escape(place["phone"]), website=website,
+            ))
+
+        if path in ("/", "/maps"):
+            return self._send(200, "<input id='searchboxinput'>")
+        return self._send(404, "<h1>Not found</h1>")
+
+def serve(options=None, port=0):
+    """
+    Starts the fixture server on a daemon thread; returns (server, state).
+    """
+    state = FixtureState(options or {}, port)
+    handler = type("BoundFixtureHandler", (FixtureHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    state.port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+# ---------------- RUN ----------------
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    def opt(name, default):
+        return type(default)(args[args.index(name) + 1]) if name in args else default
+
+    server, state = serve({
+        "places": opt("--places", DEFAULTS["places"]),
+        "site_latency": opt("--site-latency", DEFAULTS["site_latency"]),
+    }, opt("--port", 8765))
+    port = state.port
+    print(f"[+] Maps fixture on http://127.0.0.1:{port}/maps/search/Hair+Salon+in+Mesa,+Arizona,+USA")
+    print(f"    homepages: http://salon-<id>.{SITE_DOMAIN}:{port}/ (resolve *.{SITE_DOMAIN} to 127.0.0.1)")
+    print(f"    options: {json.dumps(state.options)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
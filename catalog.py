@@ -0,0 +1,137 @@
+import os
+import sys
+import pickle
+
+# ---------------- CONFIG ----------------
+CATALOG_XLSX = "USA_Cities_2025_New.xlsx"
+CACHE_DIR = ".catalog_cache"
+INDEX_FILE = os.path.join(CACHE_DIR, "index.pkl")
+CACHE_VERSION = 1
+
+COLUMNS = ["City", "State", "State Code", "Place GEOID", "Latitude", "Longitude"]
+
+# ---------------- CACHE HELPERS ----------------
+def _source_signature(xlsx_path):
+    st = os.stat(xlsx_path)
+    return [CACHE_VERSION, st.st_size, st.st_mtime_ns]
+
+def _state_file(state_code):
+    return os.path.join(CACHE_DIR, f"{state_code}.pkl")
+
+def _write_pickle(path, obj):
+    # write-then-rename so a crash never leaves a half written cache file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def _read_pickle(path):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+# ---------------- BUILD ----------------
+def build_cache(xlsx_path=CATALOG_XLSX):
+    """
+    Parses the xlsx once and writes one small column-oriented pickle per state
+    plus an index holding the source signature and per-state row counts.
+    """
+    import pandas as pd
+
+    print(f"[+] Building city catalog cache from {xlsx_path}")
+    df = pd.read_excel(xlsx_path)
+    columns = [c for c in COLUMNS if c in df.columns]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    states = {}
+    for state_code, group in df.groupby("State Code", sort=False):
+        state_code = str(state_code)
+        _write_pickle(
+            _state_file(state_code),
+            {col: group[col].tolist() for col in columns}
+        )
+        states[state_code] = {
+            "name": str(group["State"].iloc[0]),
+            "count": len(group),
+        }
+
+    index = {
+        "signature": _source_signature(xlsx_path),
+        "columns": columns,
+        "states": states,
+    }
+    _write_pickle(INDEX_FILE, index)
+    print(f"[✓] Cached {len(df)} cities across {len(states)} states")
+    return index
+
+def ensure_cache(xlsx_path=CATALOG_XLSX):
+    """
+    Returns the cache index, rebuilding it only when the xlsx has changed.
+    """
+    if os.path.exists(INDEX_FILE):
+        try:
+            index = _read_pickle(INDEX_FILE)
+            if index.get("signature") == _source_signature(xlsx_path):
+                return index
+        except Exception:
+            pass
+    return build_cache(xlsx_path)
+
+# ---------------- LOOKUPS ----------------
+def state_codes():
+    return list(ensure_cache()["states"].keys())
+
+def state_name(state_code):
+    return ensure_cache()["states"][state_code]["name"]
+
+def load_state_columns(state_code):
+    """
+    Column dict ({"City": [...], "Latitude": [...], ...}) for one state.
+    Does not import pandas.
+    """
+    index = ensure_cache()
+    if state_code not in index["states"]:
+        return {col: [] for col in index["columns"]}
+    return _read_pickle(_state_file(state_code))
+
+def load_state_rows(state_code):
+    """
+    List of row dicts for one state, in catalog order. Does not import pandas.
+    """
+    cols = load_state_columns(state_code)
+    names = list(cols.keys())
+    return [dict(zip(names, values)) for values in zip(*cols.values())]
+
+def load_state(state_code):
+    """
+    DataFrame for one state, same shape as
+    cities_df[cities_df["State Code"] == state_code].reset_index(drop=True)
+    """
+    import pandas as pd
+    return pd.DataFrame(load_state_columns(state_code))
+
+def load_all():
+    """
+    Whole catalog as one DataFrame, stitched from the per-state cache files.
+    """
+    import pandas as pd
+    index = ensure_cache()
+    frames = [pd.DataFrame(_read_pickle(_state_file(code))) for code in index["states"]]
+    return pd.concat(frames, ignore_index=True)
+
+# ---------------- RUN ----------------
+if __name__ == "__main__":
+    # python catalog.py          -> rebuild if stale, list states
+    # python catalog.py AZ       -> print AZ cities
+    # python catalog.py --rebuild
+    args = sys.argv[1:]
+    if "--rebuild" in args:
+        build_cache()
+        args.remove("--rebuild")
+
+    if args:
+        for row in load_state_rows(args[0].upper()):
+            print(f"{row['City']}, {row['State']} ({row['Latitude']}, {row['Longitude']})")
+    else:
+        for code, info in ensure_cache()["states"].items():
+            print(f"{code}  {info['name']:<24} {info['count']} cities")
@@ -1,117 +1,218 @@
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import glob
+from concurrent.futures import ProcessPoolExecutor
+from place_dedupe import place_key
+import geo
+from results_store import ResultsStore, COLUMNS
 
 # ---------------- CONFIG ----------------
 INPUT_DIR = "state_city_excels"  # Directory containing the batch files
 OUTPUT_DIR = "combined_excels"   # Directory for combined output
 STATE_CODE = "AZ"                # State code to combine
+WORKERS = os.cpu_count() or 1    # Processes parsing workbooks in parallel
+USE_STORE = True                 # Incremental: parse only new batch files, re-export changed states
+STORE_DB = "combined_store.sqlite"
+REATTRIBUTE = True               # sheets by nearest catalog city (geo.py), not the city that searched
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+# ---------------- INGESTION ----------------
+def batch_files(state_code):
+    """
+    The state's batch workbooks: INPUT_DIR itself (single search job) and
+    its category subdirectories (main2 with several SEARCH_JOBS).
+    """
+    return (glob.glob(os.path.join(INPUT_DIR, f"{state_code}_*.xlsx"))
+            + glob.glob(os.path.join(INPUT_DIR, "*", f"{state_code}_*.xlsx")))
+
+def category_of(file_path):
+    # INPUT_DIR/<category slug>/... -> category, None for top-level files
+    folder = os.path.dirname(os.path.abspath(file_path))
+    if folder == os.path.abspath(INPUT_DIR):
+        return None
+    return os.path.basename(folder).replace("_", " ")
+
+def read_workbook(file_path):
+    """
+    Parses every sheet of one workbook in a single pass.
+    Returns (file_path, {sheet_name: df}, error)
+    """
+    try:
+        sheets = pd.read_excel(file_path, sheet_name=None)
+    except Exception as e:
+        return file_path, {}, str(e)
+
+    return file_path, {
+        name: df.fillna("NA") for name, df in sheets.items() if not df.empty
+    }, None
+
+def read_workbooks(excel_files, pool=None):
+    """
+    Yields read_workbook() results in file order, in parallel when a
+    ProcessPoolExecutor is given.
+    """
+    if pool is not None and len(excel_files) > 1:
+        yield from pool.map(read_workbook, excel_files)
+    else:
+        for file_path in excel_files:
+            yield read_workbook(file_path)
+
+def dedupe_city(frames):
+    """
+    One concat per city, then a hash pass over canonical place keys.
+    """
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    keys = df['Google Maps URL'].map(place_key)
+    return df[~keys.duplicated(keep='first')]
+
+def collect_state_data(excel_files, pool=None, verbose=True):
+    """
+    Returns ({city: deduped df}, total_sheets, total_records)
+    """
+    # Key: city name, Value: list of frames (concatenated once at the end)
+    city_frames = {}
+    total_sheets = 0
+    total_records = 0
+    # workbooks of several search jobs: keep which one a record came from
+    categorized = any(category_of(path) for path in excel_files)
+
+    for file_path, sheets, error in read_workbooks(excel_files, pool):
+        if verbose:
+            print(f"\n[+] Processing: {os.path.basename(file_path)}")
+        if error:
+            print(f"    [ERROR] Failed to process {os.path.basename(file_path)}: {error}")
+            continue
+
+        for sheet_name, df in sheets.items():
+            if categorized:
+                df = df.assign(Category=category_of(file_path) or "NA")
+            city_frames.setdefault(sheet_name, []).append(df)
+            total_sheets += 1
+            total_records += len(df)
+            if verbose:
+                print(f"    ✓ {sheet_name}: {len(df)} records")
+
+    if verbose and city_frames:
+        print(f"\n[+] Removing duplicates...")
+
+    combined_data = {}
+    for city, frames in city_frames.items():
+        combined_data[city] = dedupe_city(frames)
+        removed = sum(len(df) for df in frames) - len(combined_data[city])
+        if verbose and removed:
+            print(f"    {city}: Removed {removed} duplicate(s)")
+
+    return combined_data, total_sheets, total_records
+
+# ---------------- GEO ATTRIBUTION ----------------
+def reattribute(state_code, combined_data):
+    """
+    {city: df} regrouped by each record's nearest catalog city, one
+    vectorized query for the whole state. Records beyond
+    geo.CITY_RADIUS_KM of every city go to geo.OUT_OF_AREA_SHEET; records
+    without coordinates keep their sheet.
+    """
+    if not combined_data:
+        return combined_data
+    df = pd.concat(
+        [frame.assign(_sheet=city) for city, frame in combined_data.items()], ignore_index=True
+    )
+
+    lats = pd.to_numeric(df["Latitude"], errors="coerce").to_numpy(dtype=float)
+    lngs = pd.to_numeric(df["Longitude"], errors="coerce").to_numpy(dtype=float)
+    missing = np.isnan(lats) | np.isnan(lngs)
+    if missing.any():
+        lats[missing], lngs[missing] = geo.coords_from_urls(df.loc[missing, "Google Maps URL"])
+
+    index = geo.state_index(state_code)
+    indexes, km = (np.asarray(a) for a in index.nearest(lats, lngs))
+    names = np.asarray([name[:31] for name in index.names], dtype=object)
+
+    target = df["_sheet"].to_numpy(dtype=object).copy()
+    near = (indexes >= 0) & (km <= geo.CITY_RADIUS_KM)
+    target[near] = names[indexes[near]]
+    far = (indexes >= 0) & (km > geo.CITY_RADIUS_KM)
+    target[far] = geo.OUT_OF_AREA_SHEET
+
+    moved = int((target[near] != df["_sheet"].to_numpy(dtype=object)[near]).sum())
+    print(f"[+] Geo attribution: {moved} record(s) moved to a nearer city, {int(far.sum())} out of area")
+
+    df = df.assign(_sheet=target).dropna(subset=["_sheet"])
+    return {
+        city: dedupe_city([group.drop(columns="_sheet")])
+        for city, group in df.groupby("_sheet", sort=False)
+    }
+
+# ---------------- OUTPUT ----------------
+def state_name_from_file(file_path):
+    # Batch files are named {STATE_CODE}_{State_Name}_..., take the second part
+    parts = os.path.basename(file_path).split("_")
+    return parts[1] if len(parts) >= 2 else "Unknown"
+
+def write_combined_excel(state_code, state_name, combined_data):
+    """
+    One sheet per city (sorted). Returns the output path.
+    """
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    output_file = os.path.join(
+        OUTPUT_DIR,
+        f"{state_code}_{state_name}_COMBINED_{timestamp}.xlsx"
+    )
+    
+    # Write combined data to Excel
+    print(f"\n[+] Writing combined Excel file...")
+    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
+        for city, df in sorted(combined_data.items()):
+            # Ensure sheet name is valid (max 31 chars)
+            sheet_name = city[:31]
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            print(f"    ✓ {city}: {len(df)} records")
+    return output_file
+
 # ---------------- MAIN FUNCTION ----------------
-def combine_state_excels(state_code):
+def combine_state_excels(state_code, pool=None):
     """
     Combines all Excel files for a given state code into one workbook
     """
+    if USE_STORE:
+        return combine_incremental([state_code], pool)
+
     print(f"\n{'='*60}")
     print(f"Combining Excel files for state: {state_code}")
     print(f"{'='*60}\n")
     
-    # Find all Excel files starting with the state code
-    pattern = os.path.join(INPUT_DIR, f"{state_code}_*.xlsx")
-    excel_files = glob.glob(pattern)
+    # Find all Excel files starting with the state code (category folders too)
+    excel_files = batch_files(state_code)
     
     if not excel_files:
         print(f"[!] No Excel files found for state code: {state_code}")
-        print(f"    Looking for pattern: {pattern}")
+        print(f"    Looking for pattern: {os.path.join(INPUT_DIR, f'{state_code}_*.xlsx')} (and */)")
         return
     
     print(f"[+] Found {len(excel_files)} Excel file(s) to combine:")
     for i, file in enumerate(excel_files, 1):
         print(f"    {i}. {os.path.basename(file)}")
     
-    # Dictionary to store all city data
-    # Key: city name, Value: list of business records
-    combined_data = {}
-    
-    # Process each Excel file
-    total_sheets = 0
-    total_records = 0
-    
-    for file_path in excel_files:
-        print(f"\n[+] Processing: {os.path.basename(file_path)}")
-        
-        try:
-            # Read all sheets from the Excel file
-            excel_file = pd.ExcelFile(file_path)
-            
-            for sheet_name in excel_file.sheet_names:
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                
-                # Skip empty sheets
-                if df.empty:
-                    continue
-                df = df.fillna("NA")
-                # If city already exists, append data
-                if sheet_name in combined_data:
-                    combined_data[sheet_name] = pd.concat(
-                        [combined_data[sheet_name], df],
-                        ignore_index=True
-                    )
-                else:
-                    combined_data[sheet_name] = df
-                
-                total_sheets += 1
-                total_records += len(df)
-                print(f"    ✓ {sheet_name}: {len(df)} records")
-        
-        except Exception as e:
-            print(f"    [ERROR] Failed to process {os.path.basename(file_path)}: {str(e)}")
-            continue
+    # Each file is parsed once, across a process pool
+    if pool is None and WORKERS > 1 and len(excel_files) > 1:
+        with ProcessPoolExecutor(max_workers=min(WORKERS, len(excel_files))) as own_pool:
+            combined_data, total_sheets, total_records = collect_state_data(excel_files, own_pool)
+    else:
+        combined_data, total_sheets, total_records = collect_state_data(excel_files, pool)
     
     if not combined_data:
         print("\n[!] No data found to combine")
         return
+    if REATTRIBUTE:
+        combined_data = reattribute(state_code, combined_data)
     
-    # Remove duplicates from each city
-    print(f"\n[+] Removing duplicates...")
-    for city in combined_data:
-        before = len(combined_data[city])
-        # Remove duplicates based on Google Maps URL (most reliable unique identifier)
-        combined_data[city] = combined_data[city].drop_duplicates(
-            subset=['Google Maps URL'],
-            keep='first'
-        )
-        after = len(combined_data[city])
-        if before != after:
-            print(f"    {city}: Removed {before - after} duplicate(s)")
-    
-    # Create output filename
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    
-    # Get state name from the first file
-    state_name = "Unknown"
-    first_file = os.path.basename(excel_files[0])
-    parts = first_file.split("_")
-    if len(parts) >= 2:
-        state_name = parts[1]
-    
-    output_file = os.path.join(
-        OUTPUT_DIR,
-        f"{state_code}_{state_name}_COMBINED_{timestamp}.xlsx"
+    output_file = write_combined_excel(
+        state_code, state_name_from_file(excel_files[0]), combined_data
     )
     
-    # Write combined data to Excel
-    print(f"\n[+] Writing combined Excel file...")
-    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-        for city, df in sorted(combined_data.items()):
-            # Ensure sheet name is valid (max 31 chars)
-            sheet_name = city[:31]
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            print(f"    ✓ {city}: {len(df)} records")
-    
     # Summary
     total_cities = len(combined_data)
     final_records = sum(len(df) for df in combined_data.values())
@@ -127,14 +228,87 @@ def combine_state_excels(state_code):
     print(f"\nOutput file: {output_file}")
     print(f"{'='*60}\n")
 
+# ---------------- INCREMENTAL COMBINE ----------------
+def combine_incremental(state_codes, pool=None):
+    """
+    Ingests only batch files the store has not seen (by path, size, mtime,
+    hash), upserts their records by canonical place key (newer batch files
+    win), and re-exports only the states whose cities gained or changed records.
+    """
+    store = ResultsStore(STORE_DB)
+
+    excel_files = []
+    for state_code in state_codes:
+        excel_files += batch_files(state_code)
+    pending = store.pending_files(excel_files)
+
+    print(f"\n{'='*60}")
+    print(f"Incremental combine: {len(state_codes)} state(s), {len(excel_files)} batch file(s), {len(pending)} new")
+    print(f"{'='*60}")
+
+    # state_code -> {city: records added}
+    changed = {}
+    if pending:
+        own_pool = None
+        if pool is None and WORKERS > 1 and len(pending) > 1:
+            pool = own_pool = ProcessPoolExecutor(max_workers=min(WORKERS, len(pending)))
+        try:
+            for file_path, sheets, error in read_workbooks(pending, pool):
+                if error:
+                    print(f"    [ERROR] Failed to process {os.path.basename(file_path)}: {error}")
+                    continue
+
+                state_code = os.path.basename(file_path).split("_")[0]
+                print(f"\n[+] Ingesting: {os.path.basename(file_path)}")
+                scraped_at = os.path.getmtime(file_path)  # a newer batch (refresh) replaces older records
+                for city, df in sheets.items():
+                    rows = df.reindex(columns=COLUMNS, fill_value="NA").itertuples(index=False)
+                    added = store.upsert_city(state_code, city, rows, scraped_at, category_of(file_path))
+                    if added:
+                        cities = changed.setdefault(state_code, {})
+                        cities[city] = cities.get(city, 0) + added
+                store.commit()
+                store.mark_ingested(file_path, state_code, state_name_from_file(file_path))
+        finally:
+            if own_pool is not None:
+                own_pool.shutdown()
+
+    for state_code in state_codes:
+        if state_code not in changed:
+            last = store.last_export(state_code)
+            print(f"\n[=] {state_code}: no new records" + (f" (latest: {last})" if last else ""))
+            continue
+
+        print(f"\n[+] {state_code}: {sum(changed[state_code].values())} new or updated record(s) in "
+              f"{len(changed[state_code])} city sheet(s)")
+        with_category = store.has_categories(state_code)
+        columns = COLUMNS + ["Category"] if with_category else COLUMNS
+        combined_data = {
+            city: pd.DataFrame(rows, columns=columns)
+            for city, rows in store.city_rows(state_code, with_category).items()
+        }
+        if REATTRIBUTE:
+            combined_data = reattribute(state_code, combined_data)
+        output_file = write_combined_excel(state_code, store.state_name(state_code), combined_data)
+        store.record_export(state_code, output_file)
+        print(f"[✓] {state_code}: {sum(len(df) for df in combined_data.values())} records -> {output_file}")
+
+    store.close()
+
 # ---------------- ADVANCED: COMBINE MULTIPLE STATES ----------------
 def combine_multiple_states(state_codes):
     """
     Combine Excel files for multiple state codes
     """
-    for state_code in state_codes:
-        combine_state_excels(state_code)
-        print("\n")
+    # One process pool shared by every state
+    with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+        if USE_STORE:
+            combine_incremental(state_codes, pool)
+            return
+
+        for state_code in state_codes:
+            combine_state_excels(state_code, pool)
+            print("\n")
 
 # ---------------- RUN ----------------
 if __name__ == "__main__":
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import asyncio
+from collections import deque
+
+# ---------------- CONFIG ----------------
+ADJUST_EVERY = 10.0         # seconds between controller decisions
+MIN_SAMPLES = 5             # observations a lane needs before it is judged
+ADDITIVE_STEP = 1           # healthy window -> limit + this
+DECREASE_FACTOR = 0.7       # slow / timing out -> limit * this
+BLOCK_FACTOR = 0.5          # block or consent page -> limit * this (browser lanes)
+TIMEOUT_RATE = 0.15         # timeouts / samples above this is congestion
+LATENCY_FACTOR = 2.0        # window avg above baseline * this is congestion
+BASELINE_DRIFT = 1.02       # baseline creeps up per window so it can follow real change
+MIN_FREE_MB = 1024          # host memory floor; below it browser lanes shrink
+LOG_DIR = "logs"
+
+# Where Google sends a client it does not like
+BLOCK_MARKERS = ("consent.google.", "/sorry/", "unusual traffic")
+
+def looks_blocked(url_or_text):
+    text = (url_or_text or "").lower()
+    return any(marker in text for marker in BLOCK_MARKERS)
+
+def decision_log_path(worker_id=None):
+    suffix = f".w{worker_id}" if worker_id is not None else ""
+    return os.path.join(LOG_DIR, f"concurrency{suffix}.jsonl")
+
+def free_memory_mb():
+    """
+    Available host memory in MB, None if it cannot be read here.
+    """
+    try:
+        import psutil
+        return psutil.virtual_memory().available / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+# ---------------- LIMITER ----------------
+class AdaptiveLimiter:
+    """
+    Semaphore whose limit can change while tasks hold it. Used like
+    asyncio.Semaphore (`async with`); a lower limit only takes effect as
+    holders release, nothing is cancelled.
+    """
+
+    def __init__(self, name, initial, minimum=1, maximum=None):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = maximum or initial
+        self.limit = max(minimum, min(initial, self.maximum))
+        self.active = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        while self.active >= self.limit:
+            fut = asyncio.get_running_loop().create_future()
+            self._waiters.append(fut)
+            try:
+                await fut
+            except asyncio.CancelledError:
+                if fut in self._waiters:
+                    self._waiters.remove(fut)
+                elif fut.done() and not fut.cancelled():
+                    # woken by release() but cancelled before it ran: pass the slot on
+                    self._wake()
+                raise
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+        self._wake()
+
+    def set_limit(self, limit):
+        self.limit = max(self.minimum, min(int(limit), self.maximum))
+        self._wake()
+        return self.limit
+
+    def _wake(self):
+        free = self.limit - self.active
+        while free > 0 and self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                free -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+# ---------------- CONTROLLER ----------------
+class _Window:
+    def __init__(self):
+        self.samples = 0
+        self.seconds = 0.0
+        self.timeouts = 0
+        self.blocked = 0
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease over a set of limiters.
+    Every ADJUST_EVERY seconds each lane's window is judged:
+        blocked (browser lanes)        -> limit * BLOCK_FACTOR
+        timeout rate > TIMEOUT_RATE    -> limit * DECREASE_FACTOR
+        avg latency > baseline * 2     -> limit * DECREASE_FACTOR
+        host memory < MIN_FREE_MB      -> limit * DECREASE_FACTOR (browser lanes)
+        otherwise                      -> limit + ADDITIVE_STEP
+    Every change is printed and appended to a JSONL decision log.
+    """
+
+    def __init__(self, limiters, browser_lanes=(), log_path=None,
+                 adjust_every=ADJUST_EVERY, min_free_mb=MIN_FREE_MB):
+        self.limiters = {limiter.name: limiter for limiter in limiters}
+        self.browser_lanes = set(browser_lanes)
+        self.adjust_every = adjust_every
+        self.min_free_mb = min_free_mb
+        self.log_path = log_path
+        self.decisions = 0
+
+        self._windows = {name: _Window() for name in self.limiters}
+        self._baseline = {}         # lane -> best window avg seen (drifting)
+        self._task = None
+        self._log = None
+
+    # ---- observations ----
+    def observe(self, lane, seconds=None, timeout=False, blocked=False):
+        window = self._windows.get(lane)
+        if window is None:
+            return
+        window.samples += 1
+        if seconds is not None:
+            window.seconds += seconds
+        if timeout:
+            window.timeouts += 1
+        if blocked:
+            window.blocked += 1
+
+    # ---- decisions ----
+    def adjust(self):
+        free_mb = free_memory_mb()
+        low_memory = free_mb is not None and free_mb < self.min_free_mb
+
+        for lane, limiter in self.limiters.items():
+            window = self._windows[lane]
+            browser = lane in self.browser_lanes
+
+            if window.blocked and browser:
+                reason, factor = "blocked", BLOCK_FACTOR
+            elif low_memory and browser:
+                reason, factor = "memory", DECREASE_FACTOR
+            elif window.samples < MIN_SAMPLES:
+                continue  # keep collecting
+            elif window.timeouts / window.samples > TIMEOUT_RATE:
+                reason, factor = "timeouts", DECREASE_FACTOR
+            else:
+                avg = window.seconds / window.samples
+                baseline = self._baseline.get(lane)
+                if baseline is not None and avg > baseline * LATENCY_FACTOR:
+                    reason, factor = "latency", DECREASE_FACTOR
+                else:
+                    reason, factor = "healthy", None
+                self._baseline[lane] = avg if baseline is None else min(avg, baseline * BASELINE_DRIFT)
+
+            old = limiter.limit
+            new = limiter.set_limit(old + ADDITIVE_STEP if factor is None else old * factor)
+            self._windows[lane] = _Window()
+            if new != old:
+                self._decide(lane, old, new, reason, window, free_mb)
+
+    def _decide(self, lane, old, new, reason, window, free_mb):
+        avg = window.seconds / window.samples if window.samples else None
+        entry = {
+            "ts": time.time(), "lane": lane, "from": old, "to": new, "reason": reason,
+            "samples": window.samples, "timeouts": window.timeouts, "blocked": window.blocked,
+            "avg_s": round(avg, 3) if avg is not None else None,
+            "baseline_s": round(self._baseline[lane], 3) if lane in self._baseline else None,
+            "free_mb": round(free_mb) if free_mb is not None else None,
+        }
+        self.decisions += 1
+        avg_text = f", avg {avg:.2f}s" if avg is not None else ""
+        print(f"[⚙] {lane} {old} -> {new} ({reason}: {window.timeouts}/{window.samples} timeouts{avg_text})")
+        if self._log is not None:
+            self._log.write(json.dumps(entry) + "\n")
+            self._log.flush()
+
+    # ---- lifecycle ----
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.adjust_every)
+            self.adjust()
+
+    def start(self):
+        if self.log_path is not None:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def report(self):
+        limits = ", ".join(f"{name}={limiter.limit}" for name, limiter in self.limiters.items())
+        return f"final limits {limits} | {self.decisions} decisions"
@@ -0,0 +1,212 @@
+import re
+import asyncio
+from contextlib import asynccontextmanager
+from urllib.parse import urljoin, urlsplit
+
+import email_extractor
+
+# ---------------- CONFIG ----------------
+MAX_PAGES_PER_SITE = 3        # contact/about/booking pages tried per website
+PER_DOMAIN_LIMIT = 2          # concurrent requests to one domain
+GLOBAL_PAGE_BUDGET = 20000    # extra (non-homepage) requests for the whole run
+SITEMAP_MAX_BYTES = 256 * 1024
+LINK_OVERLAP = 700
+
+# Priority order: earlier hint = more likely to hold the address
+CONTACT_HINTS = ("contact", "about", "book", "appointment", "reach", "connect", "location", "team")
+SKIP_EXTS = (".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".pdf", ".css", ".js", ".xml", ".zip", ".mp4")
+
+# ---------------- REGEX ----------------
+_HINTS = "|".join(CONTACT_HINTS)
+CONTACT_HREF_REGEX = re.compile(
+    rf"""href\s*=\s*["']([^"'<>\s]{{0,300}}?(?:{_HINTS})[^"'<>\s]{{0,300}})["']""",
+    re.I,
+)
+SITEMAP_LOC_REGEX = re.compile(
+    rf"<loc>\s*([^<\s]{{0,300}}?(?:{_HINTS})[^<\s]{{0,300}})\s*</loc>",
+    re.I,
+)
+
+# ---------------- RUN STATE ----------------
+stats = {
+    "homepage_hits": 0,
+    "contact_hits": 0,
+    "extra_pages": 0,
+    "sitemaps": 0,
+    "budget_exhausted": 0,
+}
+_pages_left = GLOBAL_PAGE_BUDGET
+_domain_sems = {}
+_domain_users = {}
+
+def reset(page_budget=GLOBAL_PAGE_BUDGET):
+    global _pages_left
+    _pages_left = page_budget
+    for key in stats:
+        stats[key] = 0
+
+def _take_budget():
+    global _pages_left
+    if _pages_left <= 0:
+        stats["budget_exhausted"] += 1
+        return False
+    _pages_left -= 1
+    stats["extra_pages"] += 1
+    return True
+
+@asynccontextmanager
+async def _domain_slot(host):
+    sem = _domain_sems.get(host)
+    if sem is None:
+        sem = _domain_sems[host] = asyncio.Semaphore(PER_DOMAIN_LIMIT)
+    _domain_users[host] = _domain_users.get(host, 0) + 1
+    try:
+        async with sem:
+            yield
+    finally:
+        _domain_users[host] -= 1
+        if not _domain_users[host]:
+            del _domain_users[host]
+            del _domain_sems[host]
+
+# ---------------- LINK DISCOVERY ----------------
+def _site_key(url):
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _hint_rank(url):
+    path = urlsplit(url).path.lower()
+    for i, hint in enumerate(CONTACT_HINTS):
+        if hint in path:
+            return i
+    return None
+
+def rank_contact_links(base_url, hrefs):
+    """
+    Same-site, de-duplicated contact-like URLs, best first.
+    """
+    site = _site_key(base_url)
+    seen = {base_url.rstrip("/")}
+    ranked = []
+
+    for href in hrefs:
+        if href.lower().startswith(("mailto:", "tel:", "javascript:")):
+            continue
+        url = urljoin(base_url, href).split("#")[0]
+        if not url.startswith("http") or _site_key(url) != site:
+            continue
+        if urlsplit(url).path.lower().endswith(SKIP_EXTS):
+            continue
+
+        key = url.rstrip("/")
+        rank = _hint_rank(url)
+        if key in seen or rank is None:
+            continue
+        seen.add(key)
+        ranked.append((rank, len(url), url))
+
+    ranked.sort()
+    return [url for _, _, url in ranked]
+
+class LinkCollector:
+    """
+    Collects contact-like hrefs from text fed chunk by chunk, holding back
+    the tail of each chunk so an href split across chunks is not lost.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self.hrefs = []
+
+    def feed(self, text, final=False):
+        buf = self._buf + text
+        limit = len(buf) if final else max(0, len(buf) - LINK_OVERLAP)
+        cut = limit
+
+        for match in CONTACT_HREF_REGEX.finditer(buf):
+            if match.start() >= limit:
+                break
+            self.hrefs.append(match.group(1))
+            cut = max(cut, match.end())
+
+        self._buf = buf[cut:]
+
+async def _sitemap_links(base_url, session, timeout, fetch_stats=None):
+    import aiohttp
+
+    stats["sitemaps"] += 1
+    sitemap_url = urljoin(base_url, "/sitemap.xml")
+    try:
+        async with session.get(
+            sitemap_url,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            headers={"User-Agent": "Mozilla/5.0"}
+        ) as resp:
+            if resp.status != 200:
+                return []
+            body = b""
+            async for chunk in resp.content.iter_chunked(email_extractor.CHUNK_SIZE):
+                body += chunk
+                if len(body) >= SITEMAP_MAX_BYTES:
+                    break
+    except Exception:
+        return []
+
+    if fetch_stats is not None:
+        fetch_stats["bytes"] = fetch_stats.get("bytes", 0) + len(body)
+    text = body[:SITEMAP_MAX_BYTES].decode("utf-8", "ignore")
+    return [m.group(1) for m in SITEMAP_LOC_REGEX.finditer(text)]
+
+# ---------------- CRAWLER ----------------
+async def _fetch_email(url, session, timeout, fetch_stats=None):
+    async with _domain_slot(_site_key(url)):
+        return await email_extractor.extract_email(url, session, timeout=timeout, fetch_stats=fetch_stats)
+
+async def find_email(url, session, timeout=3, max_pages=MAX_PAGES_PER_SITE, fetch_stats=None, validators=None):
+    """
+    Homepage first; if it has no email, fetch the most likely contact pages
+    (from homepage links, then sitemap.xml) concurrently and return the
+    first valid email found. Extra pages count against the run budget.
+    An unchanged homepage (304 to `validators`) keeps the previous result.
+    """
+    collector = LinkCollector()
+    async with _domain_slot(_site_key(url)):
+        email = await email_extractor.extract_email(
+            url, session, timeout=timeout, link_collector=collector, fetch_stats=fetch_stats,
+            validators=validators
+        )
+    if validators is not None and validators.get("not_modified"):
+        return email
+    if email != "NA":
+        stats["homepage_hits"] += 1
+        return email
+
+    candidates = rank_contact_links(url, collector.hrefs)
+    if len(candidates) < max_pages and _take_budget():
+        sitemap = await _sitemap_links(url, session, timeout, fetch_stats)
+        candidates = rank_contact_links(url, candidates + sitemap)
+
+    tasks = []
+    for link in candidates[:max_pages]:
+        if not _take_budget():
+            break
+        tasks.append(asyncio.create_task(_fetch_email(link, session, timeout, fetch_stats)))
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            email = await next_done
+            if email != "NA":
+                stats["contact_hits"] += 1
+                return email
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return "NA"
+
+def summary():
+    return (
+        f"homepage hits {stats['homepage_hits']} | contact-page hits {stats['contact_hits']} | "
+        f"extra pages {stats['extra_pages']} (sitemaps {stats['sitemaps']}) | "
+        f"budget left {_pages_left}"
+    )
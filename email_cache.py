@@ -0,0 +1,197 @@
+import time
+import asyncio
+import sqlite3
+from urllib.parse import urlsplit
+
+# ---------------- CONFIG ----------------
+CACHE_DB = "email_cache.sqlite"
+TTL_SECONDS = 30 * 24 * 3600      # found emails
+NA_TTL_SECONDS = 7 * 24 * 3600    # "NA" results (no email, 4xx) are retried sooner
+MAX_ENTRIES = 200_000
+EVICT_EVERY = 500                 # writes between size checks
+
+# Hosts where many unrelated businesses share one domain: key on the path too
+SHARED_HOSTS = {
+    "facebook.com", "m.facebook.com", "instagram.com", "sites.google.com",
+    "linktr.ee", "booksy.com", "vagaro.com", "yelp.com", "styleseat.com",
+    "square.site", "wixsite.com", "godaddysites.com", "business.site",
+    "schedulicity.com", "glossgenius.com", "fresha.com",
+}
+
+# ---------------- KEYS ----------------
+def cache_key(url):
+    """
+    Normalized key: bare host for normal sites (so every Great Clips or
+    Supercuts location shares one entry), host + first path segments for
+    shared hosting / social pages.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().split("@")[-1].split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+
+    if host in SHARED_HOSTS or any(host.endswith("." + h) for h in SHARED_HOSTS):
+        segments = [seg for seg in parts.path.lower().split("/") if seg][:2]
+        return "/".join([host] + segments)
+    return host
+
+def transient(status):
+    """
+    Fetch outcomes worth another try on the next lookup rather than a
+    cache entry: timeouts, connection errors, 429 and 5xx.
+    """
+    return not isinstance(status, int) or status == 429 or status >= 500
+
+# ---------------- CACHE ----------------
+class EmailCache:
+    """
+    On-disk website -> email cache with TTL, size-bounded eviction and
+    in-flight coalescing (concurrent lookups of one key share one fetch).
+    Expired entries keep their ETag / Last-Modified so the refetch can be
+    a conditional request.
+    """
+
+    def __init__(self, path=CACHE_DB, ttl=TTL_SECONDS, na_ttl=NA_TTL_SECONDS, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.na_ttl = na_ttl
+        self.max_entries = max_entries
+        self._inflight = {}
+        self._writes = 0
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "coalesced": 0, "not_modified": 0, "transient": 0}
+
+        # timeout: shard workers share the file
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS emails (
+                key TEXT PRIMARY KEY,
+                email TEXT NOT NULL,
+                status TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                etag TEXT,
+                last_modified TEXT
+            )"""
+        )
+        # caches written before conditional requests lack the validator columns
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(emails)")}
+        for column in ("etag", "last_modified"):
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE emails ADD COLUMN {column} TEXT")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_emails_last_used ON emails(last_used)")
+        self.db.commit()
+
+    def get(self, key):
+        row = self.db.execute(
+            "SELECT email, status, fetched_at FROM emails WHERE key = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+
+        email, status, fetched_at = row
+        ttl = self.ttl if status == "found" else self.na_ttl
+        if time.time() - fetched_at > ttl:
+            self.stats["expired"] += 1
+            return None
+
+        self.db.execute("UPDATE emails SET last_used = ? WHERE key = ?", (time.time(), key))
+        self.db.commit()  # an open write transaction would lock out the other workers
+        return email
+
+    def validators(self, key):
+        """
+        {"email", "etag", "last_modified"} of an entry that has any, else {}.
+        """
+        row = self.db.execute(
+            "SELECT email, etag, last_modified FROM emails WHERE key = ?", (key,)
+        ).fetchone()
+        if not row or not (row[1] or row[2]):
+            return {}
+        return {"email": row[0], "etag": row[1], "last_modified": row[2]}
+
+    def put(self, key, email, validators=None, status=None):
+        """
+        status: "found" for an email, else how the fetch ended ("na" = page
+        read, no email; "http_404" ...); only "found" gets the long TTL.
+        """
+        now = time.time()
+        if email != "NA":
+            status = "found"
+        validators = validators or {}
+        self.db.execute(
+            "INSERT OR REPLACE INTO emails (key, email, status, fetched_at, last_used, etag, last_modified) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, email, status or "na", now, now, validators.get("etag"), validators.get("last_modified"))
+        )
+        self.db.commit()
+
+        self._writes += 1
+        if self._writes % EVICT_EVERY == 0:
+            self.evict()
+
+    def evict(self):
+        count = self.db.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.db.execute(
+                "DELETE FROM emails WHERE key IN (SELECT key FROM emails ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+            self.db.commit()
+
+    async def get_or_fetch(self, url, fetch):
+        """
+        fetch: coroutine function taking the url and a validators dict
+        (the expired entry's email / ETag / Last-Modified, or empty; see
+        email_extractor.extract_email), returning an email or "NA". An "NA"
+        from a transient failure (validators["status"]) is not cached.
+        """
+        key = cache_key(url)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        email = self.get(key)
+        if email is not None:
+            self.stats["hits"] += 1
+            return email
+
+        self.stats["misses"] += 1
+        validators = self.validators(key)
+        task = asyncio.ensure_future(fetch(url, validators))
+        self._inflight[key] = task
+        try:
+            email = await asyncio.shield(task)
+        finally:
+            del self._inflight[key]
+
+        status = validators.get("status")
+        if email == "NA" and transient(status):
+            self.stats["transient"] += 1
+            return email
+        if validators.get("not_modified"):
+            self.stats["not_modified"] += 1
+        elif status != 200:
+            validators = {}  # no answer: the old validators no longer match the stored email
+        self.put(key, email, validators, "na" if status in (200, 304) else f"http_{status}")
+        return email
+
+    def hit_rate(self):
+        saved = self.stats["hits"] + self.stats["coalesced"]
+        total = saved + self.stats["misses"]
+        return saved / total if total else 0.0
+
+    def report(self):
+        s = self.stats
+        return (
+            f"cache hits {s['hits']} | coalesced {s['coalesced']} | misses {s['misses']} "
+            f"(expired {s['expired']}, {s['not_modified']} not modified, {s['transient']} transient, not cached) | "
+            f"hit rate {self.hit_rate():.1%}"
+        )
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
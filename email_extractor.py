@@ -0,0 +1,239 @@
+import re
+import codecs
+import asyncio
+
+# ---------------- CONFIG ----------------
+CHUNK_SIZE = 16 * 1024
+MAX_BYTES = 512 * 1024        # stop reading a homepage after this many bytes
+OVERLAP = 400                 # chars held back at the end of a chunk so no email is split
+
+# ---------------- REGEX ----------------
+_DOT = r"\s*(?:\.|\[dot\]|\(dot\)|\{dot\})\s*"
+_LABEL = r"[a-zA-Z0-9-]{1,63}"
+
+# One pass over the page that only stops where an email can be: a real "@"
+# or an obfuscated one. Local part and domain are then matched around it.
+PIVOT_REGEX = re.compile(r"@|\[at\]|\(at\)|\{at\}|&#0*64;|&#x0*40;|%40", re.I)
+LOCAL_REV_REGEX = re.compile(r"[a-zA-Z0-9._%+-]{1,64}")   # matched on the reversed text
+DOMAIN_REGEX = re.compile(r"[a-zA-Z0-9.-]{1,253}\.[a-zA-Z]{2,24}\b")
+OBF_DOMAIN_REGEX = re.compile(rf"\s*({_LABEL}(?:{_DOT}{_LABEL}){{0,3}}{_DOT}[a-zA-Z]{{2,24}})\b", re.I)
+_DOT_REGEX = re.compile(_DOT, re.I)
+_CHARSET_REGEX = re.compile(rb"""charset=["']?([\w.:-]+)""", re.I)
+
+LOOKBEHIND = 64 + len("mailto:")
+
+RANK_MAILTO, RANK_VISIBLE, RANK_OBFUSCATED = 0, 1, 2
+
+DUMMY_EMAILS = {
+    "user@domain.com", "hi@mystore.com", "your@email.com",
+    "example@example.com", "info@mysite.com", "info@example.com",
+    "hello@locmaps.com", "filler@godaddy.com", "contact@mysite.com",
+    "name@example.com", "impallari@gmail.com", "someone@example.com",
+    "info@indiantypefoundry.com", "team@latofonts.com",
+    "hello@usmapsz.xyz", "support@glossgenius.com",
+    "icon@2x.webp", "email@email.com"
+}
+IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".svg", ".gif", ".webp")
+
+# ---------------- VALIDATION ----------------
+def is_valid_email(email):
+    em = email.lower()
+    if em in DUMMY_EMAILS or em.endswith(IMAGE_EXTS):
+        return False
+
+    # reject usernames that are mostly digits/hex
+    local_part = em.split("@")[0]
+    digit_ratio = sum(c.isdigit() for c in local_part) / len(local_part)
+    return digit_ratio <= 0.5
+
+# ---------------- SCANNER ----------------
+class EmailScanner:
+    """
+    Incremental scanner: feed() decoded text as it arrives, it keeps the best
+    ranked valid candidate (mailto > visible > obfuscated) and reports when a
+    mailto hit makes reading more of the page pointless.
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = 0             # pivots before this index are already scanned
+        self.best = None          # (rank, email)
+        self.done = False
+
+    def _candidate(self, buf, pivot):
+        start, end = pivot.span()
+
+        before = buf[max(0, start - 64):start]
+        obfuscated = pivot.group() != "@"
+        if obfuscated:
+            before = before.rstrip()
+
+        local = LOCAL_REV_REGEX.match(before[::-1])
+        if not local:
+            return None
+        local = local.group()[::-1]
+        local_start = start - (len(buf[max(0, start - 64):start]) - len(before)) - len(local)
+
+        if obfuscated:
+            domain = OBF_DOMAIN_REGEX.match(buf, end)
+            if not domain:
+                return None
+            domain = _DOT_REGEX.sub(".", domain.group(1))
+            return RANK_OBFUSCATED, f"{local}@{domain}".lower()
+
+        domain = DOMAIN_REGEX.match(buf, end)
+        if not domain:
+            return None
+        is_mailto = local_start >= 7 and buf[local_start - 7:local_start].lower() == "mailto:"
+        rank = RANK_MAILTO if is_mailto else RANK_VISIBLE
+        return rank, f"{local}@{domain.group()}"
+
+    def feed(self, text, final=False):
+        if self.done:
+            return True
+
+        buf = self._buf + text
+        limit = len(buf) if final else max(self._pos, len(buf) - OVERLAP)
+
+        for pivot in PIVOT_REGEX.finditer(buf, self._pos, limit):
+            candidate = self._candidate(buf, pivot)
+            if candidate is None:
+                continue
+
+            rank, email = candidate
+            if self.best is not None and self.best[0] <= rank:
+                continue
+            if not is_valid_email(email):
+                continue
+
+            self.best = candidate
+            if rank == RANK_MAILTO:
+                self.done = True
+                return True
+
+        keep_from = max(0, limit - LOOKBEHIND)
+        self._buf = buf[keep_from:]
+        self._pos = limit - keep_from
+        return self.done
+
+    def result(self):
+        return self.best[1] if self.best else "NA"
+
+# ---------------- DECODING ----------------
+def _pick_charset(header_charset, head):
+    charset = header_charset
+    if not charset:
+        m = _CHARSET_REGEX.search(head)
+        charset = m.group(1).decode("ascii", "ignore") if m else "utf-8"
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = "utf-8"
+    return charset
+
+def find_email(data, charset=None, max_bytes=MAX_BYTES, chunk_size=CHUNK_SIZE):
+    """
+    Synchronous version over an in-memory page (bytes or str). Used by the
+    benchmark and anywhere the HTML is already downloaded.
+    """
+    scanner = EmailScanner()
+
+    if isinstance(data, str):
+        data = data[:max_bytes]
+        for i in range(0, len(data), chunk_size):
+            if scanner.feed(data[i:i + chunk_size]):
+                return scanner.result()
+        scanner.feed("", final=True)
+        return scanner.result()
+
+    data = data[:max_bytes]
+    decoder = codecs.getincrementaldecoder(_pick_charset(charset, data[:2048]))(errors="ignore")
+    for i in range(0, len(data), chunk_size):
+        if scanner.feed(decoder.decode(data[i:i + chunk_size])):
+            return scanner.result()
+    scanner.feed(decoder.decode(b"", final=True), final=True)
+    return scanner.result()
+
+# ---------------- EMAIL EXTRACTION ----------------
+def conditional_headers(validators):
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+async def extract_email(url, session, timeout=3, max_bytes=MAX_BYTES, chunk_size=CHUNK_SIZE,
+                        link_collector=None, fetch_stats=None, validators=None):
+    """
+    Streams the homepage in chunks (aiohttp inflates gzip/deflate as it
+    reads), decodes incrementally and stops at a confident mailto hit or
+    after max_bytes. Returns the email or "NA".
+
+    link_collector, if given, is fed the same decoded text (feed(text, final))
+    so callers can pick up links without a second download. fetch_stats, if
+    given, is a dict whose "bytes" and "timeouts" are incremented.
+
+    validators, if given, is a dict holding the previous fetch's "etag",
+    "last_modified" and "email": the request is made conditional, a 304
+    returns the previous email and sets validators["not_modified"], a 200
+    stores the new ETag / Last-Modified. validators["status"] is set to the
+    fetch outcome: the HTTP status, "timeout" or "error".
+    """
+    import aiohttp
+
+    try:
+        async with session.get(
+            url,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            headers={"User-Agent": "Mozilla/5.0", **conditional_headers(validators)}
+        ) as resp:
+            if validators is not None:
+                validators["status"] = resp.status
+            if resp.status == 304 and validators is not None:
+                validators["not_modified"] = True
+                if fetch_stats is not None:
+                    fetch_stats["not_modified"] = fetch_stats.get("not_modified", 0) + 1
+                return validators.get("email") or "NA"
+            if resp.status != 200:
+                return "NA"
+            if validators is not None:
+                validators["etag"] = resp.headers.get("ETag")
+                validators["last_modified"] = resp.headers.get("Last-Modified")
+
+            scanner = EmailScanner()
+            decoder = None
+            read = 0
+
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                if decoder is None:
+                    charset = _pick_charset(resp.charset, chunk[:2048])
+                    decoder = codecs.getincrementaldecoder(charset)(errors="ignore")
+
+                chunk = chunk[:max_bytes - read]
+                read += len(chunk)
+                if fetch_stats is not None:
+                    fetch_stats["bytes"] = fetch_stats.get("bytes", 0) + len(chunk)
+                text = decoder.decode(chunk)
+                if link_collector is not None:
+                    link_collector.feed(text)
+                if scanner.feed(text):
+                    return scanner.result()
+                if read >= max_bytes:
+                    break
+
+            if decoder is not None:
+                text = decoder.decode(b"", final=True)
+                if link_collector is not None:
+                    link_collector.feed(text, final=True)
+                scanner.feed(text, final=True)
+            return scanner.result()
+    except asyncio.TimeoutError:
+        if fetch_stats is not None:
+            fetch_stats["timeouts"] = fetch_stats.get("timeouts", 0) + 1
+        if validators is not None:
+            validators["status"] = "timeout"
+    except Exception:
+        if validators is not None:
+            validators["status"] = "error"
+    return "NA"
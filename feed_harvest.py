@@ -0,0 +1,119 @@
+import re
+from place_extract import PHONE_REGEX
+
+# ---------------- CONFIG ----------------
+# A card missing any of these still gets a detail-page visit
+REQUIRED_FIELDS = ("name", "address", "phone", "website")
+# Cards show the street only: records get the searched city and state
+# appended (full_address). True sends street-only cards to the detail page
+# for the exact locality instead, which costs a navigation for almost every card.
+REQUIRE_LOCALITY = False
+
+# ---------------- REGEX ----------------
+ADDRESS_REGEX = re.compile(r"^\d{1,6}[A-Za-z]?\s+\S.*[A-Za-z]")
+LOCALITY_REGEX = re.compile(r",.*(?:\b[A-Z]{2}|\b\d{5}(?:-\d{4})?)\s*$")
+RATING_REGEX = re.compile(r"(\d(?:\.\d)?)\s*star", re.I)
+REVIEWS_REGEX = re.compile(r"([\d,]+)\s*review", re.I)
+HOURS_HINTS = ("Open", "Closed", "Closes", "Opens", "24 hours")
+BUTTON_LABELS = {"Website", "Directions", "Call", "Share", "Save", "Book online", "Order online", "Sponsored"}
+
+# One round trip: every place card in the feed, raw text lines + attributes.
+FEED_CARDS_JS = """
+(feed) => {
+    const out = [];
+    const seen = new Set();
+    for (const a of feed.querySelectorAll("a[href*='/maps/place']")) {
+        const href = a.href;
+        if (!href || seen.has(href)) continue;
+        seen.add(href);
+
+        const card = a.closest("div[role='article']") || a.parentElement;
+        const rating = card.querySelector("span[role='img'][aria-label]");
+        const site = card.querySelector("a[data-value='Website'], a[aria-label*='ebsite']");
+        out.push({
+            url: href,
+            name: a.getAttribute("aria-label") || "",
+            rating: rating ? rating.getAttribute("aria-label") : "",
+            website: site ? site.href : "",
+            lines: (card.innerText || "").split("\\n"),
+        });
+    }
+    return out;
+}
+"""
+
+# ---------------- PARSING ----------------
+def parse_card(raw):
+    """
+    Turns one raw card from FEED_CARDS_JS into
+    {url, name, rating, reviews, category, address, phone, website}; fields
+    the card does not show are "NA".
+    """
+    name = (raw.get("name") or "").strip() or "NA"
+    card = {
+        "url": raw["url"],
+        "name": name,
+        "rating": "NA",
+        "reviews": "NA",
+        "category": "NA",
+        "address": "NA",
+        "phone": "NA",
+        "website": raw.get("website") or "NA",
+    }
+
+    m = RATING_REGEX.search(raw.get("rating") or "")
+    if m:
+        card["rating"] = m.group(1)
+    m = REVIEWS_REGEX.search(raw.get("rating") or "")
+    if m:
+        card["reviews"] = m.group(1).replace(",", "")
+
+    for line in raw.get("lines") or []:
+        for seg in line.split("·"):
+            seg = seg.replace("\u200e", "").strip()
+            if not seg or seg == name or seg in BUTTON_LABELS or seg.startswith(HOURS_HINTS):
+                continue
+
+            if card["phone"] == "NA" and re.search(PHONE_REGEX, seg) and not any(c.isalpha() for c in seg):
+                card["phone"] = seg
+            elif card["address"] == "NA" and ADDRESS_REGEX.match(seg):
+                card["address"] = seg
+            elif (card["category"] == "NA" and seg[0].isalpha()
+                  and not any(c.isdigit() for c in seg) and len(seg) <= 40):
+                # first plain text segment after the name is the category
+                card["category"] = seg
+
+    return card
+
+def has_locality(address):
+    return bool(LOCALITY_REGEX.search(address or ""))
+
+def full_address(address, city, state):
+    """
+    "1234 E Main St, Phoenix, AZ" from a street-only card address; an
+    address that has its locality (or is "NA") is returned as it is.
+    """
+    if not address or address == "NA" or has_locality(address):
+        return address
+    return f"{address}, {city}, {state}"
+
+def missing_fields(card, required=REQUIRED_FIELDS, require_locality=None):
+    if require_locality is None:
+        require_locality = REQUIRE_LOCALITY
+    missing = [f for f in required if card.get(f, "NA") == "NA"]
+    if (require_locality and "address" in required and "address" not in missing
+            and not has_locality(card["address"])):
+        missing.append("address")  # street only: city, state and zip come from the detail page
+    return missing
+
+# ---------------- HARVEST ----------------
+async def harvest_feed(page):
+    """
+    Parsed cards for every place currently loaded in div[role='feed'].
+    Returns [] if there is no feed (single-result searches open the place).
+    """
+    feed = await page.query_selector("div[role='feed']")
+    if not feed:
+        return []
+    raw_cards = await page.evaluate(FEED_CARDS_JS, feed)
+    return [parse_card(raw) for raw in raw_cards]
@@ -0,0 +1,244 @@
+import math
+from functools import lru_cache
+from place_extract import COORDS_REGEX
+
+# ---------------- CONFIG ----------------
+CITY_RADIUS_KM = 20.0       # a business further than this from every catalog city is out of area
+OUT_OF_AREA_SHEET = "Out of Area"   # where those go (None = drop them)
+EARTH_RADIUS_KM = 6371.0
+CHUNK_CELLS = 4_000_000     # points x cities per brute-force block when scipy is missing
+GRID_DEG = 0.25             # bucket size of the plain-Python city grid
+GRID_RINGS = 8              # rings searched around a point before giving up (~2°)
+
+# record layout: Name, Address, Phone, Website, Email, Google Maps URL, Latitude, Longitude
+URL_COL, LAT_COL, LNG_COL = 5, 6, 7
+
+# ---------------- OPTIONAL DEPENDENCIES ----------------
+# imported on first use: importing geo (main.py, main2.py) stays cheap for
+# runs that never build a city index
+@lru_cache(maxsize=None)
+def _numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:  # plain-Python fallback below: same answers, slower
+        return None
+
+@lru_cache(maxsize=None)
+def _kdtree():
+    try:
+        from scipy.spatial import cKDTree
+        return cKDTree
+    except ImportError:
+        return None
+
+# ---------------- PARSING ----------------
+def to_float(values):
+    """
+    Floats (NaN for "NA", "", None or junk); a NumPy array when available.
+    """
+    out = []
+    for value in values:
+        try:
+            out.append(float(value))
+        except (TypeError, ValueError):
+            out.append(math.nan)
+    np = _numpy()
+    return np.asarray(out, dtype=float) if np is not None else out
+
+def coords_from_urls(urls):
+    """
+    (lats, lngs) from the !3d..!4d.. part of /maps/place URLs, in bulk.
+    """
+    lats, lngs = [], []
+    for url in urls:
+        match = COORDS_REGEX.search(url) if isinstance(url, str) else None
+        lats.append(match.group(1) if match else None)
+        lngs.append(match.group(2) if match else None)
+    return to_float(lats), to_float(lngs)
+
+def record_coords(records):
+    """
+    (lats, lngs) of scraped records; the Maps URL fills in missing columns.
+    """
+    records = list(records)
+    lats = to_float(r[LAT_COL] for r in records)
+    lngs = to_float(r[LNG_COL] for r in records)
+    missing = [i for i in range(len(records)) if math.isnan(lats[i]) or math.isnan(lngs[i])]
+    if missing:
+        url_lats, url_lngs = coords_from_urls(records[i][URL_COL] for i in missing)
+        for j, i in enumerate(missing):
+            lats[i], lngs[i] = url_lats[j], url_lngs[j]
+    return lats, lngs
+
+# ---------------- DISTANCE ----------------
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Great-circle distance; broadcasts over arrays when NumPy is installed.
+    """
+    np = _numpy()
+    if np is not None:
+        lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+        a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+def within_radius(lats, lngs, city_lat, city_lng, radius_km=CITY_RADIUS_KM):
+    """
+    Mask of points within radius_km of one city centre (False without coordinates).
+    """
+    np = _numpy()
+    if np is not None:
+        lats, lngs = np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float)
+        with np.errstate(invalid="ignore"):
+            return haversine_km(lats, lngs, float(city_lat), float(city_lng)) <= radius_km
+    return [
+        not (math.isnan(lat) or math.isnan(lng))
+        and haversine_km(lat, lng, float(city_lat), float(city_lng)) <= radius_km
+        for lat, lng in zip(lats, lngs)
+    ]
+
+def _unit(lats, lngs):
+    # points on the unit sphere: nearest by chord is nearest by great circle
+    np = _numpy()
+    lat, lng = np.radians(lats), np.radians(lngs)
+    return np.column_stack((np.cos(lat) * np.cos(lng), np.cos(lat) * np.sin(lng), np.sin(lat)))
+
+# ---------------- CITY INDEX ----------------
+class CityIndex:
+    """
+    Nearest catalog city for many points at once: a KD-tree over unit
+    vectors with scipy, chunked NumPy brute force without it, and a
+    grid of GRID_DEG buckets in plain Python when NumPy is missing.
+    """
+
+    def __init__(self, names, lats, lngs):
+        rows = [
+            (name, lat, lng) for name, lat, lng in zip(names, to_float(lats), to_float(lngs))
+            if not (math.isnan(lat) or math.isnan(lng))
+        ]
+        self.names = [str(name) for name, _, _ in rows]
+        self.lats = to_float(lat for _, lat, _ in rows)
+        self.lngs = to_float(lng for _, _, lng in rows)
+
+        np, cKDTree = _numpy(), _kdtree() if rows else None
+        if np is not None:
+            self._xyz = _unit(self.lats, self.lngs) if rows else np.empty((0, 3))
+            self._tree = cKDTree(self._xyz) if cKDTree is not None else None
+        else:
+            self._grid = {}
+            for i, (lat, lng) in enumerate(zip(self.lats, self.lngs)):
+                self._grid.setdefault(self._cell(lat, lng), []).append(i)
+
+    @classmethod
+    def from_catalog(cls, state_code):
+        import catalog
+        cols = catalog.load_state_columns(state_code)
+        return cls(cols.get("City", []), cols.get("Latitude", []), cols.get("Longitude", []))
+
+    def __len__(self):
+        return len(self.names)
+
+    def nearest(self, lats, lngs):
+        """
+        (indexes, km) of the nearest city per point; index -1 and km inf
+        for points without coordinates.
+        """
+        np = _numpy()
+        if np is None:
+            return self._nearest_grid(lats, lngs)
+
+        lats, lngs = np.asarray(lats, dtype=float), np.asarray(lngs, dtype=float)
+        indexes = np.full(len(lats), -1, dtype=int)
+        km = np.full(len(lats), np.inf)
+        ok = ~(np.isnan(lats) | np.isnan(lngs))
+        if not ok.any() or not self.names:
+            return indexes, km
+
+        xyz = _unit(lats[ok], lngs[ok])
+        if self._tree is not None:
+            _, found = self._tree.query(xyz)
+        else:
+            found = np.empty(len(xyz), dtype=int)
+            step = max(1, CHUNK_CELLS // len(self.names))
+            for start in range(0, len(xyz), step):
+                found[start:start + step] = np.argmax(xyz[start:start + step] @ self._xyz.T, axis=1)
+
+        indexes[ok] = found
+        km[ok] = haversine_km(lats[ok], lngs[ok], self.lats[found], self.lngs[found])
+        return indexes, km
+
+    # ---- plain-Python fallback ----
+    @staticmethod
+    def _cell(lat, lng):
+        return math.floor(lat / GRID_DEG), math.floor(lng / GRID_DEG)
+
+    def _nearest_grid(self, lats, lngs):
+        indexes, km = [], []
+        for lat, lng in zip(lats, lngs):
+            best, best_km = -1, math.inf
+            if not (math.isnan(lat) or math.isnan(lng)):
+                row, col = self._cell(lat, lng)
+                found_at = None
+                for ring in range(GRID_RINGS + 1):
+                    # one ring past the first hit: a closer city can sit in the next bucket
+                    if found_at is not None and ring > found_at + 1:
+                        break
+                    for r in range(row - ring, row + ring + 1):
+                        for c in range(col - ring, col + ring + 1):
+                            if max(abs(r - row), abs(c - col)) != ring:
+                                continue
+                            for i in self._grid.get((r, c), ()):
+                                d = haversine_km(lat, lng, self.lats[i], self.lngs[i])
+                                if d < best_km:
+                                    best, best_km = i, d
+                    if best >= 0 and found_at is None:
+                        found_at = ring
+                if best < 0:
+                    # far from every city (out of area anyway): exact answer by brute force
+                    for i in range(len(self.names)):
+                        d = haversine_km(lat, lng, self.lats[i], self.lngs[i])
+                        if d < best_km:
+                            best, best_km = i, d
+            indexes.append(best)
+            km.append(best_km)
+        return indexes, km
+
+@lru_cache(maxsize=None)
+def state_index(state_code):
+    return CityIndex.from_catalog(state_code)
+
+# ---------------- ATTRIBUTION ----------------
+def regroup(city_results, index, radius_km=CITY_RADIUS_KM, out_of_area=OUT_OF_AREA_SHEET):
+    """
+    {city: [record, ...]} re-keyed by each record's nearest catalog city.
+    Records further than radius_km from every city go to `out_of_area`
+    (dropped if None); records without coordinates stay where they were.
+    Returns (city_results, stats).
+    """
+    flat = [(city, record) for city, records in city_results.items() for record in records]
+    lats, lngs = record_coords(record for _, record in flat)
+    indexes, km = index.nearest(lats, lngs)
+
+    regrouped = {}
+    stats = {"kept": 0, "moved": 0, "out_of_area": 0, "no_coords": 0}
+    for (city, record), i, d in zip(flat, indexes, km):
+        if i < 0:
+            target = city
+            stats["no_coords"] += 1
+        elif d > radius_km:
+            target = out_of_area
+            stats["out_of_area"] += 1
+        else:
+            target = index.names[i]
+            stats["kept" if target == city else "moved"] += 1
+        if target is not None:
+            regrouped.setdefault(target, []).append(record)
+    return regrouped, stats
+
+def summary(stats):
+    return (f"geo: {stats['kept']} on their city, {stats['moved']} moved to a nearer city, "
+            f"{stats['out_of_area']} out of area, {stats['no_coords']} without coordinates")
@@ -0,0 +1,235 @@
+import math
+import json
+import time
+import sqlite3
+
+# ---------------- CONFIG ----------------
+TILES_DB = "geo_tiles.sqlite"
+CELL_DEG = 0.1              # root grid cell (~11 km north-south), fixed so nearby cities share cells
+CITY_RADIUS_KM = 6.0        # root cells within this distance of a city centre are searched for it
+MAX_DEPTH = 4               # a saturated cell splits at most this many times (0.1° -> ~700 m)
+SATURATED_CARDS = 100       # Maps stops a feed at ~120 results; this many means "there is more"
+TTL_DAYS = 30               # a tile searched longer ago than this is searched again
+VIEWPORT = (1280, 720)      # Playwright's default viewport, the zoom fits a tile into it
+
+KM_PER_DEG = 111.32
+M_PER_PX_Z0 = 156543.03     # metres per pixel at zoom 0 on the equator
+
+# ---------------- TILES ----------------
+class Tile:
+    """
+    One quadtree node: a root grid cell (row, col) of CELL_DEG degrees and
+    the path of quadrants (0 SW, 1 SE, 2 NW, 3 NE) taken to reach it.
+    """
+
+    def __init__(self, row, col, path=""):
+        self.row = row
+        self.col = col
+        self.path = path
+
+    @property
+    def key(self):
+        return f"{self.row}:{self.col}:{self.path}"
+
+    @property
+    def depth(self):
+        return len(self.path)
+
+    def bounds(self):
+        """
+        (south, west, north, east) in degrees.
+        """
+        size = CELL_DEG
+        south, west = self.row * CELL_DEG, self.col * CELL_DEG
+        for quadrant in self.path:
+            size /= 2
+            south += size * (int(quadrant) // 2)
+            west += size * (int(quadrant) % 2)
+        return south, west, south + size, west + size
+
+    def center(self):
+        south, west, north, east = self.bounds()
+        return (south + north) / 2, (west + east) / 2
+
+    def zoom(self):
+        # largest zoom whose viewport still shows the whole tile
+        south, west, north, east = self.bounds()
+        lat = math.radians((south + north) / 2)
+        width_m = (east - west) * KM_PER_DEG * 1000 * math.cos(lat)
+        height_m = (north - south) * KM_PER_DEG * 1000
+        fit = min(VIEWPORT[0] * M_PER_PX_Z0 * math.cos(lat) / width_m,
+                  VIEWPORT[1] * M_PER_PX_Z0 * math.cos(lat) / height_m)
+        return max(3, min(21, math.floor(math.log2(fit))))
+
+    def children(self):
+        return [Tile(self.row, self.col, self.path + str(q)) for q in range(4)]
+
+    def search_url(self, base_url, term):
+        lat, lng = self.center()
+        return f"{base_url}{term.replace(' ', '+')}/@{lat:.6f},{lng:.6f},{self.zoom()}z"
+
+def root_cells(lat, lng, radius_km=CITY_RADIUS_KM):
+    """
+    Root grid cells overlapping the square of radius_km around a city
+    centre, nearest first. Empty if the catalog has no coordinates.
+    """
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return []
+    if math.isnan(lat) or math.isnan(lng):
+        return []
+
+    dlat = radius_km / KM_PER_DEG
+    dlng = radius_km / (KM_PER_DEG * max(math.cos(math.radians(lat)), 0.01))
+    rows = range(math.floor((lat - dlat) / CELL_DEG), math.floor((lat + dlat) / CELL_DEG) + 1)
+    cols = range(math.floor((lng - dlng) / CELL_DEG), math.floor((lng + dlng) / CELL_DEG) + 1)
+
+    def distance(tile):
+        c_lat, c_lng = tile.center()
+        return (c_lat - lat) ** 2 + ((c_lng - lng) * math.cos(math.radians(lat))) ** 2
+
+    return sorted((Tile(row, col) for row in rows for col in cols), key=distance)
+
+def saturated(scroll):
+    """
+    True when a feed probably holds more places than Maps showed: it never
+    reached the end-of-list marker, or it hit the result cap.
+    """
+    return bool(scroll) and (not scroll["ended"] or scroll["cards"] >= SATURATED_CARDS)
+
+# ---------------- COVERAGE ----------------
+class TileCoverage:
+    """
+    Which tiles have been searched for which term, persisted in SQLite so
+    resumes, shard workers and neighbouring cities skip covered ground.
+    A tile is "done" (feed complete, or MAX_DEPTH reached) or "split"
+    (saturated; its four children are searched instead). Each row keeps
+    the city that searched it and the links / cards it returned, so that
+    city gets them back when it runs again (crash, job-queue retry)
+    instead of finding its ground covered and no places. Rows older than
+    the TTL, or than `fresh_after` (a refresh), count as unsearched.
+    """
+
+    def __init__(self, path=TILES_DB, max_depth=MAX_DEPTH, ttl_days=TTL_DAYS, fresh_after=None):
+        self.max_depth = max_depth
+        self.fresh_after = fresh_after if fresh_after is not None else time.time() - ttl_days * 24 * 3600
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS tiles (
+                term TEXT,
+                tile TEXT,
+                status TEXT,
+                cards INTEGER,
+                city TEXT,
+                searched_at REAL,
+                links TEXT,
+                feed TEXT,
+                PRIMARY KEY (term, tile)
+            )"""
+        )
+        # coverage written before links were kept: those rows are searched again
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(tiles)")}
+        for column in ("links", "feed"):
+            if column not in columns:
+                self.db.execute(f"ALTER TABLE tiles ADD COLUMN {column} TEXT")
+        self.db.commit()
+
+        self._status = {}           # (term, tile key) -> (status, city), cached
+        self._in_flight = set()     # (term, tile key) being searched by a city of this process
+        self.stats = {"searched": 0, "split": 0, "skipped": 0, "reused": 0, "rolled_back": 0, "deepest": 0}
+
+    def _row(self, term, tile):
+        key = (term, tile.key)
+        if key not in self._status:
+            row = self.db.execute(
+                "SELECT status, city FROM tiles WHERE term = ? AND tile = ? AND searched_at >= ? AND links IS NOT NULL",
+                (term, tile.key, self.fresh_after)
+            ).fetchone()
+            if row is None:
+                return None
+            self._status[key] = tuple(row)
+        return self._status[key]
+
+    def status(self, term, tile):
+        row = self._row(term, tile)
+        return row[0] if row else None
+
+    def stored(self, term, tile, city):
+        """
+        (status, links, cards) if `city` itself searched the tile before,
+        else None.
+        """
+        row = self._row(term, tile)
+        if row is None or row[1] != city:
+            return None
+        links, feed = self.db.execute(
+            "SELECT links, feed FROM tiles WHERE term = ? AND tile = ?", (term, tile.key)
+        ).fetchone()
+        self.stats["reused"] += 1
+        return row[0], json.loads(links or "[]"), json.loads(feed or "{}")
+
+    def begin(self, term, tile):
+        """
+        False if the tile is done or another city is searching it now.
+        """
+        key = (term, tile.key)
+        if self.status(term, tile) == "done" or key in self._in_flight:
+            self.stats["skipped"] += 1
+            return False
+        self._in_flight.add(key)
+        return True
+
+    def finish(self, term, tile, scroll, city=None, links=(), cards=None):
+        """
+        Records a searched tile with what it returned; returns its children
+        when the feed was saturated and the tile may still split, else [].
+        """
+        key = (term, tile.key)
+        self._in_flight.discard(key)
+        split = saturated(scroll) and tile.depth < self.max_depth
+        status = "split" if split else "done"
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO tiles (term, tile, status, cards, city, searched_at, links, feed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (term, tile.key, status, (scroll or {}).get("cards", 0), city, time.time(),
+             json.dumps(sorted(links)), json.dumps(cards or {}, ensure_ascii=False))
+        )
+        self.db.commit()
+        self._status[key] = (status, city)
+        self.stats["searched"] += 1
+        self.stats["deepest"] = max(self.stats["deepest"], tile.depth)
+        if split:
+            self.stats["split"] += 1
+            return tile.children()
+        return []
+
+    def abort(self, term, tile):
+        # search failed: leave the tile unsearched for a later city or run
+        self._in_flight.discard((term, tile.key))
+
+    def rollback(self, searched):
+        """
+        Forgets tiles a failed city searched ([(term, tile)]), so whoever
+        runs next searches them again.
+        """
+        for term, tile in searched:
+            self._status.pop((term, tile.key), None)
+            self.db.execute("DELETE FROM tiles WHERE term = ? AND tile = ?", (term, tile.key))
+        self.db.commit()
+        self.stats["rolled_back"] += len(searched)
+        searched.clear()
+
+    def report(self):
+        return (
+            f"tiles searched {self.stats['searched']} | split {self.stats['split']} | "
+            f"skipped (covered) {self.stats['skipped']} | reused {self.stats['reused']} | "
+            f"rolled back {self.stats['rolled_back']} | deepest level {self.stats['deepest']}"
+        )
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
@@ -0,0 +1,234 @@
+import sys
+import time
+import sqlite3
+
+# ---------------- CONFIG ----------------
+QUEUE_DB = "city_jobs.sqlite"
+LEASE_SECONDS = 15 * 60     # a city not heartbeated for this long goes back to the queue
+MAX_ATTEMPTS = 3            # failures / expired leases before a city is parked as failed
+
+_SELECT_JOB = "SELECT id, state_code, state_name, city, city_index, lat, lng, attempts FROM jobs"
+
+def _job(row):
+    keys = ("id", "state_code", "state_name", "city", "city_index", "lat", "lng", "attempts")
+    return dict(zip(keys, row))
+
+# ---------------- QUEUE ----------------
+class JobQueue:
+    """
+    One row per catalog city. Workers (any process, any host that can open
+    the same database file) claim cities with a time-limited lease, extend
+    it with heartbeat(), and finish with complete() or fail(). A lease that
+    runs out, e.g. a worker that died, makes the city claimable again, so
+    no city is lost and no two live workers hold the same one.
+    """
+
+    def __init__(self, path=QUEUE_DB, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # autocommit; claims take the write lock explicitly with BEGIN IMMEDIATE
+        self.db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA busy_timeout=30000")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                state_code TEXT NOT NULL,
+                state_name TEXT,
+                city TEXT NOT NULL,
+                city_index INTEGER NOT NULL,
+                lat REAL,
+                lng REAL,
+                status TEXT NOT NULL DEFAULT 'queued',   -- queued | leased | done | failed
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker TEXT,
+                lease_until REAL,
+                records INTEGER,
+                error TEXT,
+                updated_at REAL,
+                UNIQUE (state_code, city_index)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, lease_until);
+            """
+        )
+
+    # ---- seeding ----
+    def seed(self, state_codes=None):
+        """
+        Adds every catalog city of `state_codes` (all states if None).
+        Cities already in the queue are left as they are. Returns rows added.
+        """
+        import catalog
+
+        before = self.db.total_changes
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for code in state_codes or catalog.state_codes():
+                name = catalog.state_name(code)
+                self.db.executemany(
+                    "INSERT OR IGNORE INTO jobs (state_code, state_name, city, city_index, lat, lng, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        (code, name, row["City"], index, float(row["Latitude"]), float(row["Longitude"]), time.time())
+                        for index, row in enumerate(catalog.load_state_rows(code))
+                    )
+                )
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        return self.db.total_changes - before
+
+    # ---- leases ----
+    def claim(self, worker, n=1, state_code=None):
+        """
+        Leases up to n claimable cities (queued, or leased with an expired
+        lease) to `worker`, all of one state: `state_code` if given, else
+        the state of the first claimable city. Returns job dicts.
+        """
+        now = time.time()
+        claimable = "(status = 'queued' OR (status = 'leased' AND lease_until < ?))"
+
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            # expired leases that used up their attempts are parked, not retried
+            self.db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', worker = NULL, updated_at = ? "
+                "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+
+            if state_code is None:
+                row = self.db.execute(
+                    f"SELECT state_code FROM jobs WHERE {claimable} ORDER BY id LIMIT 1", (now,)
+                ).fetchone()
+                if row is None:
+                    self.db.execute("COMMIT")
+                    return []
+                state_code = row[0]
+
+            jobs = [
+                _job(row) for row in self.db.execute(
+                    f"{_SELECT_JOB} WHERE state_code = ? AND {claimable} ORDER BY city_index LIMIT ?",
+                    (state_code, now, n)
+                )
+            ]
+            self.db.executemany(
+                "UPDATE jobs SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "updated_at = ? WHERE id = ?",
+                ((worker, now + self.lease_seconds, now, job["id"]) for job in jobs)
+            )
+            self.db.execute("COMMIT")
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+
+        for job in jobs:
+            job["attempts"] += 1
+        return jobs
+
+    def heartbeat(self, worker, job_ids):
+        """
+        Extends the leases `worker` still holds. Returns the ids it lost
+        (expired and taken by someone else, or finished elsewhere).
+        """
+        if not job_ids:
+            return []
+        now = time.time()
+        lost = []
+        for job_id in job_ids:
+            cur = self.db.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (now + self.lease_seconds, now, job_id, worker)
+            )
+            if cur.rowcount == 0:
+                lost.append(job_id)
+        return lost
+
+    def complete(self, job_id, worker, records=0):
+        cur = self.db.execute(
+            "UPDATE jobs SET status = 'done', records = ?, error = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (records, time.time(), job_id, worker)
+        )
+        return cur.rowcount == 1
+
+    def fail(self, job_id, worker, error, retry=True):
+        """
+        Re-queues the city, or parks it as failed once it has used up
+        max_attempts (or when retry is False).
+        """
+        cur = self.db.execute(
+            "UPDATE jobs SET status = CASE WHEN ? AND attempts < ? THEN 'queued' ELSE 'failed' END, "
+            "error = ?, worker = NULL, lease_until = NULL, updated_at = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (int(retry), self.max_attempts, str(error)[:500], time.time(), job_id, worker)
+        )
+        return cur.rowcount == 1
+
+    def release(self, worker, job_ids):
+        """
+        Gives leased cities back untouched (clean shutdown); the attempt
+        does not count.
+        """
+        self.db.executemany(
+            "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), worker = NULL, "
+            "lease_until = NULL, updated_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+            ((time.time(), job_id, worker) for job_id in job_ids)
+        )
+
+    def requeue_failed(self, state_code=None):
+        cur = self.db.execute(
+            "UPDATE jobs SET status = 'queued', attempts = 0, error = NULL, updated_at = ? "
+            "WHERE status = 'failed' AND (? IS NULL OR state_code = ?)",
+            (time.time(), state_code, state_code)
+        )
+        return cur.rowcount
+
+    # ---- reporting ----
+    def counts(self):
+        counts = {"queued": 0, "leased": 0, "done": 0, "failed": 0}
+        for status, n in self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = n
+        return counts
+
+    def unfinished(self):
+        counts = self.counts()
+        return counts["queued"] + counts["leased"]
+
+    def report(self):
+        c = self.counts()
+        total = sum(c.values())
+        pct = c["done"] / total * 100 if total else 0.0
+        return (f"city jobs: {c['done']}/{total} done ({pct:.1f}%), {c['leased']} leased, "
+                f"{c['queued']} queued, {c['failed']} failed")
+
+    def by_state(self):
+        return self.db.execute(
+            "SELECT state_code, SUM(status = 'done'), SUM(status = 'leased'), SUM(status = 'queued'), "
+            "SUM(status = 'failed'), COUNT(*) FROM jobs GROUP BY state_code ORDER BY state_code"
+        ).fetchall()
+
+    def close(self):
+        self.db.close()
+
+# ---------------- RUN ----------------
+if __name__ == "__main__":
+    # python job_queue.py seed [AZ UT ...]   -> queue every catalog city (or these states)
+    # python job_queue.py status             -> progress per state
+    # python job_queue.py requeue [AZ]       -> failed cities back to the queue
+    args = sys.argv[1:]
+    command = args[0] if args else "status"
+    jobs = JobQueue()
+
+    if command == "seed":
+        added = jobs.seed([code.upper() for code in args[1:]] or None)
+        print(f"[✓] Seeded {added} city jobs")
+    elif command == "requeue":
+        print(f"[✓] Re-queued {jobs.requeue_failed(args[1].upper() if len(args) > 1 else None)} failed cities")
+    elif command == "status":
+        for code, done, leased, queued, failed, total in jobs.by_state():
+            print(f"{code}  {done:>5}/{total:<5} done  {leased:>3} leased  {queued:>5} queued  {failed:>3} failed")
+    print(f"[🗄] {jobs.report()}")
+    jobs.close()
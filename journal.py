@@ -0,0 +1,111 @@
+import os
+import glob
+import json
+import threading
+
+# ---------------- CONFIG ----------------
+JOURNAL_DIR = "journal"
+COMPACT_EVERY = 5000        # appended lines between compactions
+
+def journal_path(state_code, worker_id=None):
+    suffix = f".w{worker_id}" if worker_id is not None else ""
+    return os.path.join(JOURNAL_DIR, f"{state_code}{suffix}.journal")
+
+# ---------------- JOURNAL ----------------
+class Journal:
+    """
+    Append-only resume log. Lines are
+        {"t": "c", "i": city_index}                 city fully done
+        {"t": "p", "i": city_index, "k": place_key}  place scraped and stored
+        {"t": "s", "cities": [...], "places": {...}} snapshot (after compaction)
+    On start every journal file of the state is replayed (shard workers
+    write their own file). Compaction rewrites this file as one snapshot
+    and drops place entries of finished cities, so it stays small.
+    Writes may come from the record sink's writer thread (an entry is only
+    written once the records it vouches for are fsynced), hence the lock.
+    """
+
+    def __init__(self, state_code, worker_id=None, compact_every=COMPACT_EVERY):
+        os.makedirs(JOURNAL_DIR, exist_ok=True)
+        self.path = journal_path(state_code, worker_id)
+        self.compact_every = compact_every
+        self.done_cities = set()
+        self.done_places = {}       # city_index -> set(place_key)
+
+        for path in sorted(glob.glob(os.path.join(JOURNAL_DIR, f"{state_code}.*journal"))):
+            self._replay(path)
+
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._appended = 0
+        self._lock = threading.Lock()
+
+    def _replay(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                kind = entry.get("t")
+                if kind == "c":
+                    self.done_cities.add(entry["i"])
+                elif kind == "p":
+                    self.done_places.setdefault(entry["i"], set()).add(entry["k"])
+                elif kind == "s":
+                    self.done_cities.update(entry["cities"])
+                    for index, keys in entry["places"].items():
+                        self.done_places.setdefault(int(index), set()).update(keys)
+
+        for index in self.done_cities:
+            self.done_places.pop(index, None)
+
+    def _append(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        self._appended += 1
+        if self._appended >= self.compact_every:
+            self._compact()
+
+    # ---- writes ----
+    def place_done(self, index, key):
+        with self._lock:
+            self.done_places.setdefault(index, set()).add(key)
+            self._append({"t": "p", "i": index, "k": key})
+
+    def city_done(self, index):
+        with self._lock:
+            self.done_cities.add(index)
+            self.done_places.pop(index, None)
+            self._append({"t": "c", "i": index})
+
+    # ---- reads ----
+    def is_city_done(self, index):
+        return index in self.done_cities
+
+    def is_place_done(self, index, key):
+        return key in self.done_places.get(index, ())
+
+    # ---- maintenance ----
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        snapshot = {
+            "t": "s",
+            "cities": sorted(self.done_cities),
+            "places": {str(i): sorted(keys) for i, keys in self.done_places.items()},
+        }
+        self._file.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._appended = 0
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -1,22 +1,120 @@
-import time, random
+import time
 import re
 import aiohttp
-from urllib.parse import unquote
+from aiohttp.abc import AbstractResolver
 import asyncio
-from playwright.async_api import async_playwright
 from datetime import datetime
 import os
-import pandas as pd
 import json
+import email_extractor
+import contact_crawler
+from email_cache import EmailCache
+from place_dedupe import SeenPlaces, place_key
+from journal import Journal
+from feed_harvest import harvest_feed, missing_fields, full_address
+from place_extract import extract_place, feed_links, coords_from_url
+import waits
+import metrics
+from page_pool import PagePool
+from request_block import RequestBlocker
+from memory_watchdog import MemoryWatchdog, BrowserRecycler
+from concurrency import AdaptiveLimiter, AIMDController, looks_blocked, decision_log_path
+from pipeline import Stage
+from search_jobs import build_search_terms, category_slug, TermOverlap
+from job_queue import JobQueue
+from refresh import RefreshIndex, card_hash
+from geo_tiles import TileCoverage, root_cells
+import geo
+import record_sink
+from record_sink import RecordSink
+from contextlib import asynccontextmanager
+import multiprocessing as mp
+import queue
+import sys
+import socket
+import importlib
 
 # ---------------- CONFIG ----------------
-SEM = asyncio.Semaphore(3)  # Increased concurrent cities
-BIZ_SEM = asyncio.Semaphore(3)  # Increased concurrent businesses
+# Start, floor and ceiling; with ADAPTIVE_CONCURRENCY the controller moves
+# them at run time from latency, timeouts, block pages and host memory
+SEM = AdaptiveLimiter("city", 3, 1, 6)  # concurrent cities (browser contexts)
+BIZ_SEM = AdaptiveLimiter("page", 3, 1, 10)  # concurrent business pages
+HTTP_SEM = AdaptiveLimiter("http", 10, 2, 50)  # concurrent website fetches (email)
+ADAPTIVE_CONCURRENCY = True  # AIMD controller, decisions logged to logs/concurrency*.jsonl
+# Pipeline stages: city search (SEM) -> detail pages -> website/email enrichment.
+# Pages are released as soon as the DOM is read; email fetches never hold one.
+DETAIL_WORKERS = BIZ_SEM.maximum  # BIZ_SEM still decides how many of them hold a page
+DETAIL_QUEUE = 50
+ENRICH_WORKERS = HTTP_SEM.maximum  # HTTP_SEM still decides how many fetch at once
+ENRICH_QUEUE = 500
+# A city leaves SEM and its browser context once its detail pages are read;
+# its emails are fetched afterwards. At most this many cities wait on websites
+# before no new city is started.
+ENRICH_CITIES = 12
 
 BASE_URL = "https://www.google.com/maps/search/"
 TARGET_STATE_CODE = "AZ" 
 BATCH_SIZE = 25
-START_FROM_INDEX = 0
+START_FROM_INDEX = 0  # cities before this index are skipped (resume itself is automatic, see USE_JOURNAL)
+MAX_CITIES = None  # stop after this many cities (benchmarks, smoke runs); None = whole state
+# Every job is searched in every city within one browser context. Places found
+# by several terms are scraped once (first job wins). With more than one job
+# the output goes to OUTPUT_DIR/<Category>/.
+SEARCH_JOBS = [
+    {"category": "Hair Salon", "terms": ["Hair Salon"]},
+    # {"category": "Barber", "terms": ["Barber Shop", "Barber"]},
+    # {"category": "Nail Salon", "terms": ["Nail Salon"]},
+    # {"category": "Spa", "terms": ["Day Spa", "Spa"]},
+]
+# Search each term over map tiles around the city (@lat,lng,zoom viewports) instead of
+# one "<term> in <city>" query; saturated tiles split into four, covered tiles are skipped
+GEO_TILING = False
+GEO_TILES_DB = "geo_tiles.sqlite"
+# Exported sheets group businesses by their nearest catalog city (geo.py), not by the
+# city whose search found them; beyond geo.CITY_RADIUS_KM of every city -> "Out of Area"
+GEO_ATTRIBUTION = True
+HOST_OVERRIDES = {}  # {"bench.test": "127.0.0.1"}: website fetches for *.bench.test go to that IP
+CRAWL_CONTACT_PAGES = False  # no email on homepage -> try /contact, /about, booking pages
+USE_EMAIL_CACHE = True  # website -> email results persisted across runs
+EMAIL_CACHE_DB = "email_cache.sqlite"
+DEDUPE_PLACES = True  # skip places another city (or an earlier run) already scraped
+DEDUPE_DB = "seen_places.sqlite"
+USE_PAGE_POOL = True  # reuse warm contexts/pages instead of new ones per city/business
+BLOCK_REQUESTS = True  # images, fonts, CSS, map tiles, beacons blocked inside Chromium (request_block.py)
+COUNT_REQUESTS = False  # per-request Network events into Python for the blocking report (always with --profile)
+USE_JOURNAL = True  # journal/<STATE>.journal: restart skips finished cities and places
+USE_RECORD_SINK = True  # stream records to records/*.jsonl, build Excel from it at the end
+# --refresh: feed pass for every city, detail pages / websites only for places that are new,
+# older than REFRESH_TTL_DAYS or whose feed card changed (needs the record sink of earlier runs)
+REFRESH = False
+REFRESH_TTL_DAYS = 30
+FEED_HARVEST = True  # read fields from the result cards, open detail pages only for gaps
+WORKERS = 1  # >1 = one browser process per worker, pulling from a shared city queue
+# --queue: cities come from the job queue (python job_queue.py seed), any state,
+# any number of hosts sharing the database file
+QUEUE_DB = "city_jobs.sqlite"
+JOB_TIMEOUT = 30 * 60  # seconds one city may take before it is failed and re-queued
+QUEUE_POLL_SECONDS = 30  # idle wait while other workers still hold leases
+WRITE_PROMETHEUS = True  # logs/metrics.prom, rewritten during the run (node_exporter textfile)
+PROFILE = False  # --profile: cProfile + event-loop lag samples (logs/profile_*.pstats)
+# RSS of this process + its Chromium tree is sampled for the run report; over
+# the budget, the browser is drained and relaunched (None = sample only)
+MEMORY_BUDGET_MB = 4096
+MEMORY_SAMPLE_SECONDS = 10
+
+CONTEXT_OPTIONS = {
+    "locale": "en-US",
+    "timezone_id": "America/New_York"
+}
+
+BROWSER_ARGS = [
+    "--disable-blink-features=AutomationControlled",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--disable-extensions"
+]
 
 OUTPUT_DIR = "state_city_excels"
 PROGRESS_FILE = "scraping_progress.json"
@@ -38,233 +136,595 @@ def save_progress(state_code, last_index):
         }, f)
 
 # ---------------- DATA IMPORT ----------------
-cities_df = pd.read_excel("USA_Cities_2025_New.xlsx")
-
-# ---------------- REGEX ----------------
-EMAIL_REGEX = re.compile(r"\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b")
-PHONE_REGEX = r"\+?\d[\d\s().-]{8,}\d"
-
-DUMMY_EMAILS = {
-    "user@domain.com", "hi@mystore.com", "your@email.com",
-    "example@example.com", "info@mysite.com", "info@example.com",
-    "hello@locmaps.com", "filler@godaddy.com", "contact@mysite.com",
-    "name@example.com", "impallari@gmail.com", "someone@example.com",
-    "info@indiantypefoundry.com", "team@latofonts.com",
-    "hello@usmapsz.xyz", "support@glossgenius.com",
-    "icon@2x.webp", "email@email.com"
-}
+# Cities come from catalog.py's per-state cache; pandas and playwright are
+# imported lazily so helpers and spawned workers start fast.
+import catalog
+
+# ---------------- HTTP ----------------
+class HostOverrideResolver(AbstractResolver):
+    """
+    Resolves hosts under HOST_OVERRIDES to a fixed IP (bench/maps_fixture.py
+    serves every fake salon site); everything else uses the default resolver.
+    """
+
+    def __init__(self, overrides):
+        self.overrides = overrides
+        self._default = aiohttp.DefaultResolver()
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        for suffix, ip in self.overrides.items():
+            if host == suffix or host.endswith("." + suffix):
+                return [{"hostname": host, "host": ip, "port": port,
+                         "family": socket.AF_INET, "proto": 0, "flags": socket.AI_NUMERICHOST}]
+        return await self._default.resolve(host, port, family)
+
+    async def close(self):
+        await self._default.close()
+
+def make_connector():
+    # HTTP_SEM does the adaptive limiting; the connector only caps at its ceiling
+    resolver = HostOverrideResolver(HOST_OVERRIDES) if HOST_OVERRIDES else None
+    return aiohttp.TCPConnector(limit=HTTP_SEM.maximum, limit_per_host=10, resolver=resolver)
 
 # ---------------- RESOURCE BLOCKING ----------------
-async def block_resources(route):
-    if route.request.resource_type in {"image", "media", "font", "stylesheet"}:
-        await route.abort()
-    else:
-        await route.continue_()
+# Installed per page over CDP: URL patterns only, blocked inside Chromium
+blocker = RequestBlocker() if BLOCK_REQUESTS else None
+
+async def setup_page(page):
+    if blocker is not None:
+        await blocker.attach(page)
+
+# ---------------- RUN STORES ----------------
+# Opened once per process (main() or a shard worker) by open_stores()
+email_cache = None   # EmailCache
+seen_places = None   # SeenPlaces
+sink = None          # RecordSink
+journal = None       # Journal
+tile_coverage = None # TileCoverage
+refresh_index = None # RefreshIndex (--refresh)
+
+def open_stores(worker_id=None):
+    global email_cache, seen_places, sink, journal, tile_coverage, refresh_index
+    # a refresh revisits finished cities; its own progress is the refresh index
+    if USE_JOURNAL and not REFRESH:
+        journal = Journal(TARGET_STATE_CODE, worker_id)
+    if REFRESH:
+        refresh_index = RefreshIndex(TARGET_STATE_CODE, REFRESH_TTL_DAYS)
+        print(f"[↺] Refresh: {len(refresh_index.places)} stored places for {TARGET_STATE_CODE}")
+        if not USE_RECORD_SINK:
+            print("[!] Refresh without the record sink: this run's records are not indexed for the next one")
+    if USE_EMAIL_CACHE:
+        email_cache = EmailCache(EMAIL_CACHE_DB)
+    if DEDUPE_PLACES:
+        seen_places = SeenPlaces(DEDUPE_DB)
+    if USE_RECORD_SINK:
+        sink = RecordSink(record_sink.sink_path(TARGET_STATE_CODE, worker_id))
+    if GEO_TILING:
+        # a refresh searches every tile again, once
+        tile_coverage = TileCoverage(GEO_TILES_DB, fresh_after=time.time() if REFRESH else None)
+
+def close_stores(tag=""):
+    global email_cache, seen_places, sink, journal, tile_coverage, refresh_index
+    if sink is not None:
+        sink.close()
+        print(f"[💾] {tag}{sink.written} records streamed to {sink.path}")
+        sink = None
+    if journal is not None:
+        journal.compact()
+        journal.close()
+        journal = None
+    if email_cache is not None:
+        print(f"[🗄] {tag}{email_cache.report()}")
+        email_cache.close()
+        email_cache = None
+    if seen_places is not None:
+        print(f"[🗄] {tag}{seen_places.report()}")
+        seen_places.close()
+        seen_places = None
+    if tile_coverage is not None:
+        print(f"[🗺] {tag}{tile_coverage.report()}")
+        tile_coverage.close()
+        tile_coverage = None
+    if refresh_index is not None:
+        print(f"[↺] {tag}{refresh_index.report()}")
+        metrics.info["refresh"] = dict(refresh_index.stats)
+        refresh_index = None
+
+# ---------------- ADAPTIVE CONCURRENCY ----------------
+controller = None  # AIMDController, one per process (see start_controller)
+
+def observe(lane, seconds=None, timeout=False, blocked=False):
+    if controller is not None:
+        controller.observe(lane, seconds, timeout=timeout, blocked=blocked)
+
+def start_controller(worker_id=None):
+    global controller
+    if ADAPTIVE_CONCURRENCY:
+        controller = AIMDController(
+            [SEM, BIZ_SEM, HTTP_SEM],
+            browser_lanes=("city", "page"),
+            log_path=decision_log_path(worker_id)
+        )
+        controller.start()
+
+async def stop_controller(tag=""):
+    global controller
+    if controller is not None:
+        await controller.stop()
+        print(f"[⚙] {tag}{controller.report()}")
+        metrics.info["concurrency"] = {
+            "limits": {name: limiter.limit for name, limiter in controller.limiters.items()},
+            "decisions": controller.decisions,
+        }
+        controller = None
+
+# ---------------- INSTRUMENTATION ----------------
+instrumentation_tasks = []  # Prometheus writer / loop-lag probe of this process
+
+def start_instrumentation(worker_id=None):
+    metrics.reset()
+    if blocker is not None:
+        blocker.count_requests = COUNT_REQUESTS or PROFILE
+    if WRITE_PROMETHEUS:
+        instrumentation_tasks.append(asyncio.create_task(metrics.prometheus_loop(metrics.prom_path(worker_id))))
+    if PROFILE:
+        instrumentation_tasks.append(asyncio.create_task(metrics.loop_lag_probe()))
+
+async def stop_instrumentation(worker_id=None, tag=""):
+    for task in instrumentation_tasks:
+        task.cancel()
+    await asyncio.gather(*instrumentation_tasks, return_exceptions=True)
+    instrumentation_tasks.clear()
+
+    if WRITE_PROMETHEUS:
+        metrics.write_prometheus(metrics.prom_path(worker_id))
+    metrics.info["run"] = {"state_code": TARGET_STATE_CODE, "worker_id": worker_id, "profile": PROFILE}
+    metrics.info["search_overlap"] = term_overlap.report()
+    if blocker is not None:
+        navigations = sum(h.count for (stage, _), h in metrics.histograms.items() if stage in ("search", "goto"))
+        metrics.info["request_blocking"] = blocker.summary(navigations)
+        print(f"[🚫] {tag}{blocker.report(navigations)}")
+    if len(term_overlap.keys) > 1:
+        print(f"[🔎] {tag}Search term overlap:\n{term_overlap.summary()}")
+    path = metrics.write_report(metrics.report_path(TARGET_STATE_CODE, worker_id))
+    print(f"[📊] {tag}Run report: {path} ({metrics.pages_per_minute():.1f} pages/min)")
 
 # ---------------- EMAIL EXTRACTION ----------------
-async def extract_email_fast(url, session):
-    try:
-        async with session.get(
-            url,
-            timeout=aiohttp.ClientTimeout(total=3),  # Reduced timeout
-            headers={"User-Agent": "Mozilla/5.0"}
-        ) as resp:
-            if resp.status != 200:
-                return "NA"
-
-            html = await resp.text()
-
-            # mailto first
-            mailtos = re.findall(r"mailto:([a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,})", html, re.I)
-            if mailtos:
-                return mailtos[0]
-
-            # visible emails
-            emails = EMAIL_REGEX.findall(html)
-            if emails:
-                def clean_email(e: str) -> str:
-                    e = e.lower().replace("mailto:", "")
-                    return re.sub(r"[^\w@.+-]", "", e)
-
-                cleaned = [clean_email(e) for e in emails]
-
-                if any(e in DUMMY_EMAILS for e in cleaned):
-                    return "NA"
-                
-                em = emails[0].lower()
-                local_part = em.split("@")[0]
-
-                IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".svg")
-                if em.endswith(IMAGE_EXTS):
-                    return "NA"
-
-                digit_ratio = sum(c.isdigit() for c in local_part) / len(local_part)
-                if digit_ratio > 0.5:
-                    return "NA"
-                
-                return emails[0]
-    except:
-        pass
-    return "NA"
+async def fetch_email(url, session, timeout=3, city=None, validators=None):
+    # validators: the cache's ETag / Last-Modified for this site, makes the GET conditional
+    async with HTTP_SEM:
+        fetch_stats = {}
+        start = time.perf_counter()
+        if CRAWL_CONTACT_PAGES:
+            email = await contact_crawler.find_email(url, session, timeout=timeout, fetch_stats=fetch_stats,
+                                                     validators=validators)
+        else:
+            email = await email_extractor.extract_email(url, session, timeout=timeout,  # Reduced timeout
+                                                        fetch_stats=fetch_stats, validators=validators)
+        elapsed = time.perf_counter() - start
+
+        timed_out = bool(fetch_stats.get("timeouts")) or elapsed >= timeout * 0.95
+        outcome = "timeout" if timed_out else ("NA" if email == "NA" else "ok")
+        waits.record("email_fetch", elapsed, city, outcome)
+        metrics.count("bytes", fetch_stats.get("bytes", 0), stage="email_fetch", city=city)
+        if fetch_stats.get("not_modified"):
+            metrics.count("not_modified", stage="email_fetch", city=city)
+        observe("http", elapsed, timeout=timed_out)
+        return email
+
+async def extract_email_fast(url, session, city=None):
+    async with waits.timed("email", city=city) as step:
+        if email_cache is not None:
+            # chain salons share a domain: one fetch, reused across cities and runs
+            email = await email_cache.get_or_fetch(
+                url, lambda u, validators: fetch_email(u, session, city=city, validators=validators)
+            )
+        else:
+            email = await fetch_email(url, session, city=city)
+        if email == "NA":
+            step["outcome"] = "NA"
+        return email
 
 # ---------------- HELPER FUNCTIONS ----------------
-def extract_name_from_url(url):
-    try:
-        part = url.split("/place/")[1].split("/")[0]
-        return unquote(part).replace("+", " ").strip()
-    except:
-        return "NA"
-
-async def extract_address_fallback(page):
-    try:
-        panel = await page.query_selector("div[role='main']")
-        if not panel:
-            return "NA"
-        text = await panel.inner_text()
-        for line in text.split("\n"):
-            if "," in line and any(x in line for x in ["Street", "St", "Ave", "Road", "Rd", "Blvd", "Drive"]):
-                return line.strip()
-    except:
-        pass
-    return "NA"
-
-def extract_lat_lng_from_url(url):
-    try:
-        match = re.search(r"!3d(-?\d+\.\d+)!4d(-?\d+\.\d+)", url)
-        if match:
-            return match.group(1), match.group(2)
-    except:
-        pass
-    return "NA", "NA"
-
 async def scroll_results_feed(page, max_attempts=25):  # Reduced from 40
-    feed = await page.query_selector("div[role='feed']")
-    if not feed:
-        return
-
-    previous_height = 0
-    same_height_count = 0
-
-    for _ in range(max_attempts):
-        await page.evaluate("(feed) => feed.scrollBy(0, feed.scrollHeight * 2)", feed)
-        await asyncio.sleep(random.uniform(0.8, 1.5))  # Faster scrolling
-
-        current_height = await page.evaluate("(feed) => feed.scrollHeight", feed)
-
-        if current_height == previous_height:
-            same_height_count += 1
-        else:
-            same_height_count = 0
-
-        if same_height_count >= 2:
-            break
-
-        previous_height = current_height
+    # Event driven: each step returns as soon as new cards arrive,
+    # stops at the end-of-list marker instead of two equal scrollHeights
+    return await waits.scroll_feed(page, max_steps=max_attempts)
 
 # ---------------- BUSINESS SCRAPER ----------------
-async def safe_goto(page, url):
+async def safe_goto(page, url, city=None):
+    start = time.perf_counter()
     try:
-        await page.goto(url, timeout=30000, wait_until="domcontentloaded")  # Reduced timeout
-        await page.wait_for_timeout(1000)  # Reduced wait
+        async with waits.timed("goto", city=city):
+            await page.goto(url, timeout=30000, wait_until="domcontentloaded")  # Reduced timeout
+        async with waits.timed("place_ready", city=city) as step:
+            ready = await waits.wait_for_place(page)
+            if not ready:
+                step["outcome"] = "timeout"
+        observe("page", time.perf_counter() - start, timeout=not ready, blocked=looks_blocked(page.url))
         return True
     except:
+        observe("page", time.perf_counter() - start, timeout=True)
         return False
 
-async def scrape_business_details(page, session, url):
-    if not await safe_goto(page, url):
+async def scrape_business_details(page, url, city=None):
+    # DOM fields only; the email is filled in by the enrichment stage
+    if not await safe_goto(page, url, city):
         return None
 
     try:
-        await page.wait_for_selector('button[data-item-id*="address"]', timeout=1500)  # Reduced
+        async with waits.timed("address_wait", city=city):
+            await page.wait_for_selector('button[data-item-id*="address"]', timeout=1500)  # Reduced
     except:
         pass
 
-    name_el = await page.query_selector("h1")
-    name = await name_el.inner_text() if name_el else extract_name_from_url(url)
-
-    address = phone = website = "NA"
-
-    address_el = await page.query_selector('button[data-item-id*="address"]')
-    if address_el:
-        address = (await address_el.inner_text()).strip()
-
-    if address == "NA":
-        address = await extract_address_fallback(page)
-
-    phone_el = await page.query_selector('button[data-item-id*="phone"]')
-    if phone_el:
-        phones = re.findall(PHONE_REGEX, await phone_el.inner_text())
-        if phones:
-            phone = phones[0]
+    # every field in one page.evaluate instead of a round trip per selector
+    try:
+        place = await extract_place(page, url)
+    except Exception:
+        return None
 
-    website_el = await page.query_selector('a[data-item-id*="authority"]')
-    if website_el:
-        website = await website_el.get_attribute("href")
+    return [place["name"], place["address"], place["phone"], place["website"], "NA", url, place["lat"], place["lng"]]
 
-    email = "NA"
-    if website != "NA":
-        email = await extract_email_fast(website, session)
+def record_from_card(card, city):
+    # Everything needed is on the feed card: no browser page at all. The card
+    # shows the street only; the locality is the city that was searched.
+    lat, lng = coords_from_url(card["url"])
+    address = full_address(card["address"], city, TARGET_STATE_CODE)
 
-    lat, lng = extract_lat_lng_from_url(url)
+    return [card["name"], address, card["phone"], card["website"], "NA", card["url"], lat, lng]
 
-    return [name, address, phone, website, email, url, lat, lng]
+# ---------------- PIPELINE STAGES ----------------
+detail_stage = None  # Stage: (context, url) -> record without email
+enrich_stage = None  # Stage: website -> email
 
-async def scrape_one_business(context, session, url):
+async def scrape_one_business(item):
+    context, url, city = item
     async with BIZ_SEM:
-        page = await context.new_page()
+        async with business_page(context) as page:
+            return await scrape_business_details(page, url, city)
+
+def open_stages(session):
+    global detail_stage, enrich_stage
+    detail_stage = Stage("detail", scrape_one_business, DETAIL_WORKERS, DETAIL_QUEUE)
+    enrich_stage = Stage("enrich", lambda item: extract_email_fast(item[0], session, item[1]),
+                         ENRICH_WORKERS, ENRICH_QUEUE)
+    detail_stage.start()
+    enrich_stage.start()
+
+async def close_stages(tag=""):
+    global detail_stage, enrich_stage
+    for stage in (detail_stage, enrich_stage):
+        if stage is not None:
+            await stage.close()
+            print(f"[⛓] {tag}{stage.report()}")
+            metrics.info.setdefault("pipeline", {})[stage.name] = dict(stage.stats, workers=stage.workers)
+    detail_stage = enrich_stage = None
+
+async def detail_record(context, url, card, city):
+    # record without email: from the feed card, or from the detail page
+    if card and not missing_fields(card):
+        metrics.count("from_card", stage="detail", city=city)
+        return record_from_card(card, city)
+    return await detail_stage.process((context, url, city))
+
+async def enrich_record(record, city):
+    if record and record[3] != "NA":
+        record[4] = await enrich_stage.process((record[3], city))
+    return record
+
+async def enrich_city(city_index, city, places, records):
+    """
+    Second half of a city, once scrape_city has given back SEM and its
+    browser context: the email of every record, each record going to the
+    sink as soon as it is complete. places is [(category, url, card)] and
+    records the detail results for them. Returns (city, {category: [record, ...]}).
+    """
+    tasks = [
+        emit(city_index, city, place_key(url),
+             enrich_record(None if isinstance(record, Exception) else record, city),
+             category, card_hash(card))
+        for (category, url, card), record in zip(places, records)
+    ]
+    results = {}
+    for (category, url, _), data in zip(places, await asyncio.gather(*tasks, return_exceptions=True)):
+        if data and not isinstance(data, Exception):
+            results.setdefault(category, []).append(data)
+        elif seen_places is not None:
+            seen_places.release(url)
+    return city, results
+
+async def emit(city_index, city, key, coro, category=None, card=None):
+    # Records go to the sink the moment they are produced, not per batch
+    data = await coro
+    metrics.count("records" if data else "failed", stage="emit", city=city)
+    if data and sink is not None:
+        # Journaled once the sink has fsynced the record: only then may a
+        # restart skip this place
+        done = None
+        if journal is not None and city_index is not None:
+            done = lambda j=journal: j.place_done(city_index, key)
+        await sink.put(TARGET_STATE_CODE, city, data, category, key, card, on_durable=done)
+    return data
+
+async def city_finished(city_index):
+    # Only for a city that did not raise. With the sink the entry follows its
+    # records' fsync; without it, call once the batch workbook is written.
+    if journal is None or city_index is None:
+        return
+    if sink is not None:
+        await sink.after_durable(lambda j=journal: j.city_done(city_index))
+    else:
+        journal.city_done(city_index)
+
+# ---------------- PAGE POOL ----------------
+page_pool = None  # PagePool, one per browser (see open_page_pool)
+
+def open_page_pool(browser):
+    global page_pool
+    if USE_PAGE_POOL:
+        page_pool = PagePool(browser, CONTEXT_OPTIONS, setup_page=setup_page)
+
+async def close_page_pool(tag=""):
+    global page_pool
+    if page_pool is not None:
+        print(f"[📄] {tag}{page_pool.report()}")
+        # a recycled browser had pools of its own: the report sums them
+        prior = metrics.info.get("page_pool", {})
+        metrics.info["page_pool"] = {k: prior.get(k, 0) + v for k, v in page_pool.stats.items()}
+        await page_pool.close()
+        page_pool = None
+
+# ---------------- BROWSER ----------------
+watchdog = None  # MemoryWatchdog, one per process (see open_browser)
+
+async def open_browser(p):
+    """
+    Launches Chromium behind a BrowserRecycler: over MEMORY_BUDGET_MB the
+    cities in flight finish, the browser (and its page pool) is closed and
+    launched again with BROWSER_ARGS, then waiting cities carry on.
+    """
+    global watchdog
+    watchdog = MemoryWatchdog(MEMORY_BUDGET_MB, MEMORY_SAMPLE_SECONDS)
+    browsers = BrowserRecycler(
+        lambda: p.chromium.launch(headless=True, args=BROWSER_ARGS),
+        watchdog, on_open=open_page_pool, on_close=close_page_pool
+    )
+    await browsers.start()
+    return browsers
+
+async def close_browser(browsers, tag=""):
+    global watchdog
+    await close_page_pool(tag)
+    await browsers.close()
+    if watchdog is not None:
+        print(f"[♻] {tag}{watchdog.report()}")
+        metrics.info["memory"] = watchdog.summary()
+        watchdog = None
+
+@asynccontextmanager
+async def city_context(browsers):
+    # the recycler holds a city here while it relaunches the browser
+    async with browsers.use() as browser:
+        if page_pool is not None:
+            async with page_pool.context() as context:
+                yield context
+            return
+
+        context = await browser.new_context(**CONTEXT_OPTIONS)
         try:
-            return await scrape_business_details(page, session, url)
+            yield context
         finally:
-            await page.close()
+            await context.close()
+
+@asynccontextmanager
+async def business_page(context):
+    # page_acquire is timed on both paths so pooled vs new_page() can be compared
+    start = time.perf_counter()
+    if page_pool is not None:
+        async with page_pool.page(context) as page:
+            waits.record("page_acquire", time.perf_counter() - start)
+            yield page
+        return
+
+    page = await context.new_page()
+    await setup_page(page)
+    waits.record("page_acquire", time.perf_counter() - start)
+    try:
+        yield page
+    finally:
+        await page.close()
 
 # ---------------- CITY SCRAPER ----------------
-async def scrape_city(browser, session, city, state, city_lat, city_lng):
-    async with SEM:
-        context = await browser.new_context(
-            locale="en-US",
-            timezone_id="America/New_York"
-        )
-        # Block resources at context level for better performance
-        await context.route("**/*", block_resources)
-        page = await context.new_page()
+term_overlap = TermOverlap()  # place keys per search term, reported at the end
 
-        all_links = set()
-        results = []
+async def find_city_places(page, query, city, search_url=None):
+    """
+    Search + scroll on one query's search page (or search_url, a viewport
+    search). Returns (all_links, cards, scroll).
+    """
+    all_links = set()
 
-        search_url = BASE_URL + f"Hair Salon in {city}, {state}, USA".replace(" ", "+")
-        print(f"[+] {city}")
+    search_url = search_url or BASE_URL + query.replace(" ", "+")
+    print(f"[+] {query}")
 
+    step_times = {}
+    start = time.perf_counter()
+    async with waits.timed("search", step_times, city) as step:
         try:
-            await page.goto(search_url, timeout=45000)  # Reduced
-            await page.wait_for_timeout(3000)  # Reduced
-            await scroll_results_feed(page)
+            await page.goto(search_url, timeout=45000, wait_until="domcontentloaded")  # Reduced
+        except Exception:
+            observe("city", time.perf_counter() - start, timeout=True)
+            raise
+        found = await waits.wait_for_results(page)
+        if not found:
+            step["outcome"] = "timeout"
+    observe("city", step_times["search"], timeout=not found, blocked=looks_blocked(page.url))
+    async with waits.timed("scroll", step_times, city) as step:
+        scroll = await scroll_results_feed(page)
+        if not scroll:
+            step["outcome"] = "NA"  # no feed: single place or nothing found
+
+    if scroll:
+        print(
+            f"[⏱] {city}: search {step_times['search']:.1f}s | scroll {step_times['scroll']:.1f}s "
+            f"({scroll['steps']} steps, {scroll['cards']} cards{', end of list' if scroll['ended'] else ''})"
+        )
 
-            links = await page.query_selector_all("a[href*='/maps/place']")
-            for link in links:
-                href = await link.get_attribute("href")
-                if href:
-                    all_links.add(href)
+    cards = {}
+    if FEED_HARVEST:
+        cards = {card["url"]: card for card in await harvest_feed(page)}
+        all_links.update(cards)
+    else:
+        all_links.update(await feed_links(page))
+
+    return all_links, cards, scroll
+
+async def find_tiled_places(context, term, city, city_lat, city_lng, searched):
+    """
+    Viewport searches for `term` over the tiles around the city: a tile
+    whose feed is saturated is replaced by its four children, tiles already
+    covered by a neighbour are skipped, and tiles this city covered in an
+    earlier attempt give back the links they returned then. Tiles searched
+    now are added to `searched` (rolled back if the city fails).
+    Returns (all_links, cards).
+    """
+    all_links, cards = set(), {}
+    pending = root_cells(city_lat, city_lng)
+
+    while pending:
+        tile = pending.pop(0)
+        stored = tile_coverage.stored(term, tile, city)
+        if stored is not None:
+            status, links, tile_cards = stored
+            if status == "split":
+                pending.extend(tile.children())
+            all_links.update(links)
+            cards.update(tile_cards)
+            continue
+        if tile_coverage.status(term, tile) == "split":
+            pending.extend(tile.children())
+            continue
+        if not tile_coverage.begin(term, tile):
+            continue
 
-            tasks = [scrape_one_business(context, session, url) for url in all_links]
-            biz_results = await asyncio.gather(*tasks, return_exceptions=True)  # Don't fail on errors
+        try:
+            async with business_page(context) as page:
+                links, tile_cards, scroll = await find_city_places(
+                    page, f"{term} @ tile {tile.key}", city, tile.search_url(BASE_URL, term)
+                )
+        except Exception:
+            tile_coverage.abort(term, tile)
+            raise
+
+        children = tile_coverage.finish(term, tile, scroll, city, links, tile_cards)
+        searched.append((term, tile))
+        metrics.count("tiles", stage="search", city=city)
+        if children:
+            metrics.count("tile_splits", stage="search", city=city)
+            pending.extend(children)
+        all_links.update(links)
+        cards.update(tile_cards)
+
+    return all_links, cards
+
+async def scrape_city(browsers, session, city, state, city_lat, city_lng, city_index=None, raise_errors=False):
+    """
+    Runs every SEARCH_JOBS term for the city in one context, then its
+    detail pages. Returns (city, enriched) as soon as SEM and the context
+    are free again: enriched is the task fetching the emails (enrich_city),
+    its result is (city, {category: [record, ...]}). With raise_errors a
+    failed city raises instead of returning what it has (job queue retries it).
+    """
+    places, records = [], []
+    async with SEM:
+        searched_tiles = []
 
-            for data in biz_results:
-                if data and not isinstance(data, Exception):
-                    results.append(data)
+        try:
+            async with city_context(browsers) as context:
+                # One entry per place across all terms (first job wins); skip
+                # places the journal says are already stored (resumed city)
+                by_key = {}
+                cards = {}
+                tiles = tile_coverage is not None and root_cells(city_lat, city_lng)
+                for category, term, query in build_search_terms(city, state, SEARCH_JOBS):
+                    if tiles:
+                        links, term_cards = await find_tiled_places(
+                            context, term, city, city_lat, city_lng, searched_tiles
+                        )
+                    else:
+                        # Search page goes back to the pool before business pages are needed
+                        async with business_page(context) as page:
+                            links, term_cards, _ = await find_city_places(page, query, city)
+
+                    keys = {place_key(url): url for url in links}
+                    term_overlap.add(f"{category}: {term}", keys)
+                    cards.update(term_cards)
+                    for key, url in keys.items():
+                        if journal is not None and journal.is_place_done(city_index, key):
+                            continue
+                        by_key.setdefault(key, (category, url))
+
+                # Refresh: stored places are skipped unless expired or their card changed
+                if refresh_index is not None:
+                    by_key = {
+                        key: (cat, url) for key, (cat, url) in by_key.items()
+                        if refresh_index.needs_visit(key, cards.get(url))
+                    }
+
+                # Places already claimed by another city become cross-reference
+                # rows in the dedupe store instead of another detail-page load
+                if seen_places is not None:
+                    places = [(cat, url, cards.get(url)) for cat, url in by_key.values()
+                              if seen_places.claim(url, state, city) is None]
+                else:
+                    places = [(cat, url, cards.get(url)) for cat, url in by_key.values()]
+
+                if cards:
+                    detail = sum(1 for _, _, card in places if card is None or missing_fields(card))
+                    print(f"    {city}: {len(places)} places, {detail} detail page(s)")
+
+                records = await asyncio.gather(  # Don't fail on errors
+                    *(detail_record(context, url, card, city) for _, url, card in places),
+                    return_exceptions=True
+                )
 
         except Exception as e:
             print(f"[!] {city} failed: {str(e)[:50]}")
-        finally:
-            await context.close()
+            # its places may not be stored: the next city or run searches those tiles again
+            if tile_coverage is not None and searched_tiles:
+                tile_coverage.rollback(searched_tiles)
+            if raise_errors:
+                raise
+            places, records = [], []
 
-        return city, results
+    return city, asyncio.create_task(enrich_city(city_index, city, places, records))
 
 # ---------------- EXPORT ----------------
-def export_batch_to_excel(state_code, state_name, city_results, batch_num=None):
+def category_dir(category):
+    # a single job keeps the old layout; combine.py reads the category folders too
+    if len(SEARCH_JOBS) == 1:
+        return OUTPUT_DIR
+    path = os.path.join(OUTPUT_DIR, category_slug(category))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def attribute(state_code, city_results):
+    # one vectorized nearest-city query for the whole batch
+    city_results, stats = geo.regroup(city_results, geo.state_index(state_code))
+    print(f"[📍] {geo.summary(stats)}")
+    return city_results
+
+def export_batch_to_excel(state_code, state_name, city_results, batch_num=None, output_dir=None):
+    import pandas as pd
+
+    start = time.perf_counter()
+    if GEO_ATTRIBUTION:
+        city_results = attribute(state_code, city_results)
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     batch_suffix = f"_batch{batch_num}" if batch_num else ""
     file_path = os.path.join(
-        OUTPUT_DIR,
+        output_dir or OUTPUT_DIR,
         f"{state_code}_{state_name.replace(' ', '_')}{batch_suffix}_{timestamp}.xlsx"
     )
 
@@ -282,28 +742,60 @@ def export_batch_to_excel(state_code, state_name, city_results, batch_num=None):
             sheet_name = city[:31]
             df.to_excel(writer, sheet_name=sheet_name, index=False)
 
+    waits.record("export", time.perf_counter() - start)
     print(f"[✓] Batch {batch_num} saved")
     return file_path
 
+def export_batch(state_code, state_name, city_results, batch_num=None):
+    """
+    city_results: {city: {category: [record, ...]}}; one workbook per category.
+    """
+    for job in SEARCH_JOBS:
+        category = job["category"]
+        data = {city: by_cat.get(category, []) for city, by_cat in city_results.items()}
+        if any(data.values()):
+            export_batch_to_excel(state_code, state_name, data, batch_num, category_dir(category))
+
+def export_from_sink(state_code, state_name, worker_id=None, compact=None):
+    """
+    Workbook(s) from the state's sink files, then compaction: every file
+    when all writers are done (worker_id None), else only this worker's
+    own file (queue workers on other hosts may still be appending).
+    Also behind `python record_sink.py <STATE>`, without compaction.
+    """
+    start = time.perf_counter()
+    regroup = (lambda city_results: attribute(state_code, city_results)) if GEO_ATTRIBUTION else None
+    if len(SEARCH_JOBS) == 1:
+        record_sink.export_excel(state_code, state_name, OUTPUT_DIR, regroup=regroup)
+    else:
+        for job in SEARCH_JOBS:
+            record_sink.export_excel(state_code, state_name, category_dir(job["category"]), job["category"], regroup)
+    waits.record("export", time.perf_counter() - start)
+
+    if compact is None:
+        compact = record_sink.COMPACT_AFTER_EXPORT
+    if compact:
+        path = record_sink.sink_path(state_code, worker_id) if worker_id is not None else None
+        before, after = record_sink.compact(state_code, path)
+        print(f"[💾] Sink compacted: {before} -> {after} records")
+
 # ---------------- MAIN ----------------
 async def main():
+    from playwright.async_api import async_playwright
+
+    run_start = time.perf_counter()
+
     async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--no-sandbox",
-                "--disable-dev-shm-usage",
-                "--disable-gpu",
-                "--disable-software-rasterizer",
-                "--disable-extensions"
-            ]
-        )
+        browsers = await open_browser(p)
+
+        open_stores()
+        start_controller()
+        start_instrumentation()
 
-        # Increased connector limit for more concurrent connections
-        connector = aiohttp.TCPConnector(limit=50, limit_per_host=10)
+        connector = make_connector()
         async with aiohttp.ClientSession(connector=connector) as session:
-            state_df = cities_df[cities_df["State Code"] == TARGET_STATE_CODE].reset_index(drop=True)
+            open_stages(session)
+            state_df = catalog.load_state(TARGET_STATE_CODE)
             state_name = state_df["State"].iloc[0]
             
             total_cities = len(state_df)
@@ -315,52 +807,88 @@ async def main():
             batch_num = (START_FROM_INDEX // BATCH_SIZE) + 1
             
             # Process all cities with periodic batch saves
-            pending = set()
-            results_queue = []
+            discovering = {}  # scrape_city task -> city index
+            enriching = {}    # enrich_city task -> city index
 
-            city_iter = state_df.iloc[START_FROM_INDEX:].iterrows()
-
-            # Prime the pool with up to SEM limit
-            for _ in range(SEM._value):
-                try:
-                    _, row = next(city_iter)
-                except StopIteration:
-                    break
-
-                task = asyncio.create_task(
-                    scrape_city(
-                        browser, session,
-                        row["City"], state_name,
-                        row["Latitude"], row["Longitude"]
+            # Resume: the journal knows exactly which cities are done
+            todo = [
+                (index, row) for index, row in state_df.iloc[START_FROM_INDEX:].iterrows()
+                if journal is None or not journal.is_city_done(index)
+            ]
+            if MAX_CITIES is not None:
+                todo = todo[:MAX_CITIES]
+            if journal is not None:
+                print(f"[↺] Journal: {len(journal.done_cities)} cities done, {len(todo)} to go\n")
+            city_iter = iter(todo)
+
+            def schedule():
+                # Up to the SEM ceiling in search/detail (SEM itself gates how many
+                # run), while no more than ENRICH_CITIES wait on their websites
+                while len(discovering) < SEM.maximum and len(enriching) < ENRICH_CITIES:
+                    try:
+                        index, row = next(city_iter)
+                    except StopIteration:
+                        return
+
+                    task = asyncio.create_task(
+                        scrape_city(
+                            browsers, session,
+                            row["City"], state_name,
+                            row["Latitude"], row["Longitude"],
+                            index, raise_errors=True
+                        )
                     )
-                )
-                pending.add(task)
+                    discovering[task] = index
+
+            schedule()
 
             completed = 0
             all_city_data = {}
+            batch_indices = []
 
-            while pending:
-                done, pending = await asyncio.wait(
-                    pending, return_when=asyncio.FIRST_COMPLETED
+            while discovering or enriching:
+                done, _ = await asyncio.wait(
+                    [*discovering, *enriching], return_when=asyncio.FIRST_COMPLETED
                 )
 
                 for task in done:
-                    result = await task
-                    if result and not isinstance(result, Exception):
+                    # a failed city raised: it is not journaled, so the next run retries it
+                    failed = task.cancelled() or task.exception() is not None
+                    if task in discovering:
+                        index = discovering.pop(task)
+                        if not failed:
+                            _, enriched = task.result()
+                            enriching[enriched] = index
+                        continue
+
+                    index = enriching.pop(task)
+                    result = None if failed else task.result()
+                    if result:
                         city, data = result
-                        all_city_data[city] = data
                         completed += 1
 
+                        if sink is not None:
+                            # Records are already in the sink; batches only checkpoint progress
+                            await city_finished(index)
+                            if completed % BATCH_SIZE == 0:
+                                save_progress(TARGET_STATE_CODE, START_FROM_INDEX + completed - 1)
+                        else:
+                            all_city_data[city] = data
+                            batch_indices.append(index)
+
                         # ---- SAVE BATCH (unchanged logic) ----
-                        if completed % BATCH_SIZE == 0:
+                        if sink is None and completed % BATCH_SIZE == 0:
                             print(f"\n[💾] Saving batch {batch_num}")
                             batch_cities = list(all_city_data.keys())[-BATCH_SIZE:]
                             batch_data = {c: all_city_data[c] for c in batch_cities}
 
-                            export_batch_to_excel(
+                            export_batch(
                                 TARGET_STATE_CODE, state_name, batch_data, batch_num
                             )
                             save_progress(TARGET_STATE_CODE, START_FROM_INDEX + completed - 1)
+                            for i in batch_indices:
+                                await city_finished(i)
+                            batch_indices = []
 
                             for c in batch_cities:
                                 del all_city_data[c]
@@ -369,35 +897,420 @@ async def main():
                             gc.collect()
                             batch_num += 1
 
-                    # ---- Schedule NEXT city immediately ----
-                    try:
-                        _, row = next(city_iter)
-                        new_task = asyncio.create_task(
-                            scrape_city(
-                                browser, session,
-                                row["City"], state_name,
-                                row["Latitude"], row["Longitude"]
-                            )
-                        )
-                        pending.add(new_task)
-                    except StopIteration:
-                        pass
+                # ---- Schedule NEXT cities immediately ----
+                schedule()
 
             
             # Save remaining cities
             if all_city_data:
                 print(f"\n[💾] Saving final batch {batch_num} ({len(all_city_data)} cities)")
-                export_batch_to_excel(TARGET_STATE_CODE, state_name, all_city_data, batch_num)
-                save_progress(TARGET_STATE_CODE, START_FROM_INDEX + completed - 1)
-
-            await browser.close()
+                export_batch(TARGET_STATE_CODE, state_name, all_city_data, batch_num)
+                for i in batch_indices:
+                    await city_finished(i)
+            save_progress(TARGET_STATE_CODE, START_FROM_INDEX + completed - 1)
+
+            await close_stages()
+            await stop_controller()
+            await close_browser(browsers)
+            close_stores()
+            if USE_RECORD_SINK:
+                # Separate step, after the loop: no page or request waits on openpyxl
+                export_from_sink(TARGET_STATE_CODE, state_name)
+            await stop_instrumentation()
+            print(f"[⏱] Step timings:\n{waits.summary()}")
+            navigations = waits.timings.get("goto", [0])[0]
+            print(f"[⏱] {navigations} detail navigations, {navigations / (time.perf_counter() - run_start):.2f}/s")
+            if CRAWL_CONTACT_PAGES:
+                print(f"[📧] {contact_crawler.summary()}")
             print(f"\n{'='*60}")
             print(f"[✓] COMPLETE!")
             print(f"{'='*60}\n")
 
+# ---------------- WORKER CONFIG ----------------
+# Modules whose CONFIG a spawned worker must see as the parent set it at run
+# time (bench paths, BASE_URL, MAX_CITIES, ...): spawn re-imports them fresh
+CONFIG_MODULES = (
+    "email_extractor", "contact_crawler", "email_cache", "place_dedupe", "journal",
+    "feed_harvest", "place_extract", "waits", "metrics", "page_pool", "request_block",
+    "memory_watchdog", "concurrency", "pipeline", "search_jobs", "job_queue", "refresh",
+    "geo_tiles", "geo", "record_sink",
+)
+CONFIG_TYPES = (str, int, float, bool, type(None), list, tuple, dict, set)
+
+def _settings(namespace):
+    return {
+        name: value for name, value in namespace.items()
+        if name.isupper() and not name.startswith("_") and isinstance(value, CONFIG_TYPES)
+    }
+
+def worker_config():
+    """
+    {module: {NAME: value}} of the plain module-level settings of this
+    module and CONFIG_MODULES, for a spawned worker to apply_config().
+    """
+    config = {None: _settings(globals())}
+    for name in CONFIG_MODULES:
+        config[name] = _settings(vars(importlib.import_module(name)))
+    return config
+
+def apply_config(config):
+    for name, settings in config.items():
+        namespace = globals() if name is None else vars(importlib.import_module(name))
+        namespace.update(settings)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+# ---------------- MULTI-PROCESS SHARDING ----------------
+async def shard_worker(worker_id, city_queue, result_queue, state_name):
+    """
+    One worker process: own browser + aiohttp session, pulls cities from the
+    shared queue until it sees a None sentinel, pushes (index, city, data) back.
+    """
+    from playwright.async_api import async_playwright
+
+    loop = asyncio.get_running_loop()
+
+    async with async_playwright() as p:
+        browsers = await open_browser(p)
+        open_stores(worker_id)
+        start_controller(worker_id)
+        start_instrumentation(worker_id)
+        connector = make_connector()
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            open_stages(session)
+            enrich_slots = asyncio.Semaphore(ENRICH_CITIES)
+            finishing = set()
+
+            async def finish(index, city, enriched):
+                # the drain is already on its next city while this one's emails are fetched
+                try:
+                    city, data = await enriched
+                    if sink is not None:
+                        await city_finished(index)
+                except Exception as e:
+                    print(f"[!] W{worker_id} {city} failed: {str(e)[:50]}")
+                    data = None
+                finally:
+                    enrich_slots.release()
+                # With the sink the records are already in this worker's sink file
+                result_queue.put((index, city, {} if sink is not None and data is not None else data))
+
+            async def drain():
+                while True:
+                    await enrich_slots.acquire()
+                    # mp.Queue.get blocks, keep it off the event loop
+                    item = await loop.run_in_executor(None, city_queue.get)
+                    if item is None:
+                        enrich_slots.release()
+                        return
+
+                    index, city, city_lat, city_lng = item
+                    try:
+                        city, enriched = await scrape_city(
+                            browsers, session, city, state_name, city_lat, city_lng, index, raise_errors=True
+                        )
+                    except Exception as e:
+                        print(f"[!] W{worker_id} {city} failed: {str(e)[:50]}")
+                        enrich_slots.release()
+                        # not journaled anywhere: the next run retries the city
+                        result_queue.put((index, city, None))
+                        continue
+                    task = asyncio.create_task(finish(index, city, enriched))
+                    finishing.add(task)
+                    task.add_done_callback(finishing.discard)
+
+            # Same per-process city concurrency as the single-process mode
+            await asyncio.gather(*(drain() for _ in range(SEM.maximum)))
+            await asyncio.gather(*list(finishing))
+            await close_stages(f"W{worker_id} ")
+
+        await stop_controller(f"W{worker_id} ")
+        await close_browser(browsers, f"W{worker_id} ")
+        close_stores(f"W{worker_id} ")
+        await stop_instrumentation(worker_id, f"W{worker_id} ")
+        if CRAWL_CONTACT_PAGES:
+            print(f"[📧] W{worker_id} {contact_crawler.summary()}")
+
+def _shard_process(worker_id, city_queue, result_queue, state_name, config):
+    apply_config(config)  # spawned workers do not see the parent's settings or flags
+    try:
+        with metrics.profiled(metrics.profile_path(TARGET_STATE_CODE, worker_id), PROFILE):
+            asyncio.run(shard_worker(worker_id, city_queue, result_queue, state_name))
+    finally:
+        result_queue.put(None)  # tell the aggregator this worker is done
+
+def run_sharded(workers=WORKERS):
+    """
+    Starts `workers` processes that share one city queue. This process is the
+    only one that writes batch workbooks and progress.
+    """
+    state_df = catalog.load_state(TARGET_STATE_CODE)
+    state_name = state_df["State"].iloc[0]
+
+    total_cities = len(state_df)
+    print(f"\n{'='*60}")
+    print(f"STATE: {state_name} ({TARGET_STATE_CODE})")
+    print(f"Cities: {total_cities} | Batch: {BATCH_SIZE} | Start: {START_FROM_INDEX} | Workers: {workers}")
+    print(f"{'='*60}\n")
+
+    ctx = mp.get_context("spawn")
+    city_queue = ctx.Queue()
+    result_queue = ctx.Queue()
+
+    # Without the sink this process owns the city journal (cities count as
+    # done once their batch workbook is written); workers journal places.
+    city_journal = Journal(TARGET_STATE_CODE) if USE_JOURNAL and not REFRESH else None
+    queued = 0
+    for index, row in state_df.iloc[START_FROM_INDEX:].iterrows():
+        if city_journal is not None and city_journal.is_city_done(index):
+            continue
+        if MAX_CITIES is not None and queued >= MAX_CITIES:
+            break
+        city_queue.put((index, row["City"], float(row["Latitude"]), float(row["Longitude"])))
+        queued += 1
+    if city_journal is not None:
+        print(f"[↺] Journal: {len(city_journal.done_cities)} cities done, {queued} to go\n")
+    if USE_RECORD_SINK and city_journal is not None:
+        # workers write city entries themselves
+        city_journal.close()
+        city_journal = None
+    for _ in range(workers * SEM.maximum):
+        city_queue.put(None)
+
+    config = worker_config()
+    procs = [
+        ctx.Process(
+            target=_shard_process,
+            args=(i, city_queue, result_queue, state_name, config)
+        )
+        for i in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+
+    batch_num = (START_FROM_INDEX // BATCH_SIZE) + 1
+    all_city_data = {}
+    batch_indices = []
+    completed = 0
+    failed = 0
+    finished = 0
+
+    while finished < workers:
+        try:
+            item = result_queue.get(timeout=5)
+        except queue.Empty:
+            # A worker killed hard never sends its sentinel
+            if not any(proc.is_alive() for proc in procs):
+                break
+            continue
+
+        if item is None:
+            finished += 1
+            continue
+
+        index, city, data = item
+        if data is None:
+            failed += 1
+            continue
+        completed += 1
+
+        if USE_RECORD_SINK:
+            if completed % BATCH_SIZE == 0:
+                save_progress(TARGET_STATE_CODE, START_FROM_INDEX + completed - 1)
+            continue
+
+        all_city_data[city] = data
+        batch_indices.append(index)
+        if len(all_city_data) >= BATCH_SIZE:
+            print(f"\n[💾] Saving batch {batch_num}")
+            export_batch(TARGET_STATE_CODE, state_name, all_city_data, batch_num)
+            save_progress(TARGET_STATE_CODE, START_FROM_INDEX + completed - 1)
+            if city_journal is not None:
+                for i in batch_indices:
+                    city_journal.city_done(i)
+            all_city_data = {}
+            batch_indices = []
+            batch_num += 1
+
+    if all_city_data:
+        print(f"\n[💾] Saving final batch {batch_num} ({len(all_city_data)} cities)")
+        export_batch(TARGET_STATE_CODE, state_name, all_city_data, batch_num)
+        if city_journal is not None:
+            for i in batch_indices:
+                city_journal.city_done(i)
+    save_progress(TARGET_STATE_CODE, START_FROM_INDEX + completed - 1)
+    if city_journal is not None:
+        city_journal.compact()
+        city_journal.close()
+
+    for proc in procs:
+        proc.join()
+
+    if USE_RECORD_SINK:
+        export_from_sink(TARGET_STATE_CODE, state_name)
+
+    print(f"\n{'='*60}")
+    print(f"[✓] COMPLETE! ({completed} cities, {failed} failed, {workers} workers)")
+    print(f"{'='*60}\n")
+
+# ---------------- JOB QUEUE WORKER ----------------
+def worker_name():
+    # unique per host and process; also names this worker's sink / journal files
+    return f"{re.sub(r'[^A-Za-z0-9_-]', '_', socket.gethostname())}-{os.getpid()}"
+
+def open_state(state_code, name):
+    global TARGET_STATE_CODE
+    TARGET_STATE_CODE = state_code
+    open_stores(name)
+
+def finish_state(state, name):
+    # stores are per state (journal, sink file); export what this host has
+    if state is None:
+        return
+    close_stores(f"{name} {state[0]} ")
+    if USE_RECORD_SINK:
+        export_from_sink(*state, name)
+
+async def queue_worker(name=None):
+    """
+    Claims cities from the job queue (one state at a time, up to
+    SEM.maximum in flight), heartbeats their leases, completes or fails
+    them, and exits when the queue has nothing left unfinished.
+    """
+    from playwright.async_api import async_playwright
+
+    name = name or worker_name()
+    jobs = JobQueue(QUEUE_DB)
+    held = {}           # job id -> (job, task)
+    discovering = set() # job ids still in search / detail pages (holding SEM)
+    state = None        # (state_code, state_name) whose stores are open
+
+    async def run_job(job):
+        # the lease covers the whole city: search, detail pages and emails
+        try:
+            city, enriched = await scrape_city(browsers, session, job["city"], job["state_name"],
+                                               job["lat"], job["lng"], job["city_index"], raise_errors=True)
+        finally:
+            discovering.discard(job["id"])
+        return await enriched
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(jobs.lease_seconds / 3)
+            for job_id in jobs.heartbeat(name, list(held)):
+                job, task = held[job_id]
+                print(f"[!] {name} lost the lease on {job['city']}, {job['state_code']}; stopping it")
+                task.cancel()
+
+    async with async_playwright() as p:
+        browsers = await open_browser(p)
+        start_controller(name)
+        start_instrumentation(name)
+        connector = make_connector()
+
+        async with aiohttp.ClientSession(connector=connector) as session:
+            open_stages(session)
+            beat = asyncio.create_task(heartbeat())
+            print(f"[+] Queue worker {name} | {jobs.report()}")
+
+            try:
+                while True:
+                    # a city waiting on its websites no longer holds SEM
+                    free = min(SEM.maximum - len(discovering), ENRICH_CITIES - len(held))
+                    if free > 0:
+                        # stay on the open state while cities of it are in flight
+                        claimed = jobs.claim(name, free, state[0] if held else None)
+                        if claimed and (state is None or claimed[0]["state_code"] != state[0]):
+                            finish_state(state, name)
+                            state = (claimed[0]["state_code"], claimed[0]["state_name"])
+                            open_state(state[0], name)
+                        for job in claimed:
+                            discovering.add(job["id"])
+                            task = asyncio.create_task(asyncio.wait_for(run_job(job), JOB_TIMEOUT))
+                            held[job["id"]] = (job, task)
+
+                    if not held:
+                        if jobs.unfinished() == 0:
+                            break
+                        await asyncio.sleep(QUEUE_POLL_SECONDS)  # leases held elsewhere may still expire
+                        continue
+
+                    done, _ = await asyncio.wait(
+                        [task for _, task in held.values()],
+                        timeout=QUEUE_POLL_SECONDS, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for job_id, (job, task) in list(held.items()):
+                        if task not in done:
+                            continue
+                        del held[job_id]
+                        if task.cancelled():
+                            continue  # lease lost, someone else owns the city now
+
+                        error = task.exception()
+                        if error is not None:
+                            jobs.fail(job_id, name, repr(error))
+                            print(f"[!] {job['city']}, {job['state_code']} failed (attempt {job['attempts']})")
+                            continue
+
+                        city, data = task.result()
+                        if sink is None:
+                            export_batch(job["state_code"], job["state_name"], {city: data})
+                        await city_finished(job["city_index"])
+                        if sink is not None:
+                            await sink.durable()  # the queue must not call a city done before its records are
+                        jobs.complete(job_id, name, sum(len(records) for records in data.values()))
+            finally:
+                beat.cancel()
+                # whatever is still in flight goes back to the queue untouched
+                jobs.release(name, list(held))
+                for _, task in held.values():
+                    task.cancel()
+                await asyncio.gather(beat, *(task for _, task in held.values()), return_exceptions=True)
+
+                await close_stages(f"{name} ")
+                print(f"[🗄] {jobs.report()}")
+                jobs.close()
+
+        await stop_controller(f"{name} ")
+        await close_browser(browsers, f"{name} ")
+        finish_state(state, name)
+        await stop_instrumentation(name, f"{name} ")
+
+def _queue_process(config=None):
+    if config is not None:
+        apply_config(config)
+    with metrics.profiled(metrics.profile_path("queue", os.getpid()), PROFILE):
+        asyncio.run(queue_worker())
+
+def run_queue_workers(workers=WORKERS):
+    """
+    `workers` queue worker processes on this host; start the same command on
+    other hosts that share QUEUE_DB to scale out.
+    """
+    ctx = mp.get_context("spawn")
+    config = worker_config()
+    procs = [ctx.Process(target=_queue_process, args=(config,)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+
 if __name__ == "__main__":
+    # python main2.py [--profile] [--queue] [--refresh]
+    PROFILE = PROFILE or "--profile" in sys.argv[1:]
+    REFRESH = REFRESH or "--refresh" in sys.argv[1:]
+
     start_time = time.perf_counter()
-    asyncio.run(main())
+    if "--queue" in sys.argv[1:]:
+        if WORKERS > 1:
+            run_queue_workers(WORKERS)
+        else:
+            _queue_process()
+    elif WORKERS > 1:
+        run_sharded(WORKERS)
+    else:
+        with metrics.profiled(metrics.profile_path(TARGET_STATE_CODE), PROFILE):
+            asyncio.run(main())
     elapsed = time.perf_counter() - start_time
     
     print(f"\n⏱ Total: {elapsed:.2f}s ({elapsed/60:.2f}m)")
@@ -0,0 +1,262 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+
+# ---------------- CONFIG ----------------
+BUDGET_MB = 4096            # Python + browser RSS that triggers a browser recycle (None = only sample)
+SAMPLE_SECONDS = 10.0       # seconds between RSS samples
+RECYCLE_COOLDOWN = 300.0    # seconds after a recycle before the next one may start
+LAUNCH_ATTEMPTS = 3         # relaunch tries before the recycler gives up
+MIN_BROWSER_SHARE = 0.25    # no recycle while the browser holds less than this share of the total
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# ---------------- RSS ----------------
+def _proc_rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        return 0.0  # exited meanwhile
+
+def _proc_children():
+    # ppid -> [pid] for every process /proc shows
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm may contain spaces and parentheses: ppid is the 2nd field after the last ")"
+        fields = stat[stat.rfind(")") + 2:].split()
+        if len(fields) > 1:
+            children.setdefault(int(fields[1]), []).append(int(name))
+    return children
+
+def tree_rss_mb(pid=None):
+    """
+    (own RSS, RSS of all descendants) in MB: this Python process, and the
+    Playwright driver plus the Chromium process tree it launched. Shared
+    pages count once per process, so the second figure runs a little high.
+    None for what cannot be read here.
+    """
+    pid = pid or os.getpid()
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        children = 0.0
+        for child in proc.children(recursive=True):
+            try:
+                children += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return proc.memory_info().rss / (1024 * 1024), children / (1024 * 1024)
+    except ImportError:
+        pass
+
+    if os.path.isdir("/proc"):
+        tree = _proc_children()
+        total, stack = 0.0, list(tree.get(pid, []))
+        while stack:
+            child = stack.pop()
+            total += _proc_rss_mb(child)
+            stack.extend(tree.get(child, []))
+        return _proc_rss_mb(pid), total
+
+    try:
+        import resource
+        # peak, not current, and no children: better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, None
+    except ImportError:
+        return None, None
+
+# ---------------- WATCHDOG ----------------
+class MemoryWatchdog:
+    """
+    Samples the RSS of this process and its browser tree every
+    SAMPLE_SECONDS, keeps the peaks, and says when a browser recycle would
+    bring the total back under budget. Recycle events are recorded here
+    for the run report.
+    """
+
+    def __init__(self, budget_mb=BUDGET_MB, every=SAMPLE_SECONDS, cooldown=RECYCLE_COOLDOWN,
+                 min_browser_share=MIN_BROWSER_SHARE):
+        self.budget_mb = budget_mb
+        self.min_browser_share = min_browser_share
+        self.every = every
+        self.cooldown = cooldown
+        self.last = None            # latest sample
+        self.peak = {"python_mb": 0.0, "browser_mb": 0.0, "total_mb": 0.0}
+        self.samples = 0
+        self.events = []            # one dict per browser recycle
+        self._last_recycle = None
+        self._task = None
+
+    def sample(self):
+        python_mb, browser_mb = tree_rss_mb()
+        self.last = {
+            "python_mb": round(python_mb or 0.0, 1),
+            "browser_mb": round(browser_mb or 0.0, 1),
+            "total_mb": round((python_mb or 0.0) + (browser_mb or 0.0), 1),
+        }
+        for key, value in self.last.items():
+            self.peak[key] = max(self.peak[key], value)
+        self.samples += 1
+        return self.last
+
+    def should_recycle(self):
+        """
+        The browser is over what the budget leaves it after Python's own
+        RSS, and not right after the last recycle. A relaunch only gives
+        back browser memory: when Python alone fills the budget, or the
+        browser is a small share of the total, it would cost a relaunch
+        every cooldown and free next to nothing.
+        """
+        if not self.budget_mb or self.last is None:
+            return False
+        if self._last_recycle is not None and time.monotonic() - self._last_recycle < self.cooldown:
+            return False
+        python_mb, browser_mb = self.last["python_mb"], self.last["browser_mb"]
+        browser_budget = self.budget_mb - python_mb
+        if browser_budget <= 0 or browser_mb < self.min_browser_share * self.last["total_mb"]:
+            return False
+        return browser_mb > browser_budget
+
+    def recycled(self, before, after, seconds, reason="budget"):
+        self._last_recycle = time.monotonic()
+        self.events.append({
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "reason": reason,
+            "before": before,
+            "after": after,
+            "seconds": round(seconds, 2),
+        })
+
+    # ---- sampling task ----
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.every)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.sample()
+
+    # ---- reporting ----
+    def summary(self):
+        return {
+            "budget_mb": self.budget_mb,
+            "samples": self.samples,
+            "peak": dict(self.peak),
+            "last": self.last,
+            "recycles": len(self.events),
+            "recycle_events": list(self.events),
+        }
+
+    def report(self):
+        p = self.peak
+        budget = f"{self.budget_mb} MB budget" if self.budget_mb else "no budget"
+        return (
+            f"memory peak {p['total_mb']:.0f} MB (python {p['python_mb']:.0f}, browser {p['browser_mb']:.0f}) | "
+            f"{budget} | {len(self.events)} browser recycle(s)"
+        )
+
+# ---------------- RECYCLER ----------------
+class BrowserRecycler:
+    """
+    Owns the browser of one process. Every city runs inside use(); when
+    the watchdog is over budget the gate closes, cities already in the
+    browser finish, and the browser is closed and launched again with the
+    same arguments. Cities that arrive meanwhile wait at the gate, so
+    nothing queued is dropped.
+    """
+
+    def __init__(self, launch, watchdog=None, on_open=None, on_close=None):
+        self.launch = launch        # async () -> Browser
+        self.watchdog = watchdog
+        self.on_open = on_open      # (browser) -> None, e.g. a page pool for it
+        self.on_close = on_close    # async () -> None, before the browser closes
+        self.browser = None
+        self.in_flight = 0
+        self.error = None
+        self._ready = asyncio.Event()
+        self._recycling = None      # task
+
+    async def start(self):
+        self.browser = await self.launch()
+        if self.on_open is not None:
+            self.on_open(self.browser)
+        if self.watchdog is not None:
+            self.watchdog.start()
+        self._ready.set()
+
+    @asynccontextmanager
+    async def use(self):
+        await self._ready.wait()
+        if self.error is not None:
+            raise self.error
+        self.in_flight += 1
+        try:
+            yield self.browser
+        finally:
+            self.in_flight -= 1
+            if self._ready.is_set() and self.watchdog is not None and self.watchdog.should_recycle():
+                last = self.watchdog.last
+                print(f"[♻] Memory {last['total_mb']:.0f} MB (browser {last['browser_mb']:.0f}) > "
+                      f"{self.watchdog.budget_mb} MB: "
+                      f"draining {self.in_flight} cities, then relaunching the browser")
+                self._ready.clear()
+            if not self._ready.is_set() and self.in_flight == 0 and self._recycling is None:
+                # own task: a cancelled or timed-out city must not cut the relaunch short
+                self._recycling = asyncio.create_task(self._recycle())
+
+    async def _recycle(self):
+        before = self.watchdog.sample()
+        start = time.perf_counter()
+        try:
+            if self.on_close is not None:
+                await self.on_close()
+            await self.browser.close()
+        except Exception as e:
+            print(f"[!] Closing the old browser failed: {str(e)[:50]}")
+
+        for attempt in range(1, LAUNCH_ATTEMPTS + 1):
+            try:
+                self.browser = await self.launch()
+                break
+            except Exception as e:
+                print(f"[!] Browser relaunch {attempt}/{LAUNCH_ATTEMPTS} failed: {str(e)[:50]}")
+                self.error = e
+        else:
+            self._ready.set()  # waiting cities fail with the launch error instead of hanging
+            self._recycling = None
+            return
+
+        self.error = None
+        if self.on_open is not None:
+            self.on_open(self.browser)
+        after = self.watchdog.sample()
+        seconds = time.perf_counter() - start
+        self.watchdog.recycled(before, after, seconds)
+        print(f"[♻] Browser relaunched in {seconds:.1f}s: {before['total_mb']:.0f} MB -> {after['total_mb']:.0f} MB")
+        self._recycling = None
+        self._ready.set()
+
+    async def close(self):
+        if self._recycling is not None:
+            await asyncio.gather(self._recycling, return_exceptions=True)
+        if self.watchdog is not None:
+            await self.watchdog.stop()
+        if self.browser is not None:
+            await self.browser.close()
+            self.browser = None
@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import asyncio
+import bisect
+from contextlib import contextmanager
+from datetime import datetime
+
+# ---------------- CONFIG ----------------
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)  # seconds, +Inf implied
+LOG_DIR = "logs"
+PROM_EVERY = 15.0           # seconds between Prometheus file rewrites
+PROM_CITY_LABELS = False    # per-city series in the .prom file (a state has hundreds of cities)
+LOOP_LAG_EVERY = 0.1        # seconds between event-loop lag probes (--profile)
+
+def report_path(state_code, worker_id=None):
+    suffix = f".w{worker_id}" if worker_id is not None else ""
+    stamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    return os.path.join(LOG_DIR, f"run_{state_code}{suffix}_{stamp}.json")
+
+def prom_path(worker_id=None):
+    suffix = f".w{worker_id}" if worker_id is not None else ""
+    return os.path.join(LOG_DIR, f"metrics{suffix}.prom")
+
+def profile_path(state_code, worker_id=None):
+    suffix = f".w{worker_id}" if worker_id is not None else ""
+    return os.path.join(LOG_DIR, f"profile_{state_code}{suffix}.pstats")
+
+# ---------------- STATE ----------------
+class _Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        # upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS + (self.max,), self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 3),
+            "avg_s": round(self.sum / self.count, 3) if self.count else 0.0,
+            "p50_s": round(self.quantile(0.5), 3),
+            "p90_s": round(self.quantile(0.9), 3),
+            "p95_s": round(self.quantile(0.95), 3),
+            "p99_s": round(self.quantile(0.99), 3),
+            "max_s": round(self.max, 3),
+        }
+
+# (stage, city) -> _Histogram ; (stage, city, outcome) -> n ; (name, stage, city) -> n
+histograms = {}
+outcomes = {}
+counters = {}
+info = {}       # free-form report sections (pool stats, final limits, ...)
+started = time.time()
+
+def reset():
+    global started
+    histograms.clear()
+    outcomes.clear()
+    counters.clear()
+    info.clear()
+    started = time.time()
+
+def observe(stage, seconds, city=None, outcome="ok"):
+    """
+    One timed event of `stage`; outcome is "ok", "timeout", "NA" or "error".
+    """
+    histograms.setdefault((stage, city), _Histogram()).add(seconds)
+    key = (stage, city, outcome)
+    outcomes[key] = outcomes.get(key, 0) + 1
+
+def count(name, value=1, stage=None, city=None):
+    key = (name, stage, city)
+    counters[key] = counters.get(key, 0) + value
+
+# ---------------- AGGREGATION ----------------
+def _by_stage():
+    stages = {}
+    for (stage, city), hist in histograms.items():
+        total = stages.setdefault(stage, _Histogram())
+        for i, n in enumerate(hist.buckets):
+            total.buckets[i] += n
+        total.count += hist.count
+        total.sum += hist.sum
+        total.max = max(total.max, hist.max)
+    return stages
+
+def _outcomes_by(level):
+    result = {}
+    for (stage, city, outcome), n in outcomes.items():
+        key = stage if level == "stage" else (city, stage)
+        bucket = result.setdefault(key, {})
+        bucket[outcome] = bucket.get(outcome, 0) + n
+    return result
+
+def pages_per_minute(stage="goto"):
+    minutes = max(time.time() - started, 1e-9) / 60
+    return sum(h.count for (s, _), h in histograms.items() if s == stage) / minutes
+
+def snapshot():
+    stage_outcomes = _outcomes_by("stage")
+    city_outcomes = _outcomes_by("city")
+
+    stages = {}
+    for stage, hist in sorted(_by_stage().items()):
+        stages[stage] = {**hist.to_dict(), "outcomes": stage_outcomes.get(stage, {})}
+
+    cities = {}
+    for (stage, city), hist in sorted(histograms.items(), key=lambda kv: (str(kv[0][1]), kv[0][0])):
+        if city is None:
+            continue
+        cities.setdefault(city, {})[stage] = {
+            **hist.to_dict(), "outcomes": city_outcomes.get((city, stage), {})
+        }
+
+    return {
+        "started": datetime.fromtimestamp(started).isoformat(),
+        "elapsed_s": round(time.time() - started, 1),
+        "pages_per_minute": round(pages_per_minute(), 2),
+        "stages": stages,
+        "cities": cities,
+        "counters": [
+            {"name": name, "stage": stage, "city": city, "value": value}
+            for (name, stage, city), value in sorted(counters.items(), key=str)
+        ],
+        **info,
+    }
+
+# ---------------- OUTPUT ----------------
+def write_report(path, extra=None):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    report = snapshot()
+    if extra:
+        report.update(extra)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(**labels):
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels.items() if v is not None]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def prometheus_text():
+    lines = [
+        "# HELP scraper_stage_seconds Latency of one scraper stage event",
+        "# TYPE scraper_stage_seconds histogram",
+    ]
+    series = histograms.items() if PROM_CITY_LABELS else (((s, None), h) for s, h in _by_stage().items())
+    for (stage, city), hist in series:
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), hist.buckets):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"scraper_stage_seconds_bucket{_labels(stage=stage, city=city, le=le)} {cumulative}")
+        lines.append(f"scraper_stage_seconds_sum{_labels(stage=stage, city=city)} {hist.sum:.6f}")
+        lines.append(f"scraper_stage_seconds_count{_labels(stage=stage, city=city)} {hist.count}")
+
+    lines += ["# HELP scraper_stage_outcomes_total Stage events by outcome",
+              "# TYPE scraper_stage_outcomes_total counter"]
+    merged = {}
+    for (stage, city, outcome), n in outcomes.items():
+        key = (stage, city if PROM_CITY_LABELS else None, outcome)
+        merged[key] = merged.get(key, 0) + n
+    for (stage, city, outcome), n in sorted(merged.items(), key=str):
+        lines.append(f"scraper_stage_outcomes_total{_labels(stage=stage, city=city, outcome=outcome)} {n}")
+
+    lines += ["# HELP scraper_counter_total Scraper counters (bytes, records, ...)",
+              "# TYPE scraper_counter_total counter"]
+    merged = {}
+    for (name, stage, city), value in counters.items():
+        key = (name, stage, city if PROM_CITY_LABELS else None)
+        merged[key] = merged.get(key, 0) + value
+    for (name, stage, city), value in sorted(merged.items(), key=str):
+        lines.append(f"scraper_counter_total{_labels(name=name, stage=stage, city=city)} {value}")
+
+    lines += ["# HELP scraper_pages_per_minute Detail navigations per minute since start",
+              "# TYPE scraper_pages_per_minute gauge",
+              f"scraper_pages_per_minute {pages_per_minute():.3f}"]
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)  # scrapers never see a half-written file
+
+async def prometheus_loop(path, every=PROM_EVERY):
+    while True:
+        await asyncio.sleep(every)
+        write_prometheus(path)
+
+# ---------------- PROFILING ----------------
+async def loop_lag_probe(every=LOOP_LAG_EVERY):
+    """
+    Sleeps `every` seconds in a loop; how late each wake-up is, is time the
+    event loop spent blocked in someone's synchronous code.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(every)
+        observe("loop_lag", max(0.0, loop.time() - start - every))
+
+@contextmanager
+def profiled(path, enabled=True, top=25):
+    """
+    cProfile around the block; stats are dumped to `path` (open with pstats
+    or snakeviz) and the top functions by cumulative time are printed.
+    """
+    if not enabled:
+        yield
+        return
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        profiler.dump_stats(path)
+        print(f"[⏱] Profile saved to {path}")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
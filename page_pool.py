@@ -0,0 +1,150 @@
+import time
+from contextlib import asynccontextmanager
+
+# ---------------- CONFIG ----------------
+MAX_PAGE_USES = 40          # navigations before a page is closed and replaced
+MAX_CONTEXT_USES = 15       # cities before a context is closed and replaced
+MAX_JS_HEAP_MB = 350        # recycle a page whose JS heap grows past this
+HEAP_CHECK_EVERY = 10       # page uses between heap checks
+RESET_URL = "about:blank"   # drops the previous document (and its heap) between uses
+
+HEAP_JS = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+class _PooledContext:
+    def __init__(self, context):
+        self.context = context
+        self.uses = 0
+        self.idle_pages = []    # [_PooledPage]
+
+class _PooledPage:
+    def __init__(self, page):
+        self.page = page
+        self.uses = 0
+
+# ---------------- POOL ----------------
+class PagePool:
+    """
+    Warm browser contexts for city tasks and warm pages inside them for
+    business tasks. Concurrency is still bounded by the callers' SEM and
+    BIZ_SEM, so the pool never holds more than SEM contexts and about
+    SEM * BIZ_SEM pages.
+    """
+
+    def __init__(self, browser, context_options=None, setup_context=None,
+                 max_page_uses=MAX_PAGE_USES, max_context_uses=MAX_CONTEXT_USES,
+                 max_heap_mb=MAX_JS_HEAP_MB, setup_page=None):
+        self.browser = browser
+        self.context_options = context_options or {}
+        self.setup_context = setup_context
+        self.setup_page = setup_page
+        self.max_page_uses = max_page_uses
+        self.max_context_uses = max_context_uses
+        self.max_heap_bytes = max_heap_mb * 1024 * 1024
+
+        self._idle_contexts = []
+        self._by_context = {}       # BrowserContext -> _PooledContext
+        self.stats = {
+            "contexts_created": 0, "contexts_recycled": 0,
+            "pages_created": 0, "pages_reused": 0, "pages_recycled": 0,
+            "acquires": 0, "acquire_seconds": 0.0,
+        }
+
+    # ---- contexts ----
+    async def _new_context(self):
+        context = await self.browser.new_context(**self.context_options)
+        if self.setup_context is not None:
+            await self.setup_context(context)
+        pooled = _PooledContext(context)
+        self._by_context[context] = pooled
+        self.stats["contexts_created"] += 1
+        return pooled
+
+    async def _close_context(self, pooled):
+        self._by_context.pop(pooled.context, None)
+        try:
+            await pooled.context.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def context(self):
+        pooled = self._idle_contexts.pop() if self._idle_contexts else await self._new_context()
+        pooled.uses += 1
+        try:
+            yield pooled.context
+        finally:
+            if pooled.uses >= self.max_context_uses:
+                self.stats["contexts_recycled"] += 1
+                await self._close_context(pooled)
+            else:
+                self._idle_contexts.append(pooled)
+
+    # ---- pages ----
+    async def _healthy(self, pooled_page):
+        if pooled_page.page.is_closed() or pooled_page.uses >= self.max_page_uses:
+            return False
+        if pooled_page.uses % HEAP_CHECK_EVERY == 0:
+            try:
+                return await pooled_page.page.evaluate(HEAP_JS) < self.max_heap_bytes
+            except Exception:
+                return False
+        return True
+
+    @asynccontextmanager
+    async def page(self, context):
+        """
+        A warm page from `context`. Pages that raised are closed, not reused.
+        """
+        start = time.perf_counter()
+        pooled_ctx = self._by_context.get(context)
+
+        if pooled_ctx is not None and pooled_ctx.idle_pages:
+            pooled_page = pooled_ctx.idle_pages.pop()
+            self.stats["pages_reused"] += 1
+        else:
+            page = await context.new_page()
+            if self.setup_page is not None:
+                await self.setup_page(page)
+            pooled_page = _PooledPage(page)
+            self.stats["pages_created"] += 1
+
+        self.stats["acquires"] += 1
+        self.stats["acquire_seconds"] += time.perf_counter() - start
+        pooled_page.uses += 1
+
+        ok = False
+        try:
+            yield pooled_page.page
+            ok = True
+        finally:
+            keep = ok and pooled_ctx is not None and await self._healthy(pooled_page)
+            if keep:
+                try:
+                    await pooled_page.page.goto(RESET_URL)
+                except Exception:
+                    keep = False
+
+            if keep:
+                pooled_ctx.idle_pages.append(pooled_page)
+            else:
+                if ok:
+                    self.stats["pages_recycled"] += 1
+                try:
+                    await pooled_page.page.close()
+                except Exception:
+                    pass
+
+    # ---- lifecycle ----
+    async def close(self):
+        for pooled in list(self._by_context.values()):
+            await self._close_context(pooled)
+        self._idle_contexts = []
+
+    def report(self):
+        s = self.stats
+        avg_ms = s["acquire_seconds"] / s["acquires"] * 1000 if s["acquires"] else 0.0
+        return (
+            f"page acquires {s['acquires']} (avg {avg_ms:.1f} ms) | pages created {s['pages_created']}, "
+            f"reused {s['pages_reused']}, recycled {s['pages_recycled']} | contexts created "
+            f"{s['contexts_created']}, recycled {s['contexts_recycled']}"
+        )
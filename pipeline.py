@@ -0,0 +1,67 @@
+import time
+import asyncio
+
+_STOP = object()
+
+# ---------------- STAGE ----------------
+class Stage:
+    """
+    A pool of `workers` tasks fed from a bounded queue. `process(item)`
+    enqueues and waits for the handler's result; when the queue is full the
+    caller waits at the put, which is the backpressure between stages.
+    """
+
+    def __init__(self, name, handler, workers, queue_size):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self._queue = asyncio.Queue(maxsize=queue_size)
+        self._tasks = []
+        self.stats = {"processed": 0, "errors": 0, "busy_seconds": 0.0, "peak_queue": 0}
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self):
+        while True:
+            entry = await self._queue.get()
+            if entry is _STOP:
+                return
+            item, fut = entry
+            if fut.cancelled():
+                continue  # caller gave up while the item was queued
+
+            start = time.perf_counter()
+            try:
+                result = await self.handler(item)
+            except Exception as e:
+                self.stats["errors"] += 1
+                if not fut.done():
+                    fut.set_exception(e)
+            else:
+                if not fut.done():
+                    fut.set_result(result)
+            finally:
+                self.stats["processed"] += 1
+                self.stats["busy_seconds"] += time.perf_counter() - start
+
+    async def process(self, item):
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, fut))
+        self.stats["peak_queue"] = max(self.stats["peak_queue"], self._queue.qsize())
+        return await fut
+
+    async def close(self):
+        # queued items are finished first, then every worker meets a sentinel
+        for _ in self._tasks:
+            await self._queue.put(_STOP)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def report(self):
+        s = self.stats
+        avg = s["busy_seconds"] / s["processed"] if s["processed"] else 0.0
+        return (
+            f"{self.name}: {s['processed']} done, {s['errors']} errors, avg {avg:.2f}s, "
+            f"{self.workers} workers, peak queue {s['peak_queue']}/{self._queue.maxsize}"
+        )
@@ -0,0 +1,137 @@
+import re
+import time
+import sqlite3
+from urllib.parse import unquote
+from place_extract import COORDS_REGEX
+
+# ---------------- CONFIG ----------------
+DEDUPE_DB = "seen_places.sqlite"
+
+# ---------------- REGEX ----------------
+FEATURE_ID_REGEX = re.compile(r"!1s(0x[0-9a-f]+:0x[0-9a-f]+)", re.I)
+KG_ID_REGEX = re.compile(r"!16s(/g/[^!?&/]+)")
+
+# ---------------- PLACE KEY ----------------
+def place_key(url):
+    """
+    Canonical key for a /maps/place URL, independent of the search query
+    that produced it: feature id (0x..:0x..), then knowledge-graph id,
+    then place name + coordinates rounded to ~1 m, then the bare path.
+    """
+    if not isinstance(url, str) or not url:
+        return "NA"
+    decoded = unquote(url)
+
+    m = FEATURE_ID_REGEX.search(decoded)
+    if m:
+        return "fid:" + m.group(1).lower()
+
+    m = KG_ID_REGEX.search(decoded)
+    if m:
+        return "kg:" + m.group(1)
+
+    path = decoded.split("?")[0]
+    m = COORDS_REGEX.search(decoded)
+    if m and "/place/" in path:
+        name = path.split("/place/")[1].split("/")[0].lower()
+        return f"geo:{name}@{float(m.group(1)):.5f},{float(m.group(2)):.5f}"
+
+    return "url:" + path.split("/data=")[0].rstrip("/")
+
+# ---------------- SEEN SET ----------------
+class SeenPlaces:
+    """
+    Process-wide set of claimed place keys, persisted in SQLite so it
+    survives resumes and is shared by shard worker processes. Re-encounters
+    are stored as cross-reference rows instead of new page loads.
+    """
+
+    def __init__(self, path=DEDUPE_DB):
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS places (
+                place_key TEXT PRIMARY KEY,
+                state TEXT,
+                city TEXT,
+                url TEXT,
+                seen_at REAL
+            )"""
+        )
+        self.db.execute(
+            """CREATE TABLE IF NOT EXISTS crossrefs (
+                place_key TEXT,
+                state TEXT,
+                city TEXT,
+                url TEXT,
+                first_city TEXT,
+                seen_at REAL
+            )"""
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_crossrefs_city ON crossrefs(state, city)")
+        self.db.commit()
+
+        self._owner = {}          # in-memory view of keys this process has seen
+        self.stats = {"claimed": 0, "duplicates": 0}
+
+    def claim(self, url, state, city):
+        """
+        Returns None if this call claimed the place (go scrape it), or the
+        city that already owns it (a cross-reference row is recorded).
+        A place already owned by this same city (the city is run again, or
+        a run crashed mid-city) counts as claimed, so it is scraped again.
+        """
+        key = place_key(url)
+        owner = self._owner.get(key)
+
+        if owner is None:
+            cur = self.db.execute(
+                "INSERT OR IGNORE INTO places (place_key, state, city, url, seen_at) VALUES (?, ?, ?, ?, ?)",
+                (key, state, city, url, time.time())
+            )
+            self.db.commit()
+            if cur.rowcount:
+                self._owner[key] = (state, city)
+                self.stats["claimed"] += 1
+                return None
+
+            row = self.db.execute(
+                "SELECT state, city FROM places WHERE place_key = ?", (key,)
+            ).fetchone()
+            owner = tuple(row) if row else ("NA", "NA")
+            self._owner[key] = owner
+
+        if owner == (state, city):
+            self.stats["claimed"] += 1
+            return None
+        owner = owner[1]
+
+        self.db.execute(
+            "INSERT INTO crossrefs (place_key, state, city, url, first_city, seen_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, state, city, url, owner, time.time())
+        )
+        self.db.commit()
+        self.stats["duplicates"] += 1
+        return owner
+
+    def release(self, url):
+        """
+        Un-claim a place whose scrape failed so a later city can retry it.
+        """
+        key = place_key(url)
+        self._owner.pop(key, None)
+        self.db.execute("DELETE FROM places WHERE place_key = ?", (key,))
+        self.db.commit()
+
+    def report(self):
+        total = self.stats["claimed"] + self.stats["duplicates"]
+        share = self.stats["duplicates"] / total if total else 0.0
+        return (
+            f"places claimed {self.stats['claimed']} | duplicates skipped "
+            f"{self.stats['duplicates']} ({share:.1%} of detail-page loads saved)"
+        )
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
@@ -0,0 +1,102 @@
+import re
+from urllib.parse import unquote
+
+# ---------------- CONFIG ----------------
+NAME_SELECTOR = "h1"
+ADDRESS_SELECTOR = 'button[data-item-id*="address"]'
+PHONE_SELECTOR = 'button[data-item-id*="phone"]'
+WEBSITE_SELECTOR = 'a[data-item-id*="authority"]'
+PANEL_SELECTOR = "div[role='main']"
+PLACE_LINK_SELECTOR = "a[href*='/maps/place']"
+
+# A panel line with a comma and one of these is taken as the address when
+# the address button is missing
+ADDRESS_HINTS = ["Street", "St", "Ave", "Road", "Rd", "Blvd", "Drive"]
+
+# ---------------- REGEX ----------------
+# The only copies: feed_harvest, place_dedupe, geo and main2 import these
+PHONE_REGEX = r"\+?\d[\d\s().-]{8,}\d"     # also compiled in the page (same syntax in JS)
+COORDS_REGEX = re.compile(r"!3d(-?\d+\.\d+)!4d(-?\d+\.\d+)")
+
+# One round trip per place page: name, address (button, then the panel-text
+# fallback), first phone number, website and the page's own URL.
+PLACE_DETAILS_JS = """
+(opts) => {
+    const text = el => el ? (el.innerText || "").trim() : "";
+    const name = document.querySelector(opts.name);
+
+    let address = text(document.querySelector(opts.address));
+    if (!address) {
+        const panel = document.querySelector(opts.panel);
+        const line = panel && (panel.innerText || "").split("\\n").find(
+            l => l.includes(",") && opts.addressHints.some(h => l.includes(h))
+        );
+        address = line ? line.trim() : "";
+    }
+
+    const phone = text(document.querySelector(opts.phone)).match(new RegExp(opts.phoneRegex));
+    const site = document.querySelector(opts.website);
+    return {
+        name: name ? text(name) : null,
+        address: address,
+        phone: phone ? phone[0] : "",
+        website: site ? site.getAttribute("href") || "" : "",
+        href: location.href,
+    };
+}
+"""
+
+# One round trip per results page: every place link, deduped, in feed order.
+FEED_LINKS_JS = """
+(selector) => [...new Set(
+    Array.from(document.querySelectorAll(selector), a => a.getAttribute("href")).filter(Boolean)
+)]
+"""
+
+# ---------------- HELPERS ----------------
+def name_from_url(url):
+    try:
+        part = url.split("/place/")[1].split("/")[0]
+        return unquote(part).replace("+", " ").strip()
+    except (AttributeError, IndexError):
+        return "NA"
+
+def coords_from_url(url):
+    match = COORDS_REGEX.search(url) if isinstance(url, str) else None
+    return (match.group(1), match.group(2)) if match else ("NA", "NA")
+
+# ---------------- EXTRACTION ----------------
+async def extract_place(page, url):
+    """
+    {name, address, phone, website, lat, lng} from an open place page in a
+    single page.evaluate; missing fields are "NA".
+    """
+    raw = await page.evaluate(PLACE_DETAILS_JS, {
+        "name": NAME_SELECTOR,
+        "address": ADDRESS_SELECTOR,
+        "phone": PHONE_SELECTOR,
+        "website": WEBSITE_SELECTOR,
+        "panel": PANEL_SELECTOR,
+        "addressHints": ADDRESS_HINTS,
+        "phoneRegex": PHONE_REGEX,
+    })
+
+    lat, lng = coords_from_url(url)
+    if lat == "NA":
+        # the place URL settles on its !3d!4d form after navigation
+        lat, lng = coords_from_url(raw["href"])
+
+    return {
+        "name": raw["name"] if raw["name"] is not None else name_from_url(url),
+        "address": raw["address"] or "NA",
+        "phone": raw["phone"] or "NA",
+        "website": raw["website"] or "NA",
+        "lat": lat,
+        "lng": lng,
+    }
+
+async def feed_links(page):
+    """
+    Every /maps/place href on the page, deduped, in one round trip.
+    """
+    return await page.evaluate(FEED_LINKS_JS, PLACE_LINK_SELECTOR)
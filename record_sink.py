@@ -0,0 +1,236 @@
+import os
+import sys
+import glob
+import json
+import time
+import queue
+import asyncio
+import threading
+from datetime import datetime
+
+# ---------------- CONFIG ----------------
+RECORDS_DIR = "records"
+QUEUE_SIZE = 5000           # records buffered between the event loop and the writer
+FSYNC_EVERY = 2.0           # seconds between fsyncs; a crash loses at most this + the queue
+COMPACT_AFTER_EXPORT = True # rewrite a state's sink files as newest-record-per-place after its export
+EXCEL_DIR = "state_city_excels"
+
+COLUMNS = ["Name", "Address", "Phone", "Website", "Email",
+           "Google Maps URL", "Latitude", "Longitude"]
+
+_STOP = object()
+
+def sink_path(state_code, worker_id=None):
+    suffix = f".w{worker_id}" if worker_id is not None else ""
+    return os.path.join(RECORDS_DIR, f"{state_code}{suffix}.jsonl")
+
+# ---------------- SINK ----------------
+class RecordSink:
+    """
+    Append-only JSONL sink. The event loop only enqueues; a writer thread
+    serialises, appends and fsyncs, so the loop never blocks on disk and
+    memory stays flat regardless of run length. Callbacks given with an
+    item (or after_durable) run on the writer thread once the file is
+    fsynced past it: that is when a record survives a crash.
+    """
+
+    def __init__(self, path, queue_size=QUEUE_SIZE, fsync_every=FSYNC_EVERY):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.fsync_every = fsync_every
+        self.written = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="record-sink", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        last_sync = time.monotonic()
+        waiting = []    # callbacks of items written since the last fsync
+        while True:
+            # with callbacks waiting, wake up for the next fsync even when idle
+            timeout = max(0.0, self.fsync_every - (time.monotonic() - last_sync)) if waiting else None
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = None
+            if entry is _STOP:
+                break
+
+            if entry is not None:
+                item, callback = entry
+                if item is not None:
+                    self._file.write(json.dumps(item, ensure_ascii=False) + "\n")
+                    self.written += 1
+                if callback is not None:
+                    waiting.append(callback)
+                # batch whatever is already queued into one flush
+                if self._queue.empty():
+                    self._file.flush()
+
+            if time.monotonic() - last_sync >= self.fsync_every:
+                self._sync(waiting)
+                last_sync = time.monotonic()
+
+        self._sync(waiting)
+        self._file.close()
+
+    def _sync(self, callbacks):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[!] Sink callback failed: {str(e)[:50]}")
+        callbacks.clear()
+
+    async def _enqueue(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            # backpressure without blocking the event loop
+            await asyncio.to_thread(self._queue.put, entry)
+
+    async def put(self, state_code, city, record, category=None, key=None, card=None, on_durable=None):
+        # key: place key, card: hash of the feed card (refresh.py compares both)
+        item = {"state_code": state_code, "city": city, "category": category,
+                "record": list(record), "ts": time.time(), "key": key, "card": card}
+        await self._enqueue((item, on_durable))
+
+    async def after_durable(self, callback):
+        """
+        Runs callback (on the writer thread) once everything put so far is fsynced.
+        """
+        await self._enqueue((None, callback))
+
+    async def durable(self):
+        """
+        Returns once everything put so far is fsynced.
+        """
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        await self.after_durable(lambda: loop.call_soon_threadsafe(done.set_result, None))
+        await done
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+# ---------------- READ ----------------
+def state_paths(state_code):
+    return sorted(glob.glob(os.path.join(RECORDS_DIR, f"{state_code}.*jsonl")))
+
+def iter_items(state_code, paths=None):
+    """
+    Every sink item of the state (all workers, or only `paths`), file by
+    file in write order.
+    """
+    for path in paths or state_paths(state_code):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                if item.get("state_code") == state_code:
+                    yield item
+
+def newest_items(items, category=None):
+    """
+    Items with only the newest one per (place key, category) kept, in
+    the order places were first written; items without a key all stay.
+    """
+    latest = {}     # (place key, category) or a running number -> item
+    for n, item in enumerate(items):
+        if category is not None and item.get("category") != category:
+            continue
+        key = (item["key"], item.get("category")) if item.get("key") else n
+        previous = latest.get(key)
+        if previous is None or item.get("ts", 0) >= previous.get("ts", 0):
+            latest[key] = item
+    return list(latest.values())
+
+def read_city_records(state_code, category=None):
+    """
+    {city: [record, ...]} from every sink file of the state (all workers),
+    in the order records were written; only `category` if one is given.
+    A place written again by a refresh keeps only its newest record.
+    """
+    city_results = {}
+    for item in newest_items(iter_items(state_code), category):
+        city_results.setdefault(item["city"], []).append(item["record"])
+    return city_results
+
+def compact(state_code, path=None):
+    """
+    Rewrites the state's sink files as one file (sink_path) holding the
+    newest record per place, and removes the others; with `path`, only
+    that file is compacted in place. No sink of those files may be open.
+    Returns (items before, items after).
+    """
+    paths = [path] if path is not None else state_paths(state_code)
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths:
+        return 0, 0
+
+    items = list(iter_items(state_code, paths))
+    kept = newest_items(items)
+    target = path or sink_path(state_code)
+    tmp_path = target + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for item in kept:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, target)  # a crash before this leaves the old files intact
+
+    # a crash in here only leaves duplicates, which readers drop anyway
+    for p in paths:
+        if p != target:
+            os.remove(p)
+    return len(items), len(kept)
+
+# ---------------- EXPORT ----------------
+def export_excel(state_code, state_name, output_dir=EXCEL_DIR, category=None, regroup=None):
+    """
+    Writes one workbook (a sheet per city) from the sink, named like the
+    batch workbooks so combine.py picks it up. With `category` only that
+    search category's records are exported; `regroup` may re-key the
+    {city: [record]} dict first (geo attribution).
+    """
+    import pandas as pd
+
+    city_results = read_city_records(state_code, category)
+    if regroup is not None and city_results:
+        city_results = regroup(city_results)
+    if not city_results:
+        print(f"[!] No sink records for {state_code}" + (f" / {category}" if category else ""))
+        return None
+
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    file_path = os.path.join(
+        output_dir,
+        f"{state_code}_{state_name.replace(' ', '_')}_{timestamp}.xlsx"
+    )
+
+    with pd.ExcelWriter(file_path, engine="openpyxl") as writer:
+        for city, data in city_results.items():
+            df = pd.DataFrame(data, columns=COLUMNS)
+            df.to_excel(writer, sheet_name=city[:31], index=False)
+
+    total = sum(len(data) for data in city_results.values())
+    print(f"[✓] Exported {total} records / {len(city_results)} cities -> {file_path}")
+    return file_path
+
+# ---------------- RUN ----------------
+if __name__ == "__main__":
+    # python record_sink.py AZ   -> workbook(s) from records/AZ*.jsonl, laid out
+    # as main2 exports them (SEARCH_JOBS categories, geo attribution); the sink
+    # is left as it is, a scrape of the state may still be writing to it
+    import catalog
+    import main2
+
+    code = sys.argv[1].upper() if len(sys.argv) > 1 else "AZ"
+    main2.export_from_sink(code, catalog.state_name(code), compact=False)
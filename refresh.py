@@ -0,0 +1,69 @@
+import time
+import hashlib
+
+import record_sink
+from place_dedupe import place_key
+
+# ---------------- CONFIG ----------------
+TTL_DAYS = 30               # a record older than this is scraped again even if its card is unchanged
+# Feed card fields that make a place worth revisiting when they change
+# (rating / review counts move every week and are left out on purpose)
+CARD_FIELDS = ("name", "address", "phone", "website", "category")
+
+def card_hash(card):
+    """
+    Short hash of the feed card's identifying fields, None without a card.
+    """
+    if not card:
+        return None
+    text = "\x1f".join(str(card.get(field, "NA")).strip().lower() for field in CARD_FIELDS)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+# ---------------- INDEX ----------------
+class RefreshIndex:
+    """
+    What earlier runs stored for a state (record sink), per place key: when
+    it was scraped and the hash of the card it came from. A refresh runs the
+    feed pass as usual and visits only places that are new, older than the
+    TTL, or whose card changed; the rest keep their stored record.
+    """
+
+    def __init__(self, state_code, ttl_days=TTL_DAYS):
+        self.ttl = ttl_days * 24 * 3600
+        self.started = time.time()  # records written by this refresh count as fresh (resume)
+        self.places = {}            # place key -> (ts, card hash)
+        for item in record_sink.iter_items(state_code):
+            key = item.get("key") or place_key(item["record"][5])
+            ts = item.get("ts", 0)
+            if key not in self.places or ts >= self.places[key][0]:
+                self.places[key] = (ts, item.get("card"))
+        self.stats = {"new": 0, "expired": 0, "changed": 0, "fresh": 0}
+
+    def decide(self, key, card=None):
+        """
+        "new", "expired", "changed" or "fresh" (skip) for one place.
+        Without a card, or a stored hash to compare, only the TTL counts.
+        """
+        prior = self.places.get(key)
+        if prior is None:
+            reason = "new"
+        elif self.started - prior[0] > self.ttl:
+            reason = "expired"
+        elif card is not None and prior[1] is not None and card_hash(card) != prior[1]:
+            reason = "changed"
+        else:
+            reason = "fresh"
+        self.stats[reason] += 1
+        return reason
+
+    def needs_visit(self, key, card=None):
+        return self.decide(key, card) != "fresh"
+
+    def report(self):
+        s = self.stats
+        seen = sum(s.values())
+        share = s["fresh"] / seen if seen else 0.0
+        return (
+            f"refresh: {len(self.places)} stored places | {s['new']} new, {s['expired']} expired, "
+            f"{s['changed']} changed, {s['fresh']} unchanged ({share:.1%} of feed places skipped)"
+        )
@@ -0,0 +1,103 @@
+# ---------------- CONFIG ----------------
+BLOCKED_EXTENSIONS = ["png", "jpg", "jpeg", "gif", "webp", "svg", "ico", "avif", "bmp",
+                      "woff", "woff2", "ttf", "otf", "eot", "css", "mp4", "webm", "mp3"]
+
+# Network.setBlockedURLs patterns ("*" wildcard, whole URL): blocked inside
+# Chromium, no request ever reaches Python. Extensions and hosts stand in
+# for resource types (images, media, fonts, stylesheets). Keep them narrow:
+# the feed itself loads over /search?tbm=map and /maps/preview/place XHRs.
+BLOCKED_URL_PATTERNS = [
+    *(f"*.{ext}" for ext in BLOCKED_EXTENSIONS),
+    *(f"*.{ext}?*" for ext in BLOCKED_EXTENSIONS),
+    "*googleusercontent.com/*", "*ggpht.com/*",   # place photos, avatars
+    "*streetviewpixels-pa.googleapis.com/*",
+    "*/maps/vt?*", "*/maps/vt/*",       # map tiles
+    "*khms*.google.com/*", "*/kh/v=*",  # satellite tiles
+    "*gstatic.com/images/*", "*maps.gstatic.com/tactile/*",
+    "*/_/ss/*",                         # Google's stylesheet bundles (no .css extension)
+    "*fonts.gstatic.com/*", "*fonts.googleapis.com/*",
+    "*/gen_204*", "*/log204*", "*/csi?*",
+    "*google.com/log?*", "*play.google.com/log*",
+    "*google-analytics.com/*", "*googletagmanager.com/*",
+    "*doubleclick.net/*", "*googleadservices.com/*",
+]
+
+# ---------------- BLOCKER ----------------
+class RequestBlocker:
+    """
+    Blocks requests inside Chromium through a CDP session per page, with
+    Network.setBlockedURLs patterns only: nothing is paused or answered
+    from Python. With count_requests the session also listens to Network
+    events and counts requests, blocked requests (by resource type) and
+    bytes actually transferred for the run report; that sends an event to
+    Python for every request, so it is meant for --profile / bench runs.
+    """
+
+    def __init__(self, patterns=BLOCKED_URL_PATTERNS, count_requests=False):
+        self.patterns = list(patterns)
+        self.count_requests = count_requests
+        self.stats = {"pages": 0, "requests": 0, "blocked": 0, "bytes_loaded": 0, "attach_failed": 0}
+        self.blocked_by_type = {}
+
+    async def attach(self, page):
+        """
+        Installs blocking on a new page before its first navigation. A page
+        CDP cannot attach to (not Chromium) is left unblocked.
+        """
+        try:
+            session = await page.context.new_cdp_session(page)
+            if self.count_requests:
+                session.on("Network.requestWillBeSent", self._sent)
+                session.on("Network.loadingFinished", self._finished)
+                session.on("Network.loadingFailed", self._failed)
+            # the block list only applies while the Network domain is enabled
+            await session.send("Network.enable")
+            await session.send("Network.setBlockedURLs", {"urls": self.patterns})
+        except Exception:
+            self.stats["attach_failed"] += 1
+            return False
+
+        self.stats["pages"] += 1
+        return True
+
+    # ---- CDP events (count_requests) ----
+    def _sent(self, event):
+        self.stats["requests"] += 1
+
+    def _finished(self, event):
+        self.stats["bytes_loaded"] += int(event.get("encodedDataLength") or 0)
+
+    def _failed(self, event):
+        if event.get("blockedReason") or "BLOCKED_BY_CLIENT" in (event.get("errorText") or ""):
+            self.stats["blocked"] += 1
+            kind = event.get("type", "Other")
+            self.blocked_by_type[kind] = self.blocked_by_type.get(kind, 0) + 1
+
+    # ---- reporting ----
+    def summary(self, navigations=None):
+        """
+        Dict for the run report; per-page figures use `navigations` (page
+        loads) when given, else the pages blocking was attached to.
+        """
+        s = self.stats
+        per = navigations or s["pages"] or 1
+        return {
+            **s,
+            "blocked_share": round(s["blocked"] / s["requests"], 3) if s["requests"] else 0.0,
+            "blocked_per_page": round(s["blocked"] / per, 1),
+            "requests_per_page": round(s["requests"] / per, 1),
+            "bytes_loaded_per_page": round(s["bytes_loaded"] / per),
+            "blocked_by_type": dict(sorted(self.blocked_by_type.items(), key=lambda kv: -kv[1])),
+            "patterns": len(self.patterns),
+            "counted": self.count_requests,
+        }
+
+    def report(self, navigations=None):
+        s = self.summary(navigations)
+        if not self.count_requests:
+            return f"{len(self.patterns)} URL patterns blocked on {s['pages']} pages (counts with --profile)"
+        return (
+            f"requests blocked {s['blocked']}/{s['requests']} ({s['blocked_share']:.0%}), "
+            f"{s['blocked_per_page']} per page | loaded {s['bytes_loaded'] / 1048576:.1f} MB, "
+            f"{s['bytes_loaded_per_page'] / 1024:.0f} KB per page"
+        )
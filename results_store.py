@@ -0,0 +1,172 @@
+import os
+import time
+import hashlib
+import sqlite3
+
+from place_dedupe import place_key
+
+# ---------------- CONFIG ----------------
+STORE_DB = "combined_store.sqlite"
+
+COLUMNS = ["Name", "Address", "Phone", "Website", "Email",
+           "Google Maps URL", "Latitude", "Longitude"]
+_DB_COLUMNS = ["name", "address", "phone", "website", "email", "maps_url", "lat", "lng"]
+
+def file_hash(path, chunk_size=1024 * 1024):
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+# ---------------- STORE ----------------
+class ResultsStore:
+    """
+    Local indexed store behind combine.py. Places are keyed by canonical
+    place key per (state, city); a manifest of ingested batch files
+    (path, size, mtime, hash) means each workbook is parsed only once.
+    """
+
+    def __init__(self, path=STORE_DB):
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(
+            f"""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                sha1 TEXT,
+                state_code TEXT,
+                state_name TEXT,
+                ingested_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS places (
+                place_key TEXT NOT NULL,
+                state_code TEXT NOT NULL,
+                city TEXT NOT NULL,
+                {", ".join(f"{c} TEXT" for c in _DB_COLUMNS)},
+                updated_at REAL,
+                category TEXT,
+                PRIMARY KEY (place_key, state_code, city)
+            );
+            CREATE INDEX IF NOT EXISTS idx_places_state_city ON places(state_code, city);
+            CREATE TABLE IF NOT EXISTS exports (
+                state_code TEXT PRIMARY KEY,
+                path TEXT,
+                exported_at REAL
+            );
+            """
+        )
+        # stores created before category folders were ingested
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(places)")}
+        if "category" not in columns:
+            self.db.execute("ALTER TABLE places ADD COLUMN category TEXT")
+        self.db.commit()
+
+    # ---- manifest ----
+    def pending_files(self, paths):
+        """
+        Paths that are new or changed since they were ingested. Hashing only
+        happens when size/mtime differ, so a warm run is a stat() per file.
+        """
+        known = {
+            row[0]: row[1:]
+            for row in self.db.execute("SELECT path, size, mtime_ns, sha1 FROM files")
+        }
+        pending = []
+        for path in paths:
+            st = os.stat(path)
+            entry = known.get(os.path.abspath(path))
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns:
+                continue
+            if entry and entry[2] == file_hash(path):
+                # touched but identical: refresh the manifest only
+                self.db.execute(
+                    "UPDATE files SET size = ?, mtime_ns = ? WHERE path = ?",
+                    (st.st_size, st.st_mtime_ns, os.path.abspath(path))
+                )
+                continue
+            pending.append(path)
+        self.db.commit()
+        return pending
+
+    def mark_ingested(self, path, state_code, state_name):
+        st = os.stat(path)
+        self.db.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, sha1, state_code, state_name, ingested_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(path), st.st_size, st.st_mtime_ns, file_hash(path),
+             state_code, state_name, time.time())
+        )
+        self.db.commit()
+
+    def state_name(self, state_code):
+        row = self.db.execute(
+            "SELECT state_name FROM files WHERE state_code = ? ORDER BY ingested_at DESC LIMIT 1",
+            (state_code,)
+        ).fetchone()
+        return row[0] if row else "Unknown"
+
+    # ---- places ----
+    def upsert_city(self, state_code, city, rows, updated_at=None, category=None):
+        """
+        rows: iterables in COLUMNS order; updated_at: when they were scraped
+        (the batch file's mtime); category: search job of the batch, if any. A stored place is replaced only by a newer
+        scrape with different values; within one file the first occurrence
+        wins (same as drop_duplicates(keep='first')). Returns rows added or
+        changed.
+        """
+        updated_at = time.time() if updated_at is None else updated_at
+        before = self.db.total_changes
+        self.db.executemany(
+            f"INSERT INTO places (place_key, state_code, city, {', '.join(_DB_COLUMNS)}, updated_at, category) "
+            f"VALUES (?, ?, ?, {', '.join('?' for _ in _DB_COLUMNS)}, ?, ?) "
+            f"ON CONFLICT (place_key, state_code, city) DO UPDATE SET "
+            f"{', '.join(f'{c} = excluded.{c}' for c in _DB_COLUMNS)}, updated_at = excluded.updated_at, "
+            f"category = excluded.category "
+            f"WHERE excluded.updated_at > places.updated_at "
+            f"AND ({', '.join(_DB_COLUMNS)}) IS NOT ({', '.join(f'excluded.{c}' for c in _DB_COLUMNS)})",
+            (
+                (place_key(str(row[5])), state_code, city, *[str(v) for v in row], updated_at, category)
+                for row in rows
+            )
+        )
+        return self.db.total_changes - before
+
+    def commit(self):
+        self.db.commit()
+
+    def has_categories(self, state_code):
+        return self.db.execute(
+            "SELECT 1 FROM places WHERE state_code = ? AND category IS NOT NULL LIMIT 1", (state_code,)
+        ).fetchone() is not None
+
+    def city_rows(self, state_code, with_category=False):
+        """
+        {city: [row, ...]} for one state, cities sorted, rows in insert order;
+        with_category appends the category ("NA" if none) to each row.
+        """
+        columns = _DB_COLUMNS + ["COALESCE(category, 'NA')"] if with_category else _DB_COLUMNS
+        result = {}
+        for row in self.db.execute(
+            f"SELECT city, {', '.join(columns)} FROM places WHERE state_code = ? ORDER BY city, rowid",
+            (state_code,)
+        ):
+            result.setdefault(row[0], []).append(list(row[1:]))
+        return result
+
+    def record_export(self, state_code, path):
+        self.db.execute(
+            "INSERT OR REPLACE INTO exports (state_code, path, exported_at) VALUES (?, ?, ?)",
+            (state_code, path, time.time())
+        )
+        self.db.commit()
+
+    def last_export(self, state_code):
+        row = self.db.execute("SELECT path FROM exports WHERE state_code = ?", (state_code,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
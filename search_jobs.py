@@ -0,0 +1,74 @@
+from itertools import combinations
+
+# ---------------- CONFIG ----------------
+# One job per output category; its terms are synonyms searched in every city.
+# A place found by several terms is kept once, under the first job listing it.
+DEFAULT_JOBS = [
+    {"category": "Hair Salon", "terms": ["Hair Salon"]},
+]
+
+REDUNDANT_SHARE = 0.05      # a term whose places are < 5% unique adds almost nothing
+
+def build_search_terms(city, state_name, jobs=DEFAULT_JOBS):
+    """
+    [(category, term, query), ...] for one city, in job order.
+    """
+    return [
+        (job["category"], term, f"{term} in {city}, {state_name}, USA")
+        for job in jobs
+        for term in job["terms"]
+    ]
+
+def category_slug(category):
+    return category.strip().replace(" ", "_").replace("/", "-")
+
+# ---------------- OVERLAP ----------------
+class TermOverlap:
+    """
+    Place keys seen per search term over the run, to spot redundant
+    queries: a term whose places nearly all come back from other terms too
+    can be dropped.
+    """
+
+    def __init__(self):
+        self.keys = {}      # term -> set(place_key)
+
+    def add(self, term, keys):
+        self.keys.setdefault(term, set()).update(keys)
+
+    def report(self):
+        terms = {}
+        for term, keys in self.keys.items():
+            others = set().union(*(k for t, k in self.keys.items() if t != term))
+            unique = len(keys - others)
+            terms[term] = {
+                "places": len(keys),
+                "unique": unique,
+                "unique_share": round(unique / len(keys), 3) if keys else 0.0,
+            }
+
+        pairs = []
+        for a, b in combinations(self.keys, 2):
+            shared = len(self.keys[a] & self.keys[b])
+            union = len(self.keys[a] | self.keys[b])
+            pairs.append({
+                "a": a, "b": b, "shared": shared,
+                "jaccard": round(shared / union, 3) if union else 0.0,
+            })
+
+        redundant = [t for t, s in terms.items() if s["places"] and s["unique_share"] < REDUNDANT_SHARE]
+        return {"terms": terms, "pairs": pairs, "redundant": redundant}
+
+    def summary(self):
+        report = self.report()
+        lines = [
+            f"    {term:<32} {s['places']:>6} places, {s['unique']:>6} unique ({s['unique_share']:.0%})"
+            for term, s in report["terms"].items()
+        ]
+        lines += [
+            f"    {p['a']} ∩ {p['b']}: {p['shared']} shared (jaccard {p['jaccard']:.2f})"
+            for p in report["pairs"]
+        ]
+        if report["redundant"]:
+            lines.append(f"    redundant (< {REDUNDANT_SHARE:.0%} unique): {', '.join(report['redundant'])}")
+        return "\n".join(lines)
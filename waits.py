@@ -0,0 +1,148 @@
+import time
+from contextlib import asynccontextmanager
+
+import metrics
+
+# ---------------- CONFIG ----------------
+RESULTS_SELECTOR = "div[role='feed'] a[href*='/maps/place'], div[role='main'] h1"
+PLACE_SELECTOR = "div[role='main'] h1"
+END_OF_LIST_SELECTOR = "span.HlvSq"
+SEARCHBOX_SELECTOR = "input#searchboxinput"
+
+SCROLL_STEP_TIMEOUT = 1500      # ms to wait for new cards after one scroll
+SCROLL_MAX_STEP_TIMEOUT = 4000  # step timeout doubles on each idle step up to this
+SCROLL_MAX_IDLE = 2             # idle steps (no new cards) before giving up
+SCROLL_TOTAL_TIMEOUT = 60000
+
+# Whole scroll loop runs inside the page: one round trip, returns as soon as
+# the end-of-list marker shows or the feed stops growing.
+SCROLL_FEED_JS = """
+async ([feed, opts]) => {
+    const isEnd = () =>
+        !!feed.querySelector(opts.endSelector) ||
+        /reached the end of the list/i.test((feed.lastElementChild || {}).innerText || "");
+
+    const waitForGrowth = (before, timeout) => new Promise(resolve => {
+        if (feed.childElementCount > before || isEnd()) return resolve(true);
+        const timer = setTimeout(() => { obs.disconnect(); resolve(false); }, timeout);
+        const obs = new MutationObserver(() => {
+            if (feed.childElementCount > before || isEnd()) {
+                obs.disconnect(); clearTimeout(timer); resolve(true);
+            }
+        });
+        obs.observe(feed, {childList: true});
+    });
+
+    const start = performance.now();
+    let steps = 0, idle = 0, timeout = opts.stepTimeout;
+    while (steps < opts.maxSteps && performance.now() - start < opts.totalTimeout) {
+        if (isEnd()) break;
+        const before = feed.childElementCount;
+        feed.scrollTop = feed.scrollHeight;
+        steps++;
+        if (await waitForGrowth(before, timeout)) {
+            idle = 0;
+            timeout = opts.stepTimeout;
+        } else {
+            idle++;
+            if (idle >= opts.maxIdle) break;
+            timeout = Math.min(timeout * 2, opts.maxStepTimeout);
+        }
+    }
+    return {
+        steps,
+        ended: isEnd(),
+        cards: feed.querySelectorAll("a[href*='/maps/place']").length,
+        ms: performance.now() - start,
+    };
+}
+"""
+
+# ---------------- TIMINGS ----------------
+# step -> [count, total_seconds, max_seconds]
+timings = {}
+
+def record(step, seconds, city=None, outcome="ok"):
+    entry = timings.setdefault(step, [0, 0.0, 0.0])
+    entry[0] += 1
+    entry[1] += seconds
+    entry[2] = max(entry[2], seconds)
+    metrics.observe(step, seconds, city, outcome)
+
+@asynccontextmanager
+async def timed(step, log=None, city=None):
+    """
+    Records the wall time of the block under `step`; if `log` is a dict the
+    duration is also stored there (for per-city log lines). Yields a dict
+    whose "outcome" the block may set ("timeout", "NA"); an exception
+    records "timeout" or "error".
+    """
+    result = {"outcome": "ok"}
+    start = time.perf_counter()
+    try:
+        yield result
+    except BaseException as e:
+        result["outcome"] = "timeout" if "Timeout" in type(e).__name__ else "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        record(step, elapsed, city, result["outcome"])
+        if log is not None:
+            log[step] = elapsed
+
+def summary():
+    lines = []
+    for step, (count, total, worst) in sorted(timings.items()):
+        lines.append(f"    {step:<16} n={count:<6} avg {total / count:.2f}s  max {worst:.2f}s")
+    return "\n".join(lines)
+
+# ---------------- WAITS ----------------
+async def wait_for_results(page, timeout=15000):
+    """
+    After a search: returns once the feed has its first card (or a single
+    place panel opened instead). False on timeout.
+    """
+    try:
+        await page.wait_for_selector(RESULTS_SELECTOR, timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+async def wait_for_place(page, timeout=5000):
+    """
+    After opening a place URL: returns once the place title is rendered.
+    """
+    try:
+        await page.wait_for_selector(PLACE_SELECTOR, timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+async def wait_for_maps_ready(page, timeout=30000):
+    try:
+        await page.wait_for_selector(SEARCHBOX_SELECTOR, timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+async def scroll_feed(page, max_steps=25,
+                      step_timeout=SCROLL_STEP_TIMEOUT,
+                      max_step_timeout=SCROLL_MAX_STEP_TIMEOUT,
+                      max_idle=SCROLL_MAX_IDLE,
+                      total_timeout=SCROLL_TOTAL_TIMEOUT):
+    """
+    Scrolls div[role='feed'] until the end-of-list marker appears or the feed
+    stops growing. Returns {steps, ended, cards, ms} (None if no feed).
+    """
+    feed = await page.query_selector("div[role='feed']")
+    if not feed:
+        return None
+
+    return await page.evaluate(SCROLL_FEED_JS, [feed, {
+        "endSelector": END_OF_LIST_SELECTOR,
+        "maxSteps": max_steps,
+        "stepTimeout": step_timeout,
+        "maxStepTimeout": max_step_timeout,
+        "maxIdle": max_idle,
+        "totalTimeout": total_timeout,
+    }])